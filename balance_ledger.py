@@ -0,0 +1,158 @@
+import datetime
+import logging
+import time
+
+log = logging.getLogger('mxp.db')
+
+# Tipo do evento -> (seção, campo) do registro que ele altera
+KINDS = {
+    'money': ('economy', 'money'),
+    'fame': ('economy', 'fame'),
+    'followers': ('profile', 'followers'),
+    'likes': ('profile', 'total_likes'),
+}
+
+
+class BalanceLedger:
+    """Livro só de inserção com cada alteração de dinheiro, fama, seguidores e curtidas
+
+    Cada evento é {user_id, kind, delta, reason, seq}; seq (microssegundos, crescente)
+    também fica em ledger_seq do registro alterado. Os registros em memória são a projeção
+    dos eventos e o documento gravado pelo write-behind é o snapshot: ao carregar um usuário,
+    replay() aplica só os eventos com seq maior que o ledger_seq do snapshot (eventos
+    gravados antes de uma queda que não chegou a gravar o documento).
+
+    stores: {seção: DirtyTrackingStore} com registros que têm ledger_seq. Os eventos são
+    gravados pelo StorageBackend (no MongoDB, uma coleção por mês).
+    """
+
+    def __init__(self, stores, get_storage, io, retention_months=12):
+        self.stores = stores
+        self.get_storage = get_storage  # () -> StorageBackend ou None
+        self.io = io
+        self.retention_months = retention_months
+        self._last_seq = 0
+        self._buffer = []
+
+        # Contadores expostos em stats()
+        self.events = 0
+        self.written = 0
+        self.replayed = 0
+
+    @property
+    def pending_count(self):
+        return len(self._buffer)
+
+    def next_seq(self):
+        seq = max(self._last_seq + 1, time.time_ns() // 1000)
+        self._last_seq = seq
+        return seq
+
+    def record(self, user_id, kind, delta, reason, seq=None):
+        """Registra uma alteração já aplicada no registro (ex.: lote de curtidas, compra no banco)"""
+        if not delta:
+            return
+        seq = seq or self.next_seq()
+        section, _ = KINDS[kind]
+        record = self.stores[section].get(user_id)
+        if record is not None and record.ledger_seq < seq:
+            record.ledger_seq = seq
+        self._buffer.append({
+            '_id': f'{user_id}:{seq}:{kind}',
+            'user_id': user_id,
+            'kind': kind,
+            'delta': delta,
+            'reason': reason,
+            'seq': seq,
+        })
+        self.events += 1
+
+    def apply(self, user_id, kind, delta, reason, floor=None):
+        """Soma delta no campo do registro (com piso opcional) e registra o evento; retorna o novo valor"""
+        section, field = KINDS[kind]
+        record = self.stores[section][user_id]
+        old = record[field] or 0
+        new = old + delta if floor is None else max(floor, old + delta)
+        record[field] = new
+        self.record(user_id, kind, new - old, reason)
+        return new
+
+    def set(self, user_id, kind, value, reason):
+        """Define o valor do campo (registrado como a diferença para o valor anterior)"""
+        section, field = KINDS[kind]
+        return self.apply(user_id, kind, value - (self.stores[section][user_id][field] or 0), reason)
+
+    async def flush(self):
+        """Grava os eventos pendentes; retorna quantos foram gravados"""
+        if not self._buffer:
+            return 0
+        storage = self.get_storage()
+        if storage is None:
+            return 0
+        batch, self._buffer = self._buffer, []
+        try:
+            failed = await self.io.run(storage.append_events, batch)
+        except Exception as e:
+            log.error("❌ Erro ao gravar eventos de saldo: %s", e)
+            failed = batch
+        self._buffer = failed + self._buffer
+        self.written += len(batch) - len(failed)
+        return len(batch) - len(failed)
+
+    async def replay(self, user_ids):
+        """Aplica nos usuários recém-carregados os eventos posteriores ao snapshot deles"""
+        storage = self.get_storage()
+        if storage is None:
+            return 0
+        snapshots = {}
+        for section, store in self.stores.items():
+            for user_id in user_ids:
+                record = store.get(user_id)
+                if record is not None:
+                    snapshots[(user_id, section)] = record.ledger_seq
+        if not snapshots:
+            return 0
+
+        events = await self.io.run(storage.events_since, list(user_ids), min(snapshots.values()))
+        applied = 0
+        for event in events:
+            section, field = KINDS[event['kind']]
+            snapshot = snapshots.get((event['user_id'], section))
+            if snapshot is None or event['seq'] <= snapshot:
+                continue
+            record = self.stores[section][event['user_id']]
+            record[field] = (record[field] or 0) + event['delta']
+            record.ledger_seq = max(record.ledger_seq, event['seq'])
+            applied += 1
+        if applied:
+            self.replayed += applied
+            log.info("♻️ %d eventos de saldo reaplicados sobre os snapshots", applied)
+        return applied
+
+    async def compact(self):
+        """Descarta os eventos mais antigos que retention_months (os snapshots já os contêm)"""
+        storage = self.get_storage()
+        if storage is None:
+            return []
+        now = datetime.datetime.utcnow()
+        month = now.year * 12 + now.month - 1 - self.retention_months
+        oldest = datetime.datetime(month // 12, month % 12 + 1, 1, tzinfo=datetime.timezone.utc)
+        dropped = await self.io.run(storage.drop_events_before, int(oldest.timestamp() * 1_000_000))
+        if dropped:
+            log.info("🧹 Eventos de saldo descartados: %s", ", ".join(dropped))
+        return dropped
+
+    async def clear(self):
+        """Apaga todos os eventos (reset total dos dados)"""
+        self._buffer.clear()
+        storage = self.get_storage()
+        if storage is not None:
+            await self.io.run(storage.delete_events)
+
+    def stats(self):
+        return {
+            'ledger_events': self.events,
+            'ledger_pending': len(self._buffer),
+            'ledger_written': self.written,
+            'ledger_replayed': self.replayed,
+        }
@@ -0,0 +1,49 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Todos os loggers do bot ficam debaixo de "mxp" (mxp.db, mxp.messages, mxp.reactions, ...)
+ROOT_LOGGER = 'mxp'
+
+_listener = None
+
+
+def setup_logging(level=None):
+    """Configura os logs do bot: nível via LOG_LEVEL (padrão INFO) e escrita em uma thread separada
+
+    Quem loga só coloca o registro numa fila (QueueHandler); a formatação e o write no stdout
+    acontecem na thread do QueueListener, então um terminal lento não trava o event loop.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = level or os.getenv('LOG_LEVEL', 'INFO')
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s', '%H:%M:%S'))
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Esvazia a fila de logs (chamado no desligamento)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name):
+    """Logger de um subsistema do bot (ex.: get_logger('db') -> mxp.db)"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
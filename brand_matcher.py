@@ -0,0 +1,93 @@
+from collections import deque
+
+
+def _is_word_char(c):
+    """Mesma noção de caractere de palavra do \\w do módulo re (unicode)"""
+    return c.isalnum() or c == '_'
+
+
+class BrandMatcher:
+    """Detecta todas as marcas de um catálogo em uma única passada pelo texto (autômato Aho–Corasick)
+
+    O autômato é montado uma vez só. As marcas são comparadas em minúsculas e entradas repetidas
+    (ex.: "Paramount+" duas vezes, "iFood"/"Ifood") viram uma só, com a grafia da primeira ocorrência.
+    """
+
+    def __init__(self, brands):
+        self.names = []     # índice do padrão -> nome da marca como aparece no catálogo
+        self.lengths = []   # índice do padrão -> tamanho do padrão em minúsculas
+        self.word_edges = []  # índice do padrão -> (primeiro é \w, último é \w), para emular \b
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        seen = set()
+        for brand in brands:
+            pattern = brand.lower()
+            if not pattern or pattern in seen:
+                continue
+            seen.add(pattern)
+            self._add(pattern, len(self.names))
+            self.names.append(brand)
+            self.lengths.append(len(pattern))
+            self.word_edges.append((_is_word_char(pattern[0]), _is_word_char(pattern[-1])))
+
+        self._build_failure_links()
+
+    def _add(self, pattern, index):
+        node = 0
+        for c in pattern:
+            nxt = self._goto[node].get(c)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][c] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, child in self._goto[node].items():
+                queue.append(child)
+                state = self._fail[node]
+                while state and c not in self._goto[state]:
+                    state = self._fail[state]
+                fallback = self._goto[state].get(c, 0)
+                self._fail[child] = fallback if fallback != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _is_whole_word(self, text, index, start, end):
+        """Equivalente a re.search(r'\\b' + marca + r'\\b') nessa posição"""
+        first_is_word, last_is_word = self.word_edges[index]
+        before = start > 0 and _is_word_char(text[start - 1])
+        after = end < len(text) and _is_word_char(text[end])
+        return before != first_is_word and after != last_is_word
+
+    def find(self, text):
+        """Retorna [(marca, palavra_completa)] na ordem do catálogo, para o texto já em minúsculas
+
+        palavra_completa é True se a marca aparece ao menos uma vez como palavra inteira;
+        caso contrário ela foi encontrada só como parte de outra palavra.
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        found = {}  # índice do padrão -> já apareceu como palavra completa?
+
+        node = 0
+        for position, c in enumerate(text):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            for index in out[node]:
+                if found.get(index):
+                    continue
+                end = position + 1
+                found[index] = self._is_whole_word(text, index, end - self.lengths[index], end)
+
+        return [(self.names[index], found[index]) for index in sorted(found)]
@@ -0,0 +1,86 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+
+OPTIONS_PER_PAGE = 25  # Discord limita um select a 25 opções
+
+
+def item_id(nome):
+    """Id estável de um item a partir do nome ("🏎️ BMW M3" -> "bmw-m3"), usado como chave no banco"""
+    text = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogItem:
+    id: str
+    nome: str
+    preco: int
+    categoria: str  # Categoria de exibição (ex.: "Supercars")
+    tipo: str       # Seção da lojinha e do inventário (carros, mansoes, itens_diarios)
+
+
+class Catalog:
+    """Índices da lojinha montados uma vez, na importação, a partir de LOJA_ITEMS
+
+    Por seção (tipo) há os itens por id, a lista do mais barato ao mais caro e essa lista
+    separada por categoria. As opções de select de cada página (até 25 itens) também já
+    ficam prontas em tuplas: abrir uma página da loja não monta nada, e categorias com mais
+    de 25 itens são só mais páginas. make_option(item) monta a opção de um item
+    (discord.SelectOption no bot).
+    """
+
+    def __init__(self, loja_items, make_option, per_page=OPTIONS_PER_PAGE):
+        self.per_page = per_page
+        self._by_id = {}        # tipo -> {id: item}
+        self._listings = {}     # (tipo, categoria ou None para todos) -> itens por preço
+        self._options = {}      # mesma chave -> (opções da página 1, opções da página 2, ...)
+
+        for tipo, items in loja_items.items():
+            entries = [CatalogItem(item_id(nome), nome, info['preco'], info['categoria'], tipo)
+                       for nome, info in items.items()]
+            self._by_id[tipo] = {item.id: item for item in entries}
+            if len(self._by_id[tipo]) != len(entries):
+                raise ValueError(f"Itens com o mesmo id em LOJA_ITEMS['{tipo}']")
+
+            by_price = tuple(sorted(entries, key=lambda item: (item.preco, item.nome)))
+            self._listings[(tipo, None)] = by_price
+            groups = {}
+            for item in by_price:
+                groups.setdefault(item.categoria, []).append(item)
+            for categoria, group in groups.items():
+                self._listings[(tipo, categoria)] = tuple(group)
+
+        for key, listing in self._listings.items():
+            self._options[key] = tuple(
+                tuple(make_option(item) for item in listing[start:start + per_page])
+                for start in range(0, len(listing), per_page)
+            ) or ((),)
+
+        self.cheapest_price = min((item.preco for items in self._by_id.values() for item in items.values()), default=0)
+
+    def get(self, tipo, item_id):
+        """Item pelo id, ou None se não está (mais) no catálogo"""
+        return self._by_id.get(tipo, {}).get(item_id)
+
+    def items(self, tipo, categoria=None):
+        """Itens da seção (ou só da categoria), do mais barato ao mais caro"""
+        return self._listings.get((tipo, categoria), ())
+
+    def categories(self, tipo):
+        return [categoria for key_tipo, categoria in self._listings if key_tipo == tipo and categoria is not None]
+
+    def pages(self, tipo, categoria=None):
+        return len(self._options.get((tipo, categoria), ((),)))
+
+    def page(self, tipo, categoria=None, page=0):
+        """(itens da página, página ajustada ao intervalo válido, total de páginas)"""
+        pages = self.pages(tipo, categoria)
+        page = min(max(page, 0), pages - 1)
+        start = page * self.per_page
+        return self.items(tipo, categoria)[start:start + self.per_page], page, pages
+
+    def options(self, tipo, categoria=None, page=0):
+        """Opções de select já montadas da página (tupla compartilhada: não alterar)"""
+        pages = self._options.get((tipo, categoria), ((),))
+        return pages[min(max(page, 0), len(pages) - 1)]
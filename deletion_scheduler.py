@@ -0,0 +1,136 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+import discord
+
+log = logging.getLogger('mxp.messages')
+
+BULK_DELETE_LIMIT = 100  # Máximo de mensagens por chamada de bulk delete do Discord
+
+
+class DeletionScheduler:
+    """Apaga mensagens do bot depois de um atraso com uma única task e um heap de prazos
+
+    schedule() só guarda (prazo, canal, mensagem) no heap, sem objetos do gateway, então
+    reconexões não afetam o que está agendado. A task dorme até o prazo mais próximo, junta
+    tudo o que venceu e apaga por canal com delete_messages (bulk delete, até 100 por
+    chamada); em canais sem permissão de Gerenciar Mensagens, apaga uma a uma.
+    """
+
+    def __init__(self, get_channel):
+        self.get_channel = get_channel  # channel_id -> canal (ou None se não está no cache)
+        self._heap = []                 # (prazo monotônico, seq, channel_id, message_id)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._no_bulk = set()           # Canais onde o bulk delete foi negado
+
+        # Contadores expostos em stats()
+        self.scheduled = 0
+        self.deleted = 0
+        self.bulk_batches = 0
+        self.failed = 0
+
+    @property
+    def pending(self):
+        return len(self._heap)
+
+    def schedule(self, message, delay):
+        """Agenda a exclusão da mensagem daqui a delay segundos"""
+        deadline = time.monotonic() + delay
+        heapq.heappush(self._heap, (deadline, next(self._seq), message.channel.id, message.id))
+        self.scheduled += 1
+        if self._heap[0][0] == deadline:
+            self._wakeup.set()  # Novo prazo mais próximo: a task recalcula quanto dormir
+
+    def start(self):
+        """Inicia a task (chamado no on_ready; pode ser chamado de novo em reconexões)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, flush=True):
+        """Encerra a task; com flush, apaga já tudo o que estava agendado. Retorna quantas estavam pendentes"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        due = self._pop_due(float('inf'))
+        if flush and due:
+            await self._delete(due)
+        return len(due)
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        return due
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._delete(self._pop_due(time.monotonic()))
+            except Exception as e:
+                log.exception("❌ Erro ao apagar mensagens agendadas: %s", e)
+
+    async def _delete(self, due):
+        by_channel = {}
+        for _, _, channel_id, message_id in due:
+            by_channel.setdefault(channel_id, []).append(message_id)
+
+        for channel_id, message_ids in by_channel.items():
+            channel = self.get_channel(channel_id)
+            if channel is None:
+                self.failed += len(message_ids)
+                log.warning("⚠️ Canal %s indisponível: %d mensagens não foram apagadas", channel_id, len(message_ids))
+                continue
+            if len(message_ids) == 1 or channel_id in self._no_bulk or not hasattr(channel, 'delete_messages'):
+                await self._delete_each(channel, message_ids)
+                continue
+            for start in range(0, len(message_ids), BULK_DELETE_LIMIT):
+                chunk = message_ids[start:start + BULK_DELETE_LIMIT]
+                try:
+                    await channel.delete_messages([discord.Object(id=message_id) for message_id in chunk])
+                    self.deleted += len(chunk)
+                    self.bulk_batches += 1
+                    continue
+                except discord.Forbidden:
+                    self._no_bulk.add(channel_id)  # Sem Gerenciar Mensagens: as próximas vão uma a uma
+                except discord.HTTPException as e:
+                    log.debug("Bulk delete falhou no canal %s (%s), apagando uma a uma", channel_id, e)
+                await self._delete_each(channel, chunk)
+
+    async def _delete_each(self, channel, message_ids):
+        for message_id in message_ids:
+            try:
+                await channel.get_partial_message(message_id).delete()
+                self.deleted += 1
+            except discord.NotFound:
+                log.debug("⚠️ Mensagem %s já foi deletada", message_id)
+            except discord.HTTPException as e:
+                self.failed += 1
+                log.warning("❌ Não foi possível apagar a mensagem %s: %s", message_id, e)
+
+    def stats(self):
+        return {
+            'pending_deletions': len(self._heap),
+            'next_deletion_in': max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else None,
+            'scheduled_deletions': self.scheduled,
+            'deleted': self.deleted,
+            'bulk_batches': self.bulk_batches,
+            'failed_deletions': self.failed,
+        }
@@ -0,0 +1,44 @@
+from catalog import CatalogItem, item_id
+
+# Categorias do inventário (mesmas chaves de LOJA_ITEMS)
+CATEGORIES = ('carros', 'mansoes', 'itens_diarios')
+
+# Categorias de itens do dia a dia que podem ser usados com m!usar
+USABLE_ITEM_CATEGORIES = ('Eletrônicos', 'Games', 'Bebidas', 'Comidas')
+
+
+def compact_inventory(section):
+    """Converte a seção inventory antiga (listas de itens comprados) em {item_id: quantidade} + totais"""
+    compacted = {'counts': {}, 'net_worth': 0}
+    for category in CATEGORIES:
+        owned = {}
+        for item in section.get(category) or []:
+            if not isinstance(item, dict) or not item.get('nome'):
+                continue
+            key = item_id(item['nome'])
+            owned[key] = owned.get(key, 0) + 1
+            compacted['net_worth'] += item.get('preco', 0)
+        compacted[category] = owned
+        compacted['counts'][category] = sum(owned.values())
+    return compacted
+
+
+def inventory_entries(inventory, category, catalog):
+    """[(CatalogItem, quantidade)] da categoria, do mais caro ao mais barato
+
+    Itens que saíram do catálogo aparecem com o id como nome e preço 0. O tamanho é limitado
+    pelo catálogo, não pelo número de compras.
+    """
+    return sorted(
+        ((catalog.get(category, key) or CatalogItem(key, key, 0, '', category), quantity)
+         for key, quantity in (inventory[category] or {}).items() if quantity > 0),
+        key=lambda entry: (-entry[0].preco, entry[0].nome)
+    )
+
+
+def inventory_page(inventory, category, catalog, page=0, per_page=10):
+    """Uma página de inventory_entries(); retorna (itens da página, página ajustada, total de páginas)"""
+    entries = inventory_entries(inventory, category, catalog)
+    pages = max(1, -(-len(entries) // per_page))
+    page = min(max(page, 0), pages - 1)
+    return entries[page * per_page:(page + 1) * per_page], page, pages
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import signal
+import time
+
+log = logging.getLogger('mxp.bot')
+
+
+class LifecycleManager:
+    """Ciclo de vida do bot: sobe o gateway e, no SIGTERM/SIGINT, desliga gravando tudo
+
+    O desligamento acontece em etapas: para de aceitar alterações (stopping), fecha a conexão
+    com o Discord, chama drain() para esvaziar as filas e gravar o que estiver pendente (com
+    prazo de deadline segundos) e por fim close() para fechar o cliente do banco.
+    drain() deve retornar quantos registros foram gravados. before_close(), se informado, roda
+    antes de fechar o gateway, para o que ainda precisa da API do Discord.
+    """
+
+    SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+    def __init__(self, bot, drain, close, deadline=20.0, before_close=None):
+        self.bot = bot
+        self.drain = drain
+        self.close = close
+        self.before_close = before_close
+        self.deadline = deadline
+        self.stopping = False
+        self._close_task = None
+
+    def request_stop(self, reason):
+        """Para de aceitar alterações e fecha o gateway (bot.start retorna em seguida)"""
+        if self.stopping:
+            return
+        self.stopping = True
+        log.info("🛑 Desligamento solicitado (%s): novas alterações bloqueadas", reason)
+        self._close_task = asyncio.get_running_loop().create_task(self._close_gateway())
+
+    async def _close_gateway(self):
+        if self.before_close is not None:
+            try:
+                await asyncio.wait_for(self.before_close(), timeout=self.deadline / 4)
+            except asyncio.TimeoutError:
+                log.warning("⏱️ Prazo esgotado antes de fechar o gateway")
+            except Exception as e:
+                log.error("❌ Erro antes de fechar o gateway: %s", e)
+        await self.bot.close()
+
+    def _install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for sig in self.SIGNALS:
+            try:
+                loop.add_signal_handler(sig, self.request_stop, sig.name)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows / fora da thread principal: fica só com o KeyboardInterrupt
+
+    async def run(self, token):
+        """Roda o bot até um sinal (ou queda do gateway) e então faz o desligamento completo"""
+        self._install_signal_handlers()
+        try:
+            await self.bot.start(token)
+        finally:
+            self.stopping = True
+            if not self.bot.is_closed():
+                await self.bot.close()
+            await self.shutdown()
+
+    async def shutdown(self):
+        started = time.perf_counter()
+        flushed = 0
+        try:
+            flushed = await asyncio.wait_for(self.drain(), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            log.error("⏱️ Prazo de %.0fs do desligamento esgotado: alguns dados podem não ter sido gravados", self.deadline)
+        except Exception as e:
+            log.exception("❌ Erro ao gravar dados no desligamento: %s", e)
+        finally:
+            try:
+                self.close()
+            except Exception as e:
+                log.error("❌ Erro ao fechar conexões: %s", e)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        log.info("👋 Desligamento concluído: %d registros gravados em %.0fms", flushed, elapsed_ms)
@@ -0,0 +1,110 @@
+import logging
+from collections import OrderedDict
+
+log = logging.getLogger('mxp.reactions')
+
+
+class LikeLedger:
+    """Livro de curtidas por (message_id, reactor_id)
+
+    Cada reação só guarda o estado mais recente (curtiu/descurtiu) até o próximo flush, então
+    ficar alternando a reação custa uma entrada em memória e nenhuma gravação. No flush, só a
+    diferença em relação ao que já foi aplicado vira alteração em user_data, e a descurtida
+    devolve exatamente os seguidores que aquela curtida rendeu.
+    """
+
+    def __init__(self, new_record, gain_rate=0.005, max_entries=200000):
+        self.new_record = new_record  # fábrica do registro de um usuário novo
+        self.gain_rate = gain_rate
+        self.max_entries = max_entries
+        self._pending = {}            # (message_id, reactor_id) -> [autor, curtido?, estado anterior, canal bônus?, nome]
+        self._applied = OrderedDict()  # (message_id, reactor_id) -> seguidores concedidos pela curtida
+        self.events = 0
+        self.flushes = 0
+        self.legacy_removals = 0
+
+    def like(self, message_id, reactor_id, author_id, boosted, name=None):
+        self._record((message_id, reactor_id), author_id, True, boosted, name)
+
+    def unlike(self, message_id, reactor_id, author_id, boosted, name=None):
+        self._record((message_id, reactor_id), author_id, False, boosted, name)
+
+    def _record(self, key, author_id, liked, boosted, name):
+        self.events += 1
+        entry = self._pending.get(key)
+        if entry is not None:
+            entry[1] = liked
+            return
+        # Sem registro aplicado, o primeiro evento diz o estado anterior: uma descurtida
+        # só chega para uma curtida feita antes do bot conhecê-la (reinício ou entrada expirada)
+        before = key in self._applied or not liked
+        self._pending[key] = [author_id, liked, before, boosted, name]
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def pending_authors(self):
+        """Autores com curtidas ainda não aplicadas"""
+        return {entry[0] for entry in self._pending.values()}
+
+    def flush(self, store):
+        """Aplica as mudanças pendentes em store e retorna {autor: [curtidas, seguidores, nome]}"""
+        if not self._pending:
+            return {}
+        pending, self._pending = self._pending, {}
+        self.flushes += 1
+        summary = {}
+
+        for key, (author_id, liked, before, boosted, name) in pending.items():
+            if liked == before:
+                continue  # Voltou ao estado anterior (ou evento repetido)
+
+            if liked:
+                if author_id not in store:
+                    store[author_id] = self.new_record()
+                data = store[author_id]
+                gain = int(data.followers * self.gain_rate) if boosted else 0
+                data.total_likes += 1
+                data.followers += gain
+                self._remember(key, gain)
+                likes_delta, followers_delta = 1, gain
+            else:
+                if author_id not in store:
+                    log.warning("❌ Tentativa de remover curtida de usuário não registrado: %s (ID: %s)", name, author_id)
+                    continue
+                data = store[author_id]
+                if key in self._applied:
+                    loss = self._applied.pop(key)
+                else:
+                    # Curtida anterior ao livro: sem o ganho original, recalcula sobre a base atual
+                    self.legacy_removals += 1
+                    loss = int(data.followers * self.gain_rate) if boosted else 0
+                data.total_likes = max(0, data.total_likes - 1)
+                data.followers = max(0, data.followers - loss)
+                likes_delta, followers_delta = -1, -loss
+
+            totals = summary.setdefault(author_id, [0, 0, name])
+            totals[0] += likes_delta
+            totals[1] += followers_delta
+
+        return summary
+
+    def clear(self):
+        """Esquece todas as curtidas, pendentes e aplicadas (reset total dos dados)"""
+        self._pending.clear()
+        self._applied.clear()
+
+    def _remember(self, key, gain):
+        self._applied[key] = gain
+        if len(self._applied) > self.max_entries:
+            self._applied.popitem(last=False)  # Esquece a curtida mais antiga
+
+    def stats(self):
+        return {
+            'like_events': self.events,
+            'pending_likes': len(self._pending),
+            'tracked_likes': len(self._applied),
+            'like_flushes': self.flushes,
+            'legacy_removals': self.legacy_removals,
+        }
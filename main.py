@@ -5,32 +5,74 @@ import random
 from dotenv import load_dotenv
 import json
 import asyncio
+import uuid
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
 import datetime
 import ssl
 from keep_alive import keep_alive
+from bot_logging import setup_logging, get_logger
+from brand_matcher import BrandMatcher
+from reaction_pipeline import ReactionPipeline
+from deletion_scheduler import DeletionScheduler
+from like_ledger import LikeLedger
+from ranking_index import RankingIndex, RankingSnapshotCache
+from social_graph import FollowGraph
+from recommender import FollowRecommender
+from lifecycle import LifecycleManager
+from persistence import DirtyTrackingStore, StorageExecutor, WriteBehindFlusher
+from records import DEFAULT_PROFILE_COLOR, UserProfile, Wallet, Inventory, BrandPosts
+from sponsorship import SponsorshipLedger, RecentMessageIds
+from rate_limiter import CooldownEngine
+from wallet import WalletService, PURCHASED, DUPLICATE, FAILED
+from balance_ledger import BalanceLedger
+from catalog import Catalog
+from inventory import USABLE_ITEM_CATEGORIES, inventory_entries, inventory_page
+from user_documents import USERS_COLLECTION
+from mongo_storage import MongoBackend
+from sqlite_storage import SQLiteBackend
+from user_cache import UserCache, UserSummaries
 
 # Carrega variáveis do arquivo .env
 load_dotenv()
 
+# Logs por subsistema (nível via LOG_LEVEL; DEBUG desligado por padrão)
+setup_logging()
+log = get_logger('bot')
+db_log = get_logger('db')
+message_log = get_logger('messages')
+reaction_log = get_logger('reactions')
+ranking_log = get_logger('ranking')
+command_log = get_logger('commands')
+
 # Configuração do MongoDB
 MONGODB_CONNECTION_STRING = os.getenv('MONGODB_TOKEN')
 
 # String alternativa sem SRV (caso SRV falhe) - será gerada dinamicamente se necessário
 MONGODB_CONNECTION_STRING_ALT = None
 
+# Armazenamento: "mongo" (padrão com MONGODB_TOKEN) ou "sqlite" (arquivo local, sem serviço externo)
+STORAGE_BACKEND = (os.getenv('STORAGE_BACKEND') or ('mongo' if MONGODB_CONNECTION_STRING else 'sqlite')).lower()
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'instagram_mxp.db')
+
 # Cliente MongoDB
 mongo_client = None
 db = None
 
+# Backend conectado (MongoBackend ou SQLiteBackend); None enquanto não conecta
+storage = None
+
+# Todo I/O do armazenamento roda nesta fila de threads, nunca direto no event loop
+STORAGE_IO_WORKERS = 2
+storage_io = StorageExecutor(max_workers=STORAGE_IO_WORKERS)
+
 def init_mongodb():
     """Inicializa a conexão com MongoDB com timeout rápido"""
     global mongo_client, db
     
     if not MONGODB_CONNECTION_STRING:
-        print("❌ MONGODB_TOKEN não encontrado nas variáveis de ambiente!")
-        print("🔧 Configure MONGODB_TOKEN nos Secrets do Replit com sua connection string do MongoDB Atlas")
+        db_log.error("❌ MONGODB_TOKEN não encontrado nas variáveis de ambiente!")
+        db_log.warning("🔧 Configure MONGODB_TOKEN nos Secrets do Replit com sua connection string do MongoDB Atlas")
         return False
     
     # Configurações otimizadas e simplificadas
@@ -41,7 +83,7 @@ def init_mongodb():
                 "serverSelectionTimeoutMS": 5000,
                 "connectTimeoutMS": 3000,
                 "socketTimeoutMS": 5000,
-                "maxPoolSize": 1,
+                "maxPoolSize": STORAGE_IO_WORKERS,
                 "retryWrites": True,
                 "w": 'majority'
             },
@@ -53,7 +95,7 @@ def init_mongodb():
                 "serverSelectionTimeoutMS": 3000,
                 "connectTimeoutMS": 2000,
                 "socketTimeoutMS": 3000,
-                "maxPoolSize": 1,
+                "maxPoolSize": STORAGE_IO_WORKERS,
                 "retryWrites": False
             },
             "name": "MongoDB Atlas Direto (Sem SRV)"
@@ -62,7 +104,7 @@ def init_mongodb():
     
     for config in connection_configs:
         try:
-            print(f"🔄 Tentando: {config['name']}")
+            db_log.debug(f"🔄 Tentando: {config['name']}")
             mongo_client = MongoClient(config["uri"], **config["options"])
             
             # Testa a conexão com timeout rápido
@@ -81,12 +123,12 @@ def init_mongodb():
             else:
                 db = mongo_client.instagram_mxp
             
-            print(f"✅ MongoDB conectado: {config['name']}")
-            print(f"📊 Banco: {db.name}")
+            db_log.info(f"✅ MongoDB conectado: {config['name']}")
+            db_log.info(f"📊 Banco: {db.name}")
             return True
             
         except Exception as e:
-            print(f"❌ Falha em {config['name']}: {str(e)[:50]}...")
+            db_log.warning(f"❌ Falha em {config['name']}: {str(e)[:50]}...")
             if mongo_client:
                 try:
                     mongo_client.close()
@@ -94,14 +136,36 @@ def init_mongodb():
                     pass
             continue
     
-    print("❌ MongoDB indisponível - bot funcionará apenas localmente")
-    print("💡 Para resolver:")
-    print("   1. Verifique MONGODB_TOKEN nos Secrets")
-    print("   2. Use connection string sem SRV se possível")
-    print("   3. Whitelist IP 0.0.0.0/0 no MongoDB Atlas")
+    db_log.warning("❌ MongoDB indisponível - bot funcionará apenas localmente")
+    db_log.warning("💡 Para resolver:")
+    db_log.warning("   1. Verifique MONGODB_TOKEN nos Secrets")
+    db_log.warning("   2. Use connection string sem SRV se possível")
+    db_log.warning("   3. Whitelist IP 0.0.0.0/0 no MongoDB Atlas")
     return False
 
-class ProfileUpdateModal(discord.ui.Modal, title='Atualizar Perfil'):
+async def load_interaction_users(interaction, *user_ids):
+    """Carrega quem interagiu e os usuários indicados antes de um callback ler ou alterar as stores
+
+    Callbacks de views e modais não passam pelo before_invoke, e o usuário pode ter saído do
+    working set (ou m!recarregar_dados ter limpado a memória) enquanto a view estava aberta.
+    """
+    await user_cache.ensure(str(interaction.user.id), *(user_id for user_id in user_ids if user_id))
+
+class UserDataView(discord.ui.View):
+    """View cujos botões e menus usam dados de usuários: carrega quem clicou e o dono (user_id) antes de cada um"""
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        await load_interaction_users(interaction, getattr(self, 'user_id', None))
+        return True
+
+class UserDataModal(discord.ui.Modal):
+    """Modal que altera dados de quem o enviou: carrega o usuário antes do on_submit"""
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        await load_interaction_users(interaction)
+        return True
+
+class ProfileUpdateModal(UserDataModal, title='Atualizar Perfil'):
     def __init__(self, current_username="", current_profession=""):
         super().__init__()
         
@@ -129,16 +193,7 @@ class ProfileUpdateModal(discord.ui.Modal, title='Atualizar Perfil'):
 
         # Inicializa dados do usuário se não existir
         if user_id not in user_data:
-            user_data[user_id] = {
-                'username': None,
-                'total_likes': 0,
-                'posts_count': 0,
-                'followers': 0,
-                'profession': None,
-                'thumbnail_url': None,
-                'embed_image_url': None,
-                'profile_color': 0x9932CC
-            }
+            user_data[user_id] = UserProfile()
 
         # Atualiza os dados
         user_data[user_id]['username'] = str(self.username.value)
@@ -146,7 +201,7 @@ class ProfileUpdateModal(discord.ui.Modal, title='Atualizar Perfil'):
         
         # Salva imediatamente
         save_user_data()
-        print(f"💾 Dados salvos após atualização de perfil: {user_id}")
+        command_log.debug(f"💾 Dados salvos após atualização de perfil: {user_id}")
 
         # Embed de confirmação
         embed = discord.Embed(
@@ -170,7 +225,7 @@ class ProfileUpdateModal(discord.ui.Modal, title='Atualizar Perfil'):
         # Responde com confirmação
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-class BioUpdateModal(discord.ui.Modal, title='Atualizar Bio e Status'):
+class BioUpdateModal(UserDataModal, title='Atualizar Bio e Status'):
     def __init__(self, current_bio="", current_status=""):
         super().__init__()
         
@@ -199,18 +254,7 @@ class BioUpdateModal(discord.ui.Modal, title='Atualizar Bio e Status'):
 
         # Inicializa dados do usuário se não existir
         if user_id not in user_data:
-            user_data[user_id] = {
-                'username': None,
-                'total_likes': 0,
-                'posts_count': 0,
-                'followers': 0,
-                'profession': None,
-                'thumbnail_url': None,
-                'embed_image_url': None,
-                'profile_color': 0x9932CC,
-                'bio': None,
-                'status': None
-            }
+            user_data[user_id] = UserProfile()
 
         # Atualiza os dados
         user_data[user_id]['bio'] = str(self.bio.value) if self.bio.value else None
@@ -218,7 +262,7 @@ class BioUpdateModal(discord.ui.Modal, title='Atualizar Bio e Status'):
         
         # Salva imediatamente
         save_user_data()
-        print(f"💾 Bio e status salvos para: {user_id}")
+        command_log.debug(f"💾 Bio e status salvos para: {user_id}")
 
         # Embed de confirmação
         embed = discord.Embed(
@@ -247,7 +291,7 @@ class BioUpdateModal(discord.ui.Modal, title='Atualizar Bio e Status'):
         # Responde com confirmação
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-class LinksUpdateModal(discord.ui.Modal, title='Atualizar Links Sociais'):
+class LinksUpdateModal(UserDataModal, title='Atualizar Links Sociais'):
     def __init__(self, current_instagram="", current_youtube="", current_tiktok=""):
         super().__init__()
         
@@ -284,30 +328,17 @@ class LinksUpdateModal(discord.ui.Modal, title='Atualizar Links Sociais'):
 
         # Inicializa dados do usuário se não existir
         if user_id not in user_data:
-            user_data[user_id] = {
-                'username': None,
-                'total_likes': 0,
-                'posts_count': 0,
-                'followers': 0,
-                'profession': None,
-                'thumbnail_url': None,
-                'embed_image_url': None,
-                'profile_color': 0x9932CC,
-                'social_links': {}
-            }
-
-        # Inicializa links sociais se não existir
-        if 'social_links' not in user_data[user_id]:
-            user_data[user_id]['social_links'] = {}
+            user_data[user_id] = UserProfile()
 
         # Atualiza os links
-        user_data[user_id]['social_links']['instagram'] = str(self.instagram.value) if self.instagram.value else None
-        user_data[user_id]['social_links']['youtube'] = str(self.youtube.value) if self.youtube.value else None
-        user_data[user_id]['social_links']['tiktok'] = str(self.tiktok.value) if self.tiktok.value else None
+        social_links = user_data[user_id].setdefault('social_links', {})
+        social_links['instagram'] = str(self.instagram.value) if self.instagram.value else None
+        social_links['youtube'] = str(self.youtube.value) if self.youtube.value else None
+        social_links['tiktok'] = str(self.tiktok.value) if self.tiktok.value else None
         
         # Salva imediatamente
         save_user_data()
-        print(f"💾 Links sociais salvos para: {user_id}")
+        command_log.debug(f"💾 Links sociais salvos para: {user_id}")
 
         # Embed de confirmação
         embed = discord.Embed(
@@ -343,7 +374,7 @@ class LinksUpdateModal(discord.ui.Modal, title='Atualizar Links Sociais'):
         # Responde com confirmação
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-class ImageTypeView(discord.ui.View):
+class ImageTypeView(UserDataView):
     def __init__(self, user_id):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -372,18 +403,11 @@ class ImageTypeView(discord.ui.View):
 
             if message.attachments:
                 image_url = message.attachments[0].url
+                await user_cache.ensure(self.user_id)  # Pode ter saído da memória durante a espera
 
                 # Inicializa dados do usuário se não existir
                 if self.user_id not in user_data:
-                    user_data[self.user_id] = {
-                        'username': None,
-                        'total_likes': 0,
-                        'posts_count': 0,
-                        'followers': 0,
-                        'profession': None,
-                        'thumbnail_url': None,
-                        'embed_image_url': None
-                    }
+                    user_data[self.user_id] = UserProfile()
 
                 # Salva a URL da thumbnail
                 user_data[self.user_id]['thumbnail_url'] = image_url
@@ -431,18 +455,11 @@ class ImageTypeView(discord.ui.View):
 
             if message.attachments:
                 image_url = message.attachments[0].url
+                await user_cache.ensure(self.user_id)  # Pode ter saído da memória durante a espera
 
                 # Inicializa dados do usuário se não existir
                 if self.user_id not in user_data:
-                    user_data[self.user_id] = {
-                        'username': None,
-                        'total_likes': 0,
-                        'posts_count': 0,
-                        'followers': 0,
-                        'profession': None,
-                        'thumbnail_url': None,
-                        'embed_image_url': None
-                    }
+                    user_data[self.user_id] = UserProfile()
 
                 # Salva a URL da imagem do embed
                 user_data[self.user_id]['embed_image_url'] = image_url
@@ -466,7 +483,7 @@ class ImageTypeView(discord.ui.View):
             channel = bot.get_channel(interaction.channel_id) or interaction.user
             await channel.send(embed=timeout_embed)
 
-class ThemeSelectView(discord.ui.View):
+class ThemeSelectView(UserDataView):
     def __init__(self, user_id):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -483,7 +500,7 @@ class ThemeSelectView(discord.ui.View):
         # Volta ao menu principal de atualização
         await show_main_update_menu(interaction, self.user_id)
 
-class BadgeSelectView(discord.ui.View):
+class BadgeSelectView(UserDataView):
     def __init__(self, user_id):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -500,7 +517,7 @@ class BadgeSelectView(discord.ui.View):
         # Volta ao menu principal de atualização
         await show_main_update_menu(interaction, self.user_id)
 
-class ColorSelectView(discord.ui.View):
+class ColorSelectView(UserDataView):
     def __init__(self, user_id):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -854,7 +871,7 @@ async def show_main_update_menu(interaction, user_id):
     view = UpdateProfileView(current_username, current_profession, user_id)
     await interaction.response.edit_message(embed=embed, view=view)
 
-class UpdateProfileView(discord.ui.View):
+class UpdateProfileView(UserDataView):
     def __init__(self, current_username="", current_profession="", user_id=None):
         super().__init__(timeout=300)
         self.current_username = current_username
@@ -963,7 +980,7 @@ class UpdateProfileView(discord.ui.View):
         view = ColorSelectView(self.user_id)
         await interaction.response.edit_message(embed=embed, view=view)
 
-class ProfileView(discord.ui.View):
+class ProfileView(UserDataView):
     def __init__(self, user_id, member):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -994,49 +1011,40 @@ class ProfileView(discord.ui.View):
 
     
 
-# Sistema de dados dos usuários (em memória - em produção use banco de dados)
-user_data = {}
+# Sistema de dados dos usuários (em memória, com rastreamento de quem mudou para o write-behind)
+user_data = DirtyTrackingStore(UserProfile)
 
-# Sistema de relacionamentos sociais
-follow_data = {
-    # "user_id": {
-    #     "following": ["user_id1", "user_id2"],  # quem o usuário segue
-    #     "followers": ["user_id3", "user_id4"]   # quem segue o usuário
-    # }
-}
+# Sistema de relacionamentos sociais (grafo de quem segue quem; sempre inteiro em memória, salvo na
+# seção "follow" do usuário como {"following": ["user_id1", ...], "followers": ["user_id3", ...]})
+follow_graph = FollowGraph()
 
 # Sistema de rastreamento de resets (quem já usou o comando m!reset)
-reset_data = {
-    # "user_id": True  # True = já usou o reset
-}
+reset_data = DirtyTrackingStore()
+# "user_id": True  # True = já usou o reset
 
 # Sistema de economia (dinheiro e fama)
-economy_data = {
-    # "user_id": {
-    #     "money": 0,    # Dinheiro em reais
-    #     "fame": 0      # Pontos de fama ganhos com publicidade
-    # }
-}
-
-# Sistema de tracking de posts com marcas (para evitar spam de m!publi)
-brand_posts_data = {
-    # "user_id": {
-    #     "message_123456": {
-    #         "brands": ["Nike", "Adidas"],
-    #         "rewarded": False,
-    #         "timestamp": "2024-01-01T12:00:00"
-    #     }
-    # }
-}
+economy_data = DirtyTrackingStore(Wallet)
+# "user_id": {
+#     "money": 0,    # Dinheiro em reais
+#     "fame": 0      # Pontos de fama ganhos com publicidade
+# }
+
+# Sistema de tracking de posts com marcas (totais de patrocínio + últimos posts recompensados)
+brand_posts_data = DirtyTrackingStore(BrandPosts)
+# "user_id": {
+#     "posts": 12, "money": 85000, "fame": 4200,
+#     "recent": [{"message_id": "123456", "brands": ["Nike"], "timestamp": "2024-01-01T12:00:00", ...}]
+# }
 
 # Sistema de inventário dos usuários
-inventory_data = {
-    # "user_id": {
-    #     "carros": [{"nome": "BMW M3", "preco": 50000, "data_compra": "2024-01-01"}],
-    #     "mansoes": [],
-    #     "itens_diarios": []
-    # }
-}
+inventory_data = DirtyTrackingStore(Inventory)
+# "user_id": {
+#     "carros": {"bmw-m3": 2},          # id do item no catálogo -> quantidade
+#     "mansoes": {},
+#     "itens_diarios": {"coca-cola": 5},
+#     "counts": {"carros": 2, "itens_diarios": 5},
+#     "net_worth": 500040
+# }
 
 # Catálogo da lojinha
 LOJA_ITEMS = {
@@ -1134,6 +1142,18 @@ LOJA_ITEMS = {
     }
 }
 
+def shop_option(item):
+    """Opção do select da lojinha para um item do catálogo"""
+    return discord.SelectOption(
+        label=item.nome,
+        description=f"R$ {item.preco:,} - {item.categoria}".replace(",", "."),
+        value=item.id
+    )
+
+# Índices da lojinha (ids, preços, categorias e menus de seleção) montados uma vez
+LOJA_CATALOG = Catalog(LOJA_ITEMS, shop_option)
+INVENTORY_PAGE_SIZE = 10
+
 # Biblioteca extensa de marcas famosas para detecção de publicidade
 FAMOUS_BRANDS = [
     # Tecnologia
@@ -1223,328 +1243,202 @@ FAMOUS_BRANDS = [
     "Tom Ford", "Bottega Veneta", "Celine", "Loewe", "Jacquemus"
 ]
 
+# Autômato de detecção montado uma vez (uma passada por mensagem, em vez de um regex por marca)
+brand_matcher = BrandMatcher(FAMOUS_BRANDS)
+
+def section_value(user_id, value, now):
+    """Valor gravado na seção do documento do usuário (o próprio registro da store)"""
+    return value
+
+def record_fields(user_id, fields, now):
+    """Campos alterados de um registro, gravados como <seção>.<campo>"""
+    return fields
+
+# Write-behind: só os registros alterados são gravados (upsert/delete em lote), por tempo ou por volume
+DATA_FLUSH_SECONDS = 15
+DATA_FLUSH_THRESHOLD = 200
+
+def section_writer(section, store, to_fields=None):
+    """Cria o flusher de uma store que ocupa uma seção do documento único do usuário (coleção users)"""
+    return WriteBehindFlusher(
+        section,
+        store,
+        lambda: storage,
+        section_value,
+        storage_io,
+        max_pending=DATA_FLUSH_THRESHOLD,
+        to_fields=to_fields,
+        section=section
+    )
+
+user_data_writer = section_writer('profile', user_data, record_fields)
+follow_data_writer = section_writer('follow', follow_graph)
+reset_data_writer = section_writer('used_reset', reset_data)
+economy_data_writer = section_writer('economy', economy_data, record_fields)
+brand_posts_data_writer = section_writer('brand_posts', brand_posts_data, record_fields)
+inventory_data_writer = section_writer('inventory', inventory_data, record_fields)
+
+DATA_WRITERS = [
+    user_data_writer,
+    follow_data_writer,
+    reset_data_writer,
+    economy_data_writer,
+    brand_posts_data_writer,
+    inventory_data_writer
+]
+
+# Posts com marcas: só os últimos ficam no documento do usuário; os anteriores vão para o arquivo
+BRAND_POSTS_KEEP = 10
+sponsorships = SponsorshipLedger(
+    brand_posts_data,
+    lambda: storage,
+    storage_io,
+    keep=BRAND_POSTS_KEEP
+)
+
+# Livro de eventos de dinheiro, fama, seguidores e curtidas (partições mensais, guardadas por 12 meses)
+balance_ledger = BalanceLedger({'profile': user_data, 'economy': economy_data}, lambda: storage, storage_io)
+
+# Compras e ajustes de dinheiro: update condicional direto no banco, serializado por usuário
+wallet_service = WalletService(
+    economy_data,
+    inventory_data,
+    economy_data_writer,
+    inventory_data_writer,
+    lambda: storage,
+    storage_io,
+    lambda user_id: user_cache.ensure(user_id),
+    balance_ledger
+)
+
+async def flush_all_data():
+    """Grava os registros pendentes de todas as seções"""
+    # Eventos antes dos snapshots: se cair entre os dois, o replay reaplica os eventos
+    await balance_ledger.flush()
+    await asyncio.gather(*[writer.flush() for writer in DATA_WRITERS], sponsorships.flush_archive())
+
 def save_user_data():
-    """Salva os dados dos usuários no MongoDB"""
+    """Agenda o salvamento dos usuários alterados (gravados no próximo flush em lote)"""
     try:
-        if db is None:
-            print("❌ MongoDB não conectado - salvamento cancelado")
-            return
-        
-        collection = db.user_data
-        
-        if user_data:
-            # Salva cada usuário individualmente usando discord_id como chave primária
-            documents_saved = 0
-            for user_id, data in user_data.items():
-                try:
-                    # Cria documento com discord_id como _id
-                    doc = data.copy()
-                    doc['_id'] = user_id  # Usa discord_id como _id principal
-                    doc['updated_at'] = datetime.datetime.utcnow()
-                    
-                    # Usa upsert para evitar conflitos
-                    result = collection.replace_one(
-                        {'_id': user_id}, 
-                        doc, 
-                        upsert=True
-                    )
-                    
-                    documents_saved += 1
-                    username = data.get('username', 'sem_nome')
-                    followers = data.get('followers', 0)
-                    print(f"💾 Salvou: {user_id} -> @{username} ({followers} seguidores)")
-                    
-                except Exception as doc_error:
-                    print(f"❌ Erro ao salvar usuário {user_id}: {doc_error}")
-                    continue
-            
-            print(f"✅ MongoDB: {documents_saved}/{len(user_data)} usuários salvos com sucesso!")
-            
-            # Confirma dados salvos
-            saved_count = collection.count_documents({})
-            print(f"🔍 Total no MongoDB: {saved_count} documentos")
-            
-        else:
-            print("⚠️ Nenhum dado de usuário para salvar")
-        
+        user_data_writer.request_flush()
     except Exception as e:
-        print(f"❌ Erro geral no save_user_data: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        db_log.error(f"❌ Erro geral no save_user_data: {str(e)}")
 
 def save_follow_data():
-    """Salva os dados de relacionamentos no MongoDB"""
+    """Agenda o salvamento dos relacionamentos alterados"""
     try:
-        if db is None:
-            print("❌ Conexão com MongoDB não estabelecida")
-            return
-        
-        collection = db.follow_data
-        collection.delete_many({})
-        
-        if follow_data:
-            documents = []
-            for user_id, data in follow_data.items():
-                doc = data.copy()
-                doc['_id'] = user_id
-                doc['updated_at'] = datetime.datetime.utcnow()
-                documents.append(doc)
-            
-            collection.insert_many(documents)
-        
-        print(f"✅ Dados de relacionamentos salvos no MongoDB! Total: {len(follow_data)}")
+        follow_data_writer.request_flush()
     except Exception as e:
-        print(f"❌ Erro ao salvar dados de relacionamentos no MongoDB: {e}")
+        db_log.error(f"❌ Erro ao salvar dados de relacionamentos no MongoDB: {e}")
 
 def save_reset_data():
-    """Salva os dados de resets no MongoDB"""
+    """Agenda o salvamento dos resets alterados"""
     try:
-        if db is None:
-            return
-        
-        collection = db.reset_data
-        collection.delete_many({})
-        
-        if reset_data:
-            documents = []
-            for user_id, used in reset_data.items():
-                documents.append({
-                    '_id': user_id,
-                    'used_reset': used,
-                    'updated_at': datetime.datetime.utcnow()
-                })
-            
-            collection.insert_many(documents)
-        
-        print(f"✅ Dados de reset salvos no MongoDB! Total: {len(reset_data)}")
+        reset_data_writer.request_flush()
     except Exception as e:
-        print(f"❌ Erro ao salvar dados de reset no MongoDB: {e}")
+        db_log.error(f"❌ Erro ao salvar dados de reset no MongoDB: {e}")
 
 def save_economy_data():
-    """Salva os dados de economia no MongoDB"""
+    """Agenda o salvamento das economias alteradas"""
     try:
-        if db is None or not economy_data:
-            return
-        
-        collection = db.economy_data
-        collection.delete_many({})
-        
-        documents = []
-        for user_id, data in economy_data.items():
-            doc = data.copy()
-            doc['_id'] = user_id
-            doc['updated_at'] = datetime.datetime.utcnow()
-            documents.append(doc)
-        
-        collection.insert_many(documents)
+        economy_data_writer.request_flush()
     except Exception as e:
         pass  # Silencioso
 
 def save_brand_posts_data():
-    """Salva os dados de posts com marcas no MongoDB"""
+    """Agenda o salvamento dos posts com marcas alterados"""
     try:
-        if db is None:
-            return
-        
-        collection = db.brand_posts_data
-        collection.delete_many({})
-        
-        if brand_posts_data:
-            documents = []
-            for user_id, posts in brand_posts_data.items():
-                documents.append({
-                    '_id': user_id,
-                    'posts': posts,
-                    'updated_at': datetime.datetime.utcnow()
-                })
-            
-            collection.insert_many(documents)
-        
-        print(f"✅ Dados de posts com marcas salvos no MongoDB! Total: {len(brand_posts_data)}")
+        brand_posts_data_writer.request_flush()
     except Exception as e:
-        print(f"❌ Erro ao salvar dados de posts no MongoDB: {e}")
+        db_log.error(f"❌ Erro ao salvar dados de posts no MongoDB: {e}")
 
 def save_inventory_data():
-    """Salva os dados de inventário no MongoDB"""
+    """Agenda o salvamento dos inventários alterados"""
     try:
-        if db is None:
-            return
-        
-        collection = db.inventory_data
-        collection.delete_many({})
-        
-        if inventory_data:
-            documents = []
-            for user_id, data in inventory_data.items():
-                doc = data.copy()
-                doc['_id'] = user_id
-                doc['updated_at'] = datetime.datetime.utcnow()
-                documents.append(doc)
-            
-            collection.insert_many(documents)
-        
-        print(f"✅ Dados de inventário salvos no MongoDB! Total: {len(inventory_data)}")
+        inventory_data_writer.request_flush()
     except Exception as e:
-        print(f"❌ Erro ao salvar dados de inventário no MongoDB: {e}")
+        db_log.error(f"❌ Erro ao salvar dados de inventário no MongoDB: {e}")
+
+# Perfis, economia, inventário, posts e resets são carregados sob demanda (working set LRU);
+# o grafo de relacionamentos e os resumos usados nos rankings ficam sempre em memória
+USER_CACHE_MAX_USERS = 5000
+USER_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+LAZY_SECTIONS = {
+    'profile': user_data,
+    'economy': economy_data,
+    'inventory': inventory_data,
+    'brand_posts': brand_posts_data,
+    'used_reset': reset_data
+}
 
-def load_user_data():
-    """Carrega os dados dos usuários do MongoDB"""
-    global user_data
-    try:
-        if db is None:
-            print("❌ MongoDB não conectado - carregamento cancelado")
-            user_data = {}
-            return
-        
-        collection = db.user_data
-        document_count = collection.count_documents({})
-        print(f"🔍 MongoDB: Encontrados {document_count} documentos na coleção user_data")
-        
-        documents = collection.find({})
-        
-        user_data = {}
-        loaded_count = 0
-        
-        for doc in documents:
-            try:
-                discord_id = doc['_id']  # Agora _id é sempre discord_id
-                
-                # Remove campos do MongoDB antes de salvar na memória
-                doc_clean = doc.copy()
-                doc_clean.pop('_id', None)
-                doc_clean.pop('updated_at', None)
-                
-                user_data[discord_id] = doc_clean
-                loaded_count += 1
-                
-                username = doc_clean.get('username', 'sem_nome')
-                followers = doc_clean.get('followers', 0)
-                print(f"📥 Carregado: {discord_id} -> @{username} ({followers} seguidores)")
-                
-            except Exception as doc_error:
-                print(f"❌ Erro ao carregar documento: {doc_error}")
-                continue
-        
-        print(f"✅ User data loaded: {loaded_count} users carregados com sucesso")
-            
-    except Exception as e:
-        print(f"❌ Erro ao carregar do MongoDB: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        user_data = {}
-
-def load_follow_data():
-    """Carrega os dados de relacionamentos do MongoDB"""
-    global follow_data
+user_summaries = UserSummaries({
+    'profile': ('username', 'followers', 'total_likes'),
+    'economy': ('money', 'fame')
+})
+user_summaries.track('profile', user_data)
+user_summaries.track('economy', economy_data)
+
+user_cache = UserCache(
+    LAZY_SECTIONS,
+    lambda user_ids: storage.fetch_users(user_ids, LAZY_SECTIONS),
+    {writer.name: writer for writer in DATA_WRITERS},
+    storage_io,
+    lambda: storage is not None,
+    max_users=USER_CACHE_MAX_USERS,
+    max_bytes=USER_CACHE_MAX_BYTES,
+    after_load=balance_ledger.replay
+)
+
+def is_registered(user_id):
+    """Usuário tem perfil (mesmo que não esteja carregado em memória agora)"""
+    return user_id in user_data or user_summaries.has('profile', user_id)
+
+def profile_summary(user_id):
+    """{username, followers, total_likes} de qualquer usuário registrado, sem carregar o perfil"""
+    return user_summaries.get('profile', user_id)
+
+async def load_follow_data():
+    """Carrega o grafo de relacionamentos do armazenamento"""
     try:
-        if db is None:
-            print("❌ Conexão com MongoDB não estabelecida")
-            follow_data = {}
+        if storage is None:
+            db_log.warning("❌ Armazenamento não conectado")
             return
-        
-        collection = db.follow_data
-        documents = collection.find({})
-        
-        follow_data = {}
-        for doc in documents:
-            user_id = doc['_id']
-            doc.pop('_id', None)
-            doc.pop('updated_at', None)
-            follow_data[user_id] = doc
-        
-        print(f"✅ Dados de relacionamentos carregados do MongoDB! Total: {len(follow_data)}")
-    except Exception as e:
-        print(f"❌ Erro ao carregar dados de relacionamentos do MongoDB: {e}")
-        follow_data = {}
 
-def load_reset_data():
-    """Carrega os dados de resets do MongoDB"""
-    global reset_data
-    try:
-        if db is None:
-            reset_data = {}
-            return
-        
-        collection = db.reset_data
-        documents = collection.find({})
-        
-        reset_data = {}
-        for doc in documents:
-            user_id = doc['_id']
-            reset_data[user_id] = doc.get('used_reset', True)
-        
-        print(f"✅ Dados de reset carregados do MongoDB! Total: {len(reset_data)}")
+        loaded = await storage_io.run(storage.fetch_section, 'follow')
+        follow_graph.load(loaded)  # Mantém alterações locais ainda não gravadas
+        db_log.info("✅ Relacionamentos carregados do %s! Total: %d", storage.name, len(loaded))
     except Exception as e:
-        print(f"❌ Erro ao carregar dados de reset do MongoDB: {e}")
-        reset_data = {}
+        db_log.exception("❌ Erro ao carregar relacionamentos: %s", e)
 
-def load_economy_data():
-    """Carrega os dados de economia do MongoDB"""
-    global economy_data
+async def load_user_summaries():
+    """Carrega só os campos usados nos rankings e contagens de todos os usuários"""
     try:
-        if db is None:
-            print("❌ Conexão com MongoDB não estabelecida")
-            economy_data = {}
+        if storage is None:
             return
-        
-        collection = db.economy_data
-        documents = collection.find({})
-        
-        economy_data = {}
-        for doc in documents:
-            user_id = doc['_id']
-            doc.pop('_id', None)
-            doc.pop('updated_at', None)
-            economy_data[user_id] = doc
-        
-        print(f"✅ Dados de economia carregados do MongoDB! Total: {len(economy_data)}")
-    except Exception as e:
-        print(f"❌ Erro ao carregar dados de economia do MongoDB: {e}")
-        economy_data = {}
 
-def load_brand_posts_data():
-    """Carrega os dados de posts com marcas do MongoDB"""
-    global brand_posts_data
-    try:
-        if db is None:
-            brand_posts_data = {}
-            return
-        
-        collection = db.brand_posts_data
-        documents = collection.find({})
-        
-        brand_posts_data = {}
-        for doc in documents:
-            user_id = doc['_id']
-            brand_posts_data[user_id] = doc.get('posts', {})
-        
-        print(f"✅ Dados de posts carregados do MongoDB! Total: {len(brand_posts_data)}")
+        documents = await storage_io.run(storage.fetch_summaries, user_summaries.fields)
+        # Usuários em memória com alterações não gravadas mantêm o resumo local
+        user_summaries.load(documents)
+        for section, store in (('profile', user_data), ('economy', economy_data)):
+            for user_id in list(store):
+                if store.is_dirty(user_id):
+                    user_summaries.update(section, user_id, store[user_id])
+        db_log.info("✅ Resumos carregados do %s! Perfis: %d", storage.name, user_summaries.count('profile'))
     except Exception as e:
-        print(f"❌ Erro ao carregar dados de posts do MongoDB: {e}")
-        brand_posts_data = {}
+        db_log.exception("❌ Erro ao carregar resumos: %s", e)
 
-def load_inventory_data():
-    """Carrega os dados de inventário do MongoDB"""
-    global inventory_data
-    try:
-        if db is None:
-            inventory_data = {}
-            return
-        
-        collection = db.inventory_data
-        documents = collection.find({})
-        
-        inventory_data = {}
-        for doc in documents:
-            user_id = doc['_id']
-            doc.pop('_id', None)
-            doc.pop('updated_at', None)
-            inventory_data[user_id] = doc
-        
-        print(f"✅ Dados de inventário carregados do MongoDB! Total: {len(inventory_data)}")
-    except Exception as e:
-        print(f"❌ Erro ao carregar dados de inventário do MongoDB: {e}")
-        inventory_data = {}
+async def load_all_data():
+    """Carrega o que precisa ficar inteiro em memória; os demais dados vêm sob demanda
+
+    Usuários já em memória sem alterações pendentes são descartados e recarregados do
+    banco no próximo acesso.
+    """
+    user_cache.reset()
+    await asyncio.gather(
+        load_follow_data(),
+        load_user_summaries()
+    )
 
 # Configuração do bot
 intents = discord.Intents.default()
@@ -1566,69 +1460,159 @@ ALLOWED_CHANNEL_IDS = [
     1375957388498047046
 ]
 
+# 3. Canal onde cada curtida rende 0.5% dos seguidores atuais
+LIKES_FOLLOWERS_CHANNEL_ID = 1375957388498047046
+
 # --- FIM DAS CONFIGURAÇÕES ---
 
+def new_user_record():
+    """Registro inicial de um usuário que recebeu curtida antes de se registrar"""
+    return UserProfile()
+
+# Curtidas por (mensagem, quem reagiu): cada curtida no canal de curtidas rende 0.5% dos seguidores
+like_ledger = LikeLedger(new_user_record, gain_rate=0.005)
+
+async def apply_pending_likes():
+    """Aplica em user_data as curtidas/descurtidas acumuladas desde o último lote"""
+    if not like_ledger.pending_count:
+        return
+    # Os autores precisam estar em memória (senão a curtida criaria um perfil novo por cima)
+    await user_cache.ensure(*like_ledger.pending_authors())
+    summary = like_ledger.flush(user_data)
+    if not summary:
+        return
+    
+    for author_id, (likes, followers, name) in summary.items():
+        balance_ledger.record(author_id, 'likes', likes, 'curtidas')
+        balance_ledger.record(author_id, 'followers', followers, 'curtidas')
+        if followers > 0:
+            reaction_log.info("🎉 %s ganhou %d seguidores com curtidas!", name, followers)
+        elif followers < 0:
+            reaction_log.info("📉 %s perdeu %d seguidores pela remoção de curtidas!", name, -followers)
+        if author_id in user_data:
+            reaction_log.debug("❤️ Curtidas de %s: %+d → Total: %d | Seguidores: %d",
+                               name, likes, user_data[author_id]['total_likes'], user_data[author_id]['followers'])
+    
+    save_user_data()
+
+# Reações e curtidas saem do handler do gateway e são processadas em background
+reaction_pipeline = ReactionPipeline(apply_pending_likes)
+
+# Respostas temporárias do bot (ex.: patrocínio automático) são apagadas por uma única task
+SPONSORSHIP_REPLY_SECONDS = 15
+deletion_scheduler = DeletionScheduler(lambda channel_id: bot.get_channel(channel_id))
+
+# Orçamentos de eventos que geram recompensa: {escopo: (capacidade, fichas por segundo)}.
+# Eventos acima do orçamento são descartados antes de qualquer cálculo, gravação ou chamada à API.
+SPONSORSHIP_BUDGETS = {'user': (3, 1 / 60), 'channel': (10, 1 / 10)}  # 3 seguidos, depois 1/min por usuário
+LIKE_BUDGETS = {'user': (20, 1 / 3)}                                   # Curtidas dadas por usuário
+
+sponsorship_limiter = CooldownEngine(SPONSORSHIP_BUDGETS)
+like_limiter = CooldownEngine(LIKE_BUDGETS)
+# Curtidas descartadas pelo limite: a descurtida correspondente também é ignorada
+shed_likes = RecentMessageIds(ttl=24 * 3600)
+
+# Desligamento (SIGTERM do host ou Ctrl+C): bloqueia alterações e grava tudo antes de sair
+SHUTDOWN_DEADLINE_SECONDS = 20
+
+async def drain_pending_data():
+    """Esvazia as filas em memória e grava todos os registros pendentes; retorna quantos foram gravados"""
+    for loop_task in (auto_save, flush_pending_data, rotate_status):
+        loop_task.cancel()
+
+    dropped = await reaction_pipeline.stop()
+    if dropped:
+        log.info("%d mensagens ficaram sem emojis no desligamento", dropped)
+    undeleted = await deletion_scheduler.stop(flush=False)  # Normalmente já apagadas antes de fechar o gateway
+    if undeleted:
+        log.info("%d respostas temporárias ficaram sem apagar no desligamento", undeleted)
+    await apply_pending_likes()  # Curtidas ainda no livro viram alterações em user_data
+
+    flushed = await balance_ledger.flush()
+    flushed += sum(await asyncio.gather(*[writer.flush() for writer in DATA_WRITERS], sponsorships.flush_archive()))
+
+    pending = sum(writer.store.pending_count for writer in DATA_WRITERS) + sponsorships.pending_archive + balance_ledger.pending_count
+    if pending:
+        db_log.warning("⚠️ %d registros não puderam ser gravados (armazenamento indisponível?)", pending)
+    return flushed
+
+def close_connections():
+    storage_io.shutdown()
+    if storage is not None:
+        storage.close()
+
+lifecycle = LifecycleManager(bot, drain_pending_data, close_connections, deadline=SHUTDOWN_DEADLINE_SECONDS,
+                             before_close=deletion_scheduler.stop)
+
 @bot.event
 async def on_ready():
-    print(f'✅ {bot.user} está online!')
-    print(f'📡 Bot configurado para reagir nos canais: {ALLOWED_CHANNEL_IDS}')
-    
-    # Inicializa dados globais primeiro
-    global user_data, follow_data, reset_data, economy_data, brand_posts_data, inventory_data
-    user_data = {}
-    follow_data = {}
-    reset_data = {}
-    economy_data = {}
-    brand_posts_data = {}
-    inventory_data = {}
+    log.info(f'✅ {bot.user} está online!')
+    log.info(f'📡 Bot configurado para reagir nos canais: {ALLOWED_CHANNEL_IDS}')
     
     # Inicia sistemas em background primeiro (para o bot funcionar imediatamente)
     try:
         rotate_status.start()
         auto_save.start()
-        print("✅ Sistemas auxiliares iniciados!")
+        flush_pending_data.start()
+        reaction_pipeline.start()
+        deletion_scheduler.start()
+        log.info("✅ Sistemas auxiliares iniciados!")
     except Exception as e:
-        print(f"⚠️ Erro sistemas: {e}")
+        log.warning(f"⚠️ Erro sistemas: {e}")
     
-    print("🚀 Bot operacional!")
+    log.info("🚀 Bot operacional!")
     
-    # Conecta MongoDB de forma assíncrona em background (não bloqueia o bot)
-    async def connect_mongodb():
+    # Conecta o armazenamento de forma assíncrona em background (não bloqueia o bot)
+    async def connect_storage():
+        global storage
+        if storage is not None:
+            return  # on_ready de uma reconexão: já conectado
         await asyncio.sleep(2)  # Espera 2 segundos antes de tentar
         try:
-            print("🔄 Conectando MongoDB em background...")
-            if init_mongodb():
-                load_user_data()
-                load_follow_data()
-                load_reset_data()
-                load_economy_data()
-                load_brand_posts_data()
-                load_inventory_data()
-                print("✅ MongoDB conectado e dados carregados!")
+            if STORAGE_BACKEND == 'sqlite':
+                log.info("🔄 Abrindo banco local SQLite em %s...", SQLITE_PATH)
+                backend = await storage_io.run(SQLiteBackend, SQLITE_PATH)
             else:
-                print("⚠️ MongoDB indisponível - usando dados locais")
+                log.info("🔄 Conectando MongoDB em background...")
+                # init_mongodb faz ping bloqueante: roda na fila de I/O para não travar o gateway
+                if not await storage_io.run(init_mongodb):
+                    log.warning("⚠️ MongoDB indisponível - usando dados locais")
+                    return
+                backend = MongoBackend(db)
+            migrated = await storage_io.run(backend.migrate, BRAND_POSTS_KEEP)
+            if migrated:
+                db_log.info("📦 Dados convertidos para o formato atual: %s", migrated)
+            storage = backend
+            await load_all_data()
+            log.info("✅ %s conectado e dados carregados!", storage.name)
         except Exception as e:
-            print(f"⚠️ Erro MongoDB: {str(e)[:50]} - continuando sem BD")
+            log.warning(f"⚠️ Erro no armazenamento: {str(e)[:50]} - continuando sem BD")
+        finally:
+            # Comandos e interações esperam até aqui para carregar (ou criar) usuários
+            user_cache.open()
     
-    # Executa conexão MongoDB em background
-    asyncio.create_task(connect_mongodb())
+    # Executa a conexão em background
+    asyncio.create_task(connect_storage())
 
 @tasks.loop(minutes=3)  # Auto-save a cada 3 minutos (mais frequente)
 async def auto_save():
     """Salva automaticamente todos os dados a cada 3 minutos"""
-    if db is None:
-        return  # Não faz nada se MongoDB não estiver conectado
+    if storage is None:
+        return  # Não faz nada se o armazenamento não estiver conectado
     
     try:
-        save_user_data()
-        save_economy_data()
-        save_follow_data()
-        save_brand_posts_data()
-        save_inventory_data()
-        save_reset_data()
-        print(f"💾 Auto-save executado em {datetime.datetime.now().strftime('%H:%M:%S')}")
+        await flush_all_data()
+        await balance_ledger.compact()
+        db_log.info(f"💾 Auto-save executado em {datetime.datetime.now().strftime('%H:%M:%S')}")
     except Exception as e:
-        print(f"❌ Erro no auto-save: {e}")
+        db_log.error(f"❌ Erro no auto-save: {e}")
+
+@tasks.loop(seconds=DATA_FLUSH_SECONDS)
+async def flush_pending_data():
+    """Grava em lote os registros alterados desde o último flush"""
+    if storage is None:
+        return
+    await flush_all_data()
 
 # Sistema de status rotativo com dicas de comandos
 from discord.ext import tasks
@@ -1656,74 +1640,65 @@ async def rotate_status():
     except Exception as e:
         pass  # Ignora erros de status silenciosamente
 
+@bot.before_invoke
+async def load_command_users(ctx):
+    """Antes de qualquer comando, carrega o autor, os mencionados e os membros passados como argumento"""
+    user_ids = [str(ctx.author.id)] + [str(user_id) for user_id in ctx.message.raw_mentions]
+    for arg in list(ctx.args) + list(ctx.kwargs.values()):
+        if isinstance(arg, discord.abc.User):
+            user_ids.append(str(arg.id))
+    await user_cache.ensure(*user_ids)
+
 @bot.event
 async def on_message(message):
-    # Ignora mensagens do próprio bot
-    if message.author == bot.user:
+    # Ignora mensagens do próprio bot (e tudo durante o desligamento)
+    if message.author == bot.user or lifecycle.stopping:
         return
 
     # 3. VERIFICA SE A MENSAGEM ESTÁ EM UM CANAL PERMITIDO
     if message.channel.id in ALLOWED_CHANNEL_IDS:
         try:
-            # Adiciona cada emoji na ordem especificada
-            for emoji in EMOJIS:
-                await message.add_reaction(emoji)
-            print(f'Emojis adicionados à mensagem de {message.author} no canal #{message.channel.name}')
+            # Agenda os emojis (adicionados na ordem especificada pelos workers do pipeline)
+            if reaction_pipeline.enqueue_reactions(message, EMOJIS):
+                message_log.debug("Emojis agendados para a mensagem de %s no canal #%s", message.author, message.channel)
+            else:
+                message_log.warning("⚠️ Fila de reações cheia, mensagem de %s ficou sem emojis", message.author)
             
             # SISTEMA DE DETECÇÃO AUTOMÁTICA DE PUBLICIDADE (igual ao m!publi mas automático)
             user_id = str(message.author.id)
+            if is_registered(user_id):
+                await user_cache.ensure(user_id)
             
             # Verifica se o usuário está registrado
             if user_id in user_data:
                 message_content = message.content.lower()
                 detected_brands = []
                 
-                # Procura por marcas famosas na mensagem (detecção simplificada e mais eficaz)
-                import re
-                
-                print(f"🔍 Analisando mensagem: '{message.content}'")
-                print(f"🔍 Texto em minúsculas: '{message_content}'")
+                # Procura por marcas famosas na mensagem (todas de uma vez, palavra completa ou substring)
+                for brand, whole_word in brand_matcher.find(message_content):
+                    detected_brands.append(brand)
+                    # Palavra completa tem prioridade; se não, aceita como substring
+                    message_log.debug("✅ Marca detectada (%s): %s", "palavra completa" if whole_word else "substring", brand)
                 
-                for brand in FAMOUS_BRANDS:
-                    brand_lower = brand.lower()
-                    
-                    # Método mais simples e eficaz - busca direta na string
-                    if brand_lower in message_content:
-                        # Verifica se não é parte de outra palavra (opcional)
-                        # Usa regex simples apenas para verificar se é palavra completa
-                        word_pattern = r'\b' + re.escape(brand_lower) + r'\b'
-                        
-                        # Primeiro tenta match exato (palavra completa)
-                        if re.search(word_pattern, message_content, re.IGNORECASE):
-                            if brand not in detected_brands:
-                                detected_brands.append(brand)
-                                print(f"✅ Marca detectada (palavra completa): {brand}")
-                        # Se não encontrou como palavra completa, aceita como substring
-                        elif brand_lower in message_content:
-                            if brand not in detected_brands:
-                                detected_brands.append(brand)
-                                print(f"✅ Marca detectada (substring): {brand}")
+                # Log para debug (conteúdo da mensagem só em DEBUG)
+                message_log.debug("📝 Analisando: %s (%d chars, mínimo: 40) | Marcas: %s | Mensagem: %r",
+                                  message.author.display_name, len(message.content), detected_brands, message.content)
                 
-                # Log para debug
-                print(f"📝 Analisando: {message.author.display_name} ({len(message.content)} chars)")
-                print(f"📝 Mensagem completa: '{message.content}'")
-                print(f"📝 Usuário registrado: {user_id in user_data}")
-                print(f"📝 Marcas detectadas: {detected_brands}")
-                print(f"📝 Tamanho da mensagem: {len(message.content)} chars (mínimo: 40)")
+                # Acima do limite de patrocínios (usuário ou canal): ignora antes de calcular/gravar/responder
+                eligible = detected_brands and len(message.content) >= 40
+                if eligible and not sponsorship_limiter.allow(user=user_id, channel=message.channel.id):
+                    message_log.debug("⏳ Patrocínio de %s acima do limite, ignorado", message.author.display_name)
+                    eligible = False
                 
                 # RESPOSTA AUTOMÁTICA IGUAL AO m!publi (sem comando necessário)
-                if detected_brands and len(message.content) >= 40:
+                if eligible:
                     message_id = str(message.id)
                     
-                    # Inicializa dados se necessário
-                    if user_id not in brand_posts_data:
-                        brand_posts_data[user_id] = {}
-                    
                     if user_id not in economy_data:
-                        economy_data[user_id] = {"money": 0, "fame": 0}
+                        economy_data[user_id] = Wallet()
                     
                     # Evita spam - só recompensa uma vez por post
-                    if message_id not in brand_posts_data[user_id]:
+                    if sponsorships.is_new(user_id, message_id):
                         # CÁLCULO DE RECOMPENSAS (igual ao sistema do m!publi)
                         base_money = random.randint(2000, 8000)  # Base melhorada
                         brand_multiplier = len(detected_brands) * 300  # Bônus por marca
@@ -1735,7 +1710,7 @@ async def on_message(message):
                         total_money = base_money + brand_multiplier + premium_bonus
                         
                         # Fama baseada nos seguidores atuais
-                        current_followers = user_data[user_id].get('followers', 0)
+                        current_followers = user_data[user_id].followers
                         base_fame = int(current_followers * 0.01)  # 1% dos seguidores
                         
                         # Bônus de fama por múltiplas marcas
@@ -1749,21 +1724,16 @@ async def on_message(message):
                             base_fame = int(base_fame * 1.3)
                         
                         # ATUALIZA OS DADOS
-                        economy_data[user_id]["money"] += total_money
-                        economy_data[user_id]["fame"] += base_fame
-                        user_data[user_id]['followers'] += base_fame  # Seguidores ganhos
+                        reason = f"patrocínio: {', '.join(detected_brands)}"
+                        balance_ledger.apply(user_id, 'money', total_money, reason)
+                        balance_ledger.apply(user_id, 'fame', base_fame, reason)
+                        balance_ledger.apply(user_id, 'followers', base_fame, reason)  # Seguidores ganhos
                         
                         # Registra o post como recompensado
-                        import datetime
-                        brand_posts_data[user_id][message_id] = {
-                            "brands": detected_brands,
-                            "rewarded": True,
-                            "timestamp": datetime.datetime.now().isoformat(),
-                            "content_preview": message.content[:100],
-                            "money_gained": total_money,
-                            "fame_gained": base_fame,
-                            "is_premium": any(brand in premium_brands for brand in detected_brands)
-                        }
+                        sponsorships.record(
+                            user_id, message_id, detected_brands, total_money, base_fame,
+                            any(brand in premium_brands for brand in detected_brands)
+                        )
                         
                         # Salva tudo
                         save_economy_data()
@@ -1839,50 +1809,26 @@ async def on_message(message):
                         
                         # Responde ao post automaticamente e agenda para deletar em 15 segundos
                         response_message = await message.reply(embed=embed)
+                        deletion_scheduler.schedule(response_message, SPONSORSHIP_REPLY_SECONDS)
                         
-                        # Agenda a exclusão da mensagem após 15 segundos
-                        async def delete_after_delay():
-                            await asyncio.sleep(15)
-                            try:
-                                await response_message.delete()
-                                print(f"💼 Embed de patrocínio deletado automaticamente: {message.author.display_name}")
-                            except discord.NotFound:
-                                print(f"⚠️ Mensagem já foi deletada: {message.author.display_name}")
-                            except discord.Forbidden:
-                                print(f"❌ Sem permissão para deletar mensagem: {message.author.display_name}")
-                            except Exception as e:
-                                print(f"❌ Erro ao deletar embed: {e}")
-                        
-                        # Executa a função de delay em background
-                        asyncio.create_task(delete_after_delay())
-                        
-                        print(f"💼 Publicidade automática processada: {message.author.display_name} | +R${total_money} +{base_fame} seguidores | Marcas: {detected_brands}")
+                        message_log.info("💼 Publicidade automática processada: %s | +R$%d +%d seguidores | Marcas: %s",
+                                         message.author.display_name, total_money, base_fame, detected_brands)
                     
                     else:
-                        print(f"🔄 Post já recompensado: {message.author.display_name}")
+                        message_log.debug("🔄 Post já recompensado: %s", message.author.display_name)
                 
                 # Logs informativos para debug
                 elif detected_brands and len(message.content) < 40:
-                    print(f"❌ Marcas encontradas mas texto muito curto ({len(message.content)} chars): {message.author.display_name}")
-                    print(f"❌ Marcas encontradas: {detected_brands}")
+                    message_log.debug("❌ Marcas encontradas mas texto muito curto (%d chars): %s | Marcas: %s",
+                                      len(message.content), message.author.display_name, detected_brands)
                 elif len(message.content) >= 40 and not detected_brands:
-                    print(f"ℹ️ Texto longo mas sem marcas: {message.author.display_name}")
-                    print(f"ℹ️ Algumas marcas para teste: Nike, Apple, Coca-Cola estão na mensagem? {any(brand.lower() in message_content for brand in ['Nike', 'Apple', 'Coca-Cola'])}")
-                elif not detected_brands and len(message.content) < 40:
-                    print(f"ℹ️ Mensagem normal: {message.author.display_name}")
-                    
-                # Teste adicional para debug
-                test_brands = ['Nike', 'Apple', 'Coca-Cola', 'Instagram', 'McDonald']
-                found_test = [brand for brand in test_brands if brand.lower() in message_content]
-                if found_test:
-                    print(f"🧪 TESTE: Marcas encontradas manualmente: {found_test}")
+                    message_log.debug("ℹ️ Texto longo mas sem marcas: %s", message.author.display_name)
                     
         except discord.HTTPException as e:
-            # Este erro pode acontecer se o bot não tiver acesso ao emoji (não está no servidor)
-            # ou não tiver permissão para adicionar reações.
-            print(f'Erro ao adicionar emoji: {e}')
+            # Erro ao enviar/agendar a resposta de patrocínio
+            message_log.error("Erro do Discord ao processar mensagem: %s", e)
         except Exception as e:
-            print(f'Erro inesperado: {e}')
+            message_log.exception("Erro inesperado: %s", e)
 
     # Processa outros comandos do bot (como m!teste) em qualquer canal
     await bot.process_commands(message)
@@ -1891,104 +1837,52 @@ async def on_message(message):
 async def on_reaction_add(reaction, user):
     """Rastreia quando alguém adiciona uma reação"""
     # Ignora reações do próprio bot
-    if user == bot.user:
+    if user == bot.user or lifecycle.stopping:
         return
 
     # Verifica se a reação é um dos emojis do Instagram
     if str(reaction.emoji) in EMOJIS:
-        # Pega o ID do autor da mensagem original
-        message_author_id = str(reaction.message.author.id)
-
-        # Inicializa dados do usuário se não existir
-        if message_author_id not in user_data:
-            user_data[message_author_id] = {
-                'username': None,
-                'total_likes': 0,
-                'posts_count': 0,
-                'followers': 0,
-                'profession': None,
-                'thumbnail_url': None,
-                'embed_image_url': None
-            }
-
-        # Adiciona uma curtida
-        user_data[message_author_id]['total_likes'] += 1
-
-        # Verifica se a curtida foi no canal específico (1375957388498047046)
-        if reaction.message.channel.id == 1375957388498047046:
-            current_followers = user_data[message_author_id]['followers']
-            
-            # Calcula 0.5% dos seguidores atuais
-            if current_followers > 0:
-                followers_gain = int(current_followers * 0.005)  # 0.5% = 0.005
-                
-                # Adiciona os seguidores ganhos
-                user_data[message_author_id]['followers'] += followers_gain
-                
-                print(f"🎉 {reaction.message.author} ganhou {followers_gain:,} seguidores! (0.5% de {current_followers:,})")
-                print(f"   Total de seguidores agora: {user_data[message_author_id]['followers']:,}")
-
-        # Salva os dados imediatamente
-        save_user_data()
-        print(f"💾 Curtida salva no MongoDB para {reaction.message.author}")
-
-        print(f"Curtida adicionada para {reaction.message.author}. Total: {user_data[message_author_id]['total_likes']}")
+        if not like_limiter.allow(user=user.id):
+            shed_likes.add((reaction.message.id, user.id))
+            reaction_log.debug("⏳ Curtida de %s acima do limite, ignorada", user)
+            return
+        # Curtida aceita: uma descartada antes na mesma mensagem não pode mais esconder a descurtida
+        shed_likes.discard((reaction.message.id, user.id))
+        # Registra a curtida no livro (aplicada no próximo lote; repetições são ignoradas)
+        like_ledger.like(
+            reaction.message.id,
+            user.id,
+            str(reaction.message.author.id),
+            reaction.message.channel.id == LIKES_FOLLOWERS_CHANNEL_ID,
+            str(reaction.message.author)
+        )
 
 @bot.event
 async def on_reaction_remove(reaction, user):
     """Rastreia quando alguém remove uma reação"""
     # Ignora reações do próprio bot
-    if user == bot.user:
-        print(f"Ignorando remoção de reação do próprio bot")
+    if user == bot.user or lifecycle.stopping:
         return
 
     # Verifica se a mensagem está em um canal permitido
     if reaction.message.channel.id not in ALLOWED_CHANNEL_IDS:
-        print(f"Reação removida em canal não permitido: #{reaction.message.channel.name}")
+        reaction_log.debug("Reação removida em canal não permitido: #%s", reaction.message.channel)
         return
 
-    print(f"🔍 Reação removida detectada: {reaction.emoji} por {user} na mensagem de {reaction.message.author}")
-
     # Verifica se a reação é um dos emojis do Instagram
     if str(reaction.emoji) in EMOJIS:
-        # Pega o ID do autor da mensagem original
-        message_author_id = str(reaction.message.author.id)
-
-        print(f"✅ Emoji válido detectado. Processando remoção para usuário ID: {message_author_id}")
-
-        # Se o usuário existe nos dados
-        if message_author_id in user_data:
-            likes_antes = user_data[message_author_id]['total_likes']
-
-            # Remove uma curtida (mínimo 0)
-            user_data[message_author_id]['total_likes'] = max(0, user_data[message_author_id]['total_likes'] - 1)
-
-            # Verifica se a curtida removida foi no canal específico (1375957388498047046)
-            if reaction.message.channel.id == 1375957388498047046:
-                current_followers = user_data[message_author_id]['followers']
-                
-                # Calcula 0.5% dos seguidores atuais para remover
-                if current_followers > 0:
-                    followers_loss = int(current_followers * 0.005)  # 0.5% = 0.005
-                    
-                    # Remove os seguidores (mínimo 0)
-                    user_data[message_author_id]['followers'] = max(0, user_data[message_author_id]['followers'] - followers_loss)
-                    
-                    print(f"📉 {reaction.message.author} perdeu {followers_loss:,} seguidores pela remoção da curtida!")
-                    print(f"   Total de seguidores agora: {user_data[message_author_id]['followers']:,}")
-
-            likes_depois = user_data[message_author_id]['total_likes']
-
-            # Salva os dados
-            save_user_data()
-
-            print(f"✅ Curtida removida de {reaction.message.author.display_name}!")
-            print(f"   Likes antes: {likes_antes} → Likes depois: {likes_depois}")
-            print(f"   Total atual: {user_data[message_author_id]['total_likes']} curtidas")
-        else:
-            print(f"❌ Tentativa de remover curtida de usuário não registrado: {reaction.message.author.display_name} (ID: {message_author_id})")
+        if (reaction.message.id, user.id) in shed_likes:
+            return  # A curtida não foi contada
+        # Registra a descurtida no livro (devolve exatamente o que a curtida rendeu)
+        like_ledger.unlike(
+            reaction.message.id,
+            user.id,
+            str(reaction.message.author.id),
+            reaction.message.channel.id == LIKES_FOLLOWERS_CHANNEL_ID,
+            reaction.message.author.display_name
+        )
     else:
-        print(f"❌ Reação removida não é do tipo Instagram: {reaction.emoji}")
+        reaction_log.debug("❌ Reação removida não é do tipo Instagram: %s", reaction.emoji)
 
 # Comando de teste
 @bot.command(name='teste')
@@ -2002,15 +1896,7 @@ async def seguidores(ctx):
 
     # Inicializa dados do usuário se não existir
     if user_id not in user_data:
-        user_data[user_id] = {
-            'username': None,
-            'total_likes': 0,
-            'posts_count': 0,
-            'followers': 0,
-            'profession': None,
-            'thumbnail_url': None,
-            'embed_image_url': None
-        }
+        user_data[user_id] = UserProfile()
 
     # Verifica se o usuário já tem seguidores (já usou o comando)
     if user_data[user_id]['followers'] > 0:
@@ -2043,7 +1929,7 @@ async def seguidores(ctx):
     if user_id == OWNER_ID:
         num_seguidores = 250000000  # 25 milhões fixos para o dono
         # Define curtidas e dados especiais para o owner
-        user_data[user_id]['total_likes'] = 15000  # 15k curtidas fixas
+        balance_ledger.set(user_id, 'likes', 15000, 'registro')  # 15k curtidas fixas
     elif user_id == SPECIAL_ID:
         num_seguidores = 120000000  # Sempre 2 seguidores para este ID específico
     else:
@@ -2051,12 +1937,12 @@ async def seguidores(ctx):
         num_seguidores = random.randint(20000, 2000000)
 
     # Salva o número de seguidores para o usuário
-    user_data[user_id]['followers'] = num_seguidores
+    balance_ledger.set(user_id, 'followers', num_seguidores, 'registro')
     user_data[user_id]['username'] = ctx.author.display_name  # Garante que username está definido
     
-    print(f"🔍 DEBUG: Salvando usuário {user_id} com {num_seguidores} seguidores e username '{ctx.author.display_name}'")
+    command_log.debug(f"🔍 Salvando usuário {user_id} com {num_seguidores} seguidores e username '{ctx.author.display_name}'")
     save_user_data()
-    print(f"💾 Dados de registro salvos para: {ctx.author.display_name}")
+    command_log.debug(f"💾 Dados de registro salvos para: {ctx.author.display_name}")
 
     # Calcula pontos de fama por like baseado na quantidade de seguidores
     if user_id == SPECIAL_ID:
@@ -2141,7 +2027,7 @@ async def seguidores(ctx):
     embed.set_footer(text=f"Comandado por {ctx.author.display_name}")
     embed.set_thumbnail(url="https://upload.wikimedia.org/wikipedia/commons/thumb/a/a5/Instagram_icon.png/1024px-Instagram_icon.png")
 
-    print(f"✅ Seguidores salvos para {ctx.author.display_name}: {num_seguidores}")
+    command_log.debug(f"✅ Seguidores salvos para {ctx.author.display_name}: {num_seguidores}")
 
     view = ProfileView(user_id, ctx.author)
     await ctx.reply(embed=embed, view=view)
@@ -2196,7 +2082,8 @@ async def perfil(ctx, member: discord.Member = None):
     if user_id == "983196900910039090":  # Owner ID
         level = 500  # Level fixo 500 para o dono
         status = "👑 **LENDA GLOBAL!**"
-        cor = user_info.get('profile_color', 0xFFD700)  # Usa cor personalizada ou dourado para lenda
+        # Usa cor personalizada ou dourado para lenda
+        cor = user_info.profile_color if user_info.profile_color != DEFAULT_PROFILE_COLOR else 0xFFD700
     else:
         level = min(total_likes // 10, 100)  # 1 level a cada 10 curtidas, máximo 100
         
@@ -2275,8 +2162,7 @@ async def perfil(ctx, member: discord.Member = None):
         )
 
     # Adiciona campo de seguidores reais (famosos)
-    real_followers = follow_data.get(user_id, {}).get("followers", [])
-    real_followers_count = len(real_followers)
+    real_followers_count = follow_graph.followers_count(user_id)
     embed.add_field(
         name=f"<:reaismxp:1387842813084831936> Seguidores Famosos",
         value=f"**{real_followers_count}** seguidores reais",
@@ -2411,7 +2297,11 @@ async def curtidas(ctx):
 
     await ctx.reply(embed=embed)
 
-# Comando para migrar dados JSON para MongoDB (apenas para o dono)
+def import_section(section, values):
+    """Grava {user_id: valor} como a seção inteira de cada usuário (importação dos JSON antigos)"""
+    return storage.write_users([(user_id, {section: value}, ()) for user_id, value in values.items()])
+
+# Comando para migrar dados JSON para o armazenamento (apenas para o dono)
 @bot.command(name='migrar_dados')
 async def migrar_dados(ctx):
     # Só o dono do bot pode usar
@@ -2419,12 +2309,12 @@ async def migrar_dados(ctx):
         await ctx.reply("❌ Apenas o dono do bot pode usar este comando!")
         return
     
-    if db is None:
-        await ctx.reply("❌ Conexão com MongoDB não estabelecida!")
+    if storage is None:
+        await ctx.reply("❌ Armazenamento não conectado!")
         return
     
     embed = discord.Embed(
-        title="🔄 Migrando Dados para MongoDB",
+        title=f"🔄 Migrando Dados para {storage.name}",
         description="Iniciando migração dos arquivos JSON...",
         color=0xFFD700
     )
@@ -2439,16 +2329,8 @@ async def migrar_dados(ctx):
             with open('user_data.json', 'r') as f:
                 json_user_data = json.load(f)
             if json_user_data:
-                collection = db.user_data
-                collection.delete_many({})
-                documents = []
-                for user_id, data in json_user_data.items():
-                    doc = data.copy()
-                    doc['_id'] = user_id
-                    doc['migrated_at'] = datetime.datetime.utcnow()
-                    documents.append(doc)
-                collection.insert_many(documents)
-                migrated_collections.append(f"✅ user_data: {len(documents)} documentos")
+                count = await storage_io.run(import_section, 'profile', json_user_data)
+                migrated_collections.append(f"✅ user_data: {count} documentos")
         except FileNotFoundError:
             migrated_collections.append("⚠️ user_data: arquivo não encontrado")
         except Exception as e:
@@ -2459,16 +2341,8 @@ async def migrar_dados(ctx):
             with open('economy_data.json', 'r') as f:
                 json_economy_data = json.load(f)
             if json_economy_data:
-                collection = db.economy_data
-                collection.delete_many({})
-                documents = []
-                for user_id, data in json_economy_data.items():
-                    doc = data.copy()
-                    doc['_id'] = user_id
-                    doc['migrated_at'] = datetime.datetime.utcnow()
-                    documents.append(doc)
-                collection.insert_many(documents)
-                migrated_collections.append(f"✅ economy_data: {len(documents)} documentos")
+                count = await storage_io.run(import_section, 'economy', json_economy_data)
+                migrated_collections.append(f"✅ economy_data: {count} documentos")
         except FileNotFoundError:
             migrated_collections.append("⚠️ economy_data: arquivo não encontrado")
         except Exception as e:
@@ -2479,16 +2353,8 @@ async def migrar_dados(ctx):
             with open('follow_data.json', 'r') as f:
                 json_follow_data = json.load(f)
             if json_follow_data:
-                collection = db.follow_data
-                collection.delete_many({})
-                documents = []
-                for user_id, data in json_follow_data.items():
-                    doc = data.copy()
-                    doc['_id'] = user_id
-                    doc['migrated_at'] = datetime.datetime.utcnow()
-                    documents.append(doc)
-                collection.insert_many(documents)
-                migrated_collections.append(f"✅ follow_data: {len(documents)} documentos")
+                count = await storage_io.run(import_section, 'follow', json_follow_data)
+                migrated_collections.append(f"✅ follow_data: {count} documentos")
         except FileNotFoundError:
             migrated_collections.append("⚠️ follow_data: arquivo não encontrado")
         except Exception as e:
@@ -2497,17 +2363,12 @@ async def migrar_dados(ctx):
         # Migra outros dados...
         # (brand_posts_data, inventory_data, etc.)
         
-        # Recarrega dados do MongoDB
-        load_user_data()
-        load_economy_data()
-        load_follow_data()
-        load_brand_posts_data()
-        load_inventory_data()
-        load_reset_data()
+        # Recarrega dados do armazenamento
+        await load_all_data()
         
         success_embed = discord.Embed(
             title="✅ Migração Concluída!",
-            description="Dados migrados do JSON para MongoDB com sucesso!",
+            description=f"Dados migrados do JSON para {storage.name} com sucesso!",
             color=0x00FF00
         )
         
@@ -2519,7 +2380,7 @@ async def migrar_dados(ctx):
         
         success_embed.add_field(
             name="🔄 Dados Recarregados",
-            value=f"👥 {len(user_data)} usuários\n💰 {len(economy_data)} economias\n🤝 {len(follow_data)} relacionamentos",
+            value=f"👥 {user_summaries.count('profile')} usuários\n💰 {user_summaries.count('economy')} economias\n🤝 {len(follow_graph)} relacionamentos",
             inline=False
         )
         
@@ -2590,14 +2451,8 @@ async def seguir(ctx, member: discord.Member = None):
         await ctx.reply(embed=embed)
         return
 
-    # Inicializa dados de relacionamento se não existir
-    if follower_id not in follow_data:
-        follow_data[follower_id] = {"following": [], "followers": []}
-    if followed_id not in follow_data:
-        follow_data[followed_id] = {"following": [], "followers": []}
-
     # Verifica se já segue
-    if followed_id in follow_data[follower_id]["following"]:
+    if follow_graph.is_following(follower_id, followed_id):
         embed = discord.Embed(
             title="❌ Já seguindo",
             description=f"Você já segue {member.display_name}!",
@@ -2607,8 +2462,7 @@ async def seguir(ctx, member: discord.Member = None):
         return
 
     # Adiciona o relacionamento
-    follow_data[follower_id]["following"].append(followed_id)
-    follow_data[followed_id]["followers"].append(follower_id)
+    follow_graph.follow(follower_id, followed_id)
 
     save_follow_data()
 
@@ -2616,12 +2470,12 @@ async def seguir(ctx, member: discord.Member = None):
     followers_bonus = 0
     if followed_id == "983196900910039090":  # ID do dono do bot
         followers_bonus = 250000
-        user_data[follower_id]['followers'] += followers_bonus
+        balance_ledger.apply(follower_id, 'followers', followers_bonus, 'bônus por seguir o dono')
         save_user_data()
-        print(f"🎉 RECOMPENSA ESPECIAL: {ctx.author.display_name} ganhou {followers_bonus:,} seguidores por seguir o dono!")
+        command_log.info(f"🎉 RECOMPENSA ESPECIAL: {ctx.author.display_name} ganhou {followers_bonus:,} seguidores por seguir o dono!")
 
     # Verifica se agora são amigos mútuos (se seguem mutuamente)
-    is_mutual = followed_id in follow_data[follower_id]["following"] and follower_id in follow_data[followed_id]["following"]
+    is_mutual = follow_graph.is_mutual(follower_id, followed_id)
 
     if followers_bonus > 0:
         # Embed especial para quem seguiu o dono do bot
@@ -2664,7 +2518,7 @@ async def seguir(ctx, member: discord.Member = None):
         embed.set_thumbnail(url=member.display_avatar.url)
 
     # Estatísticas atualizadas incluindo a recompensa
-    stats_text = f"Você segue **{len(follow_data[follower_id]['following'])}** pessoas\n{member.display_name} tem **{len(follow_data[followed_id]['followers'])}** seguidores"
+    stats_text = f"Você segue **{follow_graph.following_count(follower_id)}** pessoas\n{member.display_name} tem **{follow_graph.followers_count(followed_id)}** seguidores"
     
     if followers_bonus > 0:
         current_followers = user_data[follower_id]['followers']
@@ -2726,7 +2580,7 @@ async def desseguir(ctx, member: discord.Member = None):
         return
 
     # Verifica se tem dados de relacionamento
-    if follower_id not in follow_data or followed_id not in follow_data[follower_id]["following"]:
+    if not follow_graph.is_following(follower_id, followed_id):
         embed = discord.Embed(
             title="❌ Não está seguindo",
             description=f"Você não segue {member.display_name}!",
@@ -2736,10 +2590,7 @@ async def desseguir(ctx, member: discord.Member = None):
         return
 
     # Remove o relacionamento
-    follow_data[follower_id]["following"].remove(followed_id)
-    if followed_id in follow_data:
-        if follower_id in follow_data[followed_id]["followers"]:
-            follow_data[followed_id]["followers"].remove(follower_id)
+    follow_graph.unfollow(follower_id, followed_id)
 
     save_follow_data()
 
@@ -2752,7 +2603,7 @@ async def desseguir(ctx, member: discord.Member = None):
     embed.set_thumbnail(url=member.display_avatar.url)
     embed.add_field(
         name="📊 Estatísticas:",
-        value=f"Você agora segue **{len(follow_data[follower_id]['following'])}** pessoas",
+        value=f"Você agora segue **{follow_graph.following_count(follower_id)}** pessoas",
         inline=False
     )
     embed.set_footer(text=f"Comando usado por {ctx.author.display_name}")
@@ -2786,7 +2637,7 @@ async def seguidores_lista(ctx, member: discord.Member = None):
         return
 
     # Pega a lista de seguidores
-    followers_list = follow_data.get(user_id, {}).get("followers", [])
+    followers_list = list(follow_graph.followers(user_id))
 
     embed = discord.Embed(
         title=f"👥 Seguidores de {member.display_name}",
@@ -2801,8 +2652,9 @@ async def seguidores_lista(ctx, member: discord.Member = None):
         for i, follower_id in enumerate(followers_list[:10]):  # Mostra até 10
             try:
                 follower_user = bot.get_user(int(follower_id))
-                if follower_user and follower_id in user_data:
-                    username = user_data[follower_id].get('username', follower_user.display_name)
+                summary = profile_summary(follower_id)
+                if follower_user and summary is not None:
+                    username = summary['username'] or follower_user.display_name
                     followers_text += f"{i+1}. **@{username}**\n"
             except:
                 continue
@@ -2851,7 +2703,7 @@ async def seguindo(ctx, member: discord.Member = None):
         return
 
     # Pega a lista de quem está seguindo
-    following_list = follow_data.get(user_id, {}).get("following", [])
+    following_list = list(follow_graph.following(user_id))
 
     embed = discord.Embed(
         title=f"👤 {member.display_name} está seguindo",
@@ -2866,10 +2718,11 @@ async def seguindo(ctx, member: discord.Member = None):
         for i, following_id in enumerate(following_list[:10]):  # Mostra até 10
             try:
                 following_user = bot.get_user(int(following_id))
-                if following_user and following_id in user_data:
-                    username = user_data[following_id].get('username', following_user.display_name)
+                summary = profile_summary(following_id)
+                if following_user and summary is not None:
+                    username = summary['username'] or following_user.display_name
                     # Adiciona verificação baseada nos níveis de seguidores
-                    followers_count = user_data[following_id].get('followers', 0)
+                    followers_count = summary['followers'] or 0
                     if following_id == "983196900910039090":  # Owner ID
                         username += " <:extremomxp:1387842927602172125>"
                     elif followers_count >= 1000000:
@@ -2919,18 +2772,6 @@ async def atualizar(ctx):
         await ctx.reply(embed=embed)
         return
 
-    # Inicializa novos campos se não existirem
-    if 'bio' not in user_data[user_id]:
-        user_data[user_id]['bio'] = None
-    if 'status' not in user_data[user_id]:
-        user_data[user_id]['status'] = None
-    if 'profile_theme' not in user_data[user_id]:
-        user_data[user_id]['profile_theme'] = 'classico'
-    if 'profile_badge' not in user_data[user_id]:
-        user_data[user_id]['profile_badge'] = None
-    if 'social_links' not in user_data[user_id]:
-        user_data[user_id]['social_links'] = {}
-
     # Pega os dados atuais do usuário
     user_data_info = user_data[user_id]
     current_username = user_data_info.get('username', '')
@@ -3011,7 +2852,7 @@ async def atualizar(ctx):
     await ctx.reply(embed=embed, view=view)
 
 # Classes para o sistema de lojinha
-class LojaMainView(discord.ui.View):
+class LojaMainView(UserDataView):
     def __init__(self, user_id):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -3069,7 +2910,7 @@ class LojaMainView(discord.ui.View):
         
         # Inicializa inventário se não existir
         if self.user_id not in inventory_data:
-            inventory_data[self.user_id] = {"carros": [], "mansoes": [], "itens_diarios": []}
+            inventory_data[self.user_id] = Inventory()
         
         user_inventory = inventory_data[self.user_id]
         
@@ -3079,50 +2920,35 @@ class LojaMainView(discord.ui.View):
             color=0x9B59B6
         )
         
-        # Carros
-        if user_inventory["carros"]:
-            carros_text = ""
-            for i, carro in enumerate(user_inventory["carros"][:5]):  # Mostra até 5
-                carros_text += f"🚗 **{carro['nome']}** - R$ {carro['preco']:,}\n".replace(",", ".")
-            embed.add_field(
-                name=f"🚗 Carros ({len(user_inventory['carros'])})",
-                value=carros_text,
-                inline=False
-            )
-        
-        # Mansões
-        if user_inventory["mansoes"]:
-            mansoes_text = ""
-            for i, mansao in enumerate(user_inventory["mansoes"][:3]):  # Mostra até 3
-                mansoes_text += f"🏰 **{mansao['nome']}** - R$ {mansao['preco']:,}\n".replace(",", ".")
+        # Prévia de cada categoria (itens mais caros primeiro)
+        for category, emoji, titulo, preview in (("carros", "🚗", "Carros", 5), ("mansoes", "🏰", "Mansões", 3),
+                                                 ("itens_diarios", "🛍️", "Itens do Dia a Dia", 8)):
+            if not user_inventory.count(category):
+                continue
+            entries, _, _ = inventory_page(user_inventory, category, LOJA_CATALOG, per_page=preview)
             embed.add_field(
-                name=f"🏰 Mansões ({len(user_inventory['mansoes'])})",
-                value=mansoes_text,
+                name=f"{emoji} {titulo} ({user_inventory.count(category)})",
+                value=format_inventory_entries(entries, emoji),
                 inline=False
             )
         
-        # Itens do dia a dia
-        if user_inventory["itens_diarios"]:
-            itens_text = ""
-            for i, item in enumerate(user_inventory["itens_diarios"][:8]):  # Mostra até 8
-                itens_text += f"🛍️ **{item['nome']}** - R$ {item['preco']:,}\n".replace(",", ".")
+        if not user_inventory.total:
             embed.add_field(
-                name=f"🛍️ Itens do Dia a Dia ({len(user_inventory['itens_diarios'])})",
-                value=itens_text,
+                name="😢 Inventário Vazio",
+                value="Você ainda não comprou nenhum item! Use os botões acima para fazer compras.",
                 inline=False
             )
-        
-        if not any([user_inventory["carros"], user_inventory["mansoes"], user_inventory["itens_diarios"]]):
+        else:
             embed.add_field(
-                name="😢 Inventário Vazio",
-                value="Você ainda não comprou nenhum item! Use os botões acima para fazer compras.",
+                name="💎 Patrimônio",
+                value=f"R$ {user_inventory.net_worth:,}".replace(",", "."),
                 inline=False
             )
         
         embed.set_footer(text="Use os botões para navegar pela loja")
         await interaction.response.edit_message(embed=embed, view=self)
 
-class LojaCarrosView(discord.ui.View):
+class LojaCarrosView(UserDataView):
     def __init__(self, user_id):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -3155,7 +2981,14 @@ class LojaCarrosView(discord.ui.View):
             return
         await self.show_cars_category(interaction, "Supercars")
 
-    @discord.ui.button(label='⬅️ Voltar', style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label='📋 Todos', style=discord.ButtonStyle.secondary, row=1)
+    async def todos_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if str(interaction.user.id) != self.user_id:
+            await interaction.response.send_message("❌ Esta loja não é sua!", ephemeral=True)
+            return
+        await self.show_cars_category(interaction, None)
+
+    @discord.ui.button(label='⬅️ Voltar', style=discord.ButtonStyle.blurple, row=1)
     async def voltar_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if str(interaction.user.id) != self.user_id:
             await interaction.response.send_message("❌ Esta loja não é sua!", ephemeral=True)
@@ -3176,27 +3009,10 @@ class LojaCarrosView(discord.ui.View):
         await interaction.response.edit_message(embed=embed, view=view)
 
     async def show_cars_category(self, interaction, categoria):
-        cars = {nome: info for nome, info in LOJA_ITEMS["carros"].items() if info["categoria"] == categoria}
-        
-        embed = discord.Embed(
-            title=f"🚗 {categoria}",
-            description="Escolha um carro para comprar:",
-            color=0x3498DB
-        )
-        
-        view = CompraItemView(self.user_id, "carros", cars)
-        
-        for nome, info in list(cars.items())[:10]:  # Mostra até 10 carros
-            embed.add_field(
-                name=nome,
-                value=f"💰 R$ {info['preco']:,}".replace(",", "."),
-                inline=True
-            )
-        
-        embed.set_footer(text="Selecione um carro no menu abaixo para comprar")
-        await interaction.response.edit_message(embed=embed, view=view)
+        view = CompraItemView(self.user_id, "carros", categoria)
+        await interaction.response.edit_message(embed=view.embed(), view=view)
 
-class LojaMansoesView(discord.ui.View):
+class LojaMansoesView(UserDataView):
     def __init__(self, user_id):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -3236,6 +3052,13 @@ class LojaMansoesView(discord.ui.View):
             return
         await self.show_mansoes_category(interaction, "Propriedades Únicas")
 
+    @discord.ui.button(label='📋 Todos', style=discord.ButtonStyle.secondary, row=1)
+    async def todos_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if str(interaction.user.id) != self.user_id:
+            await interaction.response.send_message("❌ Esta loja não é sua!", ephemeral=True)
+            return
+        await self.show_mansoes_category(interaction, None)
+
     @discord.ui.button(label='⬅️ Voltar', style=discord.ButtonStyle.blurple, row=1)
     async def voltar_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if str(interaction.user.id) != self.user_id:
@@ -3257,27 +3080,10 @@ class LojaMansoesView(discord.ui.View):
         await interaction.response.edit_message(embed=embed, view=view)
 
     async def show_mansoes_category(self, interaction, categoria):
-        mansoes = {nome: info for nome, info in LOJA_ITEMS["mansoes"].items() if info["categoria"] == categoria}
-        
-        embed = discord.Embed(
-            title=f"🏰 {categoria}",
-            description="Escolha uma mansão para comprar:",
-            color=0xE67E22
-        )
-        
-        view = CompraItemView(self.user_id, "mansoes", mansoes)
-        
-        for nome, info in list(mansoes.items())[:10]:  # Mostra até 10 mansões
-            embed.add_field(
-                name=nome,
-                value=f"💰 R$ {info['preco']:,}".replace(",", "."),
-                inline=True
-            )
-        
-        embed.set_footer(text="Selecione uma mansão no menu abaixo para comprar")
-        await interaction.response.edit_message(embed=embed, view=view)
+        view = CompraItemView(self.user_id, "mansoes", categoria)
+        await interaction.response.edit_message(embed=view.embed(), view=view)
 
-class LojaItensView(discord.ui.View):
+class LojaItensView(UserDataView):
     def __init__(self, user_id):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -3324,6 +3130,13 @@ class LojaItensView(discord.ui.View):
             return
         await self.show_itens_category(interaction, "Joias")
 
+    @discord.ui.button(label='📋 Todos', style=discord.ButtonStyle.secondary, row=1)
+    async def todos_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if str(interaction.user.id) != self.user_id:
+            await interaction.response.send_message("❌ Esta loja não é sua!", ephemeral=True)
+            return
+        await self.show_itens_category(interaction, None)
+
     @discord.ui.button(label='⬅️ Voltar', style=discord.ButtonStyle.blurple, row=1)
     async def voltar_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if str(interaction.user.id) != self.user_id:
@@ -3345,35 +3158,72 @@ class LojaItensView(discord.ui.View):
         await interaction.response.edit_message(embed=embed, view=view)
 
     async def show_itens_category(self, interaction, categoria):
-        itens = {nome: info for nome, info in LOJA_ITEMS["itens_diarios"].items() if info["categoria"] == categoria}
+        view = CompraItemView(self.user_id, "itens_diarios", categoria)
+        await interaction.response.edit_message(embed=view.embed(), view=view)
+
+# Seção da lojinha -> (emoji, cor, título da lista completa, texto da escolha, rodapé)
+SHOP_SECTIONS = {
+    "carros": ("🚗", 0x3498DB, "Todos os Carros", "Escolha um carro para comprar:",
+               "Selecione um carro no menu abaixo para comprar"),
+    "mansoes": ("🏰", 0xE67E22, "Todas as Propriedades", "Escolha uma mansão para comprar:",
+                "Selecione uma mansão no menu abaixo para comprar"),
+    "itens_diarios": ("🛍️", 0x27AE60, "Todos os Itens", "Escolha um item para comprar:",
+                      "Selecione um item no menu abaixo para comprar"),
+}
+
+class CompraItemView(UserDataView):
+    def __init__(self, user_id, tipo, categoria=None, page=0):
+        super().__init__(timeout=300)
+        self.user_id = user_id
+        self.tipo = tipo
+        self.categoria = categoria  # None = todos os itens da seção, por preço
+        self.items, self.page, self.pages = LOJA_CATALOG.page(tipo, categoria, page)
         
+        # Adiciona select menu com as opções já montadas da página
+        self.add_item(ItemSelect(user_id, tipo, categoria, self.page))
+        
+        if self.pages > 1:
+            self.pagina_anterior.disabled = self.page == 0
+            self.proxima_pagina.disabled = self.page >= self.pages - 1
+        else:
+            self.remove_item(self.pagina_anterior)
+            self.remove_item(self.proxima_pagina)
+
+    def embed(self):
+        emoji, cor, todos, descricao, rodape = SHOP_SECTIONS[self.tipo]
         embed = discord.Embed(
-            title=f"🛍️ {categoria}",
-            description="Escolha um item para comprar:",
-            color=0x27AE60
+            title=f"{emoji} {self.categoria or todos}",
+            description=descricao,
+            color=cor
         )
         
-        view = CompraItemView(self.user_id, "itens_diarios", itens)
-        
-        for nome, info in list(itens.items())[:10]:  # Mostra até 10 itens
+        for item in self.items:
             embed.add_field(
-                name=nome,
-                value=f"💰 R$ {info['preco']:,}".replace(",", "."),
+                name=item.nome,
+                value=f"💰 R$ {item.preco:,}".replace(",", "."),
                 inline=True
             )
         
-        embed.set_footer(text="Selecione um item no menu abaixo para comprar")
-        await interaction.response.edit_message(embed=embed, view=view)
+        if self.pages > 1:
+            rodape += f" • Página {self.page + 1}/{self.pages}"
+        embed.set_footer(text=rodape)
+        return embed
 
-class CompraItemView(discord.ui.View):
-    def __init__(self, user_id, tipo, items):
-        super().__init__(timeout=300)
-        self.user_id = user_id
-        self.tipo = tipo
-        self.items = items
+    async def turn_page(self, interaction, page):
+        if str(interaction.user.id) != self.user_id:
+            await interaction.response.send_message("❌ Esta loja não é sua!", ephemeral=True)
+            return
         
-        # Adiciona select menu com os itens
-        self.add_item(ItemSelect(user_id, tipo, items))
+        view = CompraItemView(self.user_id, self.tipo, self.categoria, page)
+        await interaction.response.edit_message(embed=view.embed(), view=view)
+
+    @discord.ui.button(label='◀️ Anterior', style=discord.ButtonStyle.secondary, row=1)
+    async def pagina_anterior(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn_page(interaction, self.page - 1)
+
+    @discord.ui.button(label='Próxima ▶️', style=discord.ButtonStyle.secondary, row=1)
+    async def proxima_pagina(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn_page(interaction, self.page + 1)
 
     @discord.ui.button(label='⬅️ Voltar', style=discord.ButtonStyle.blurple, row=1)
     async def voltar_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -3408,19 +3258,13 @@ class CompraItemView(discord.ui.View):
         await interaction.response.edit_message(embed=embed, view=view)
 
 class ItemSelect(discord.ui.Select):
-    def __init__(self, user_id, tipo, items):
+    def __init__(self, user_id, tipo, categoria=None, page=0):
         self.user_id = user_id
         self.tipo = tipo
-        self.items = items
-        
-        options = []
-        for nome, info in list(items.items())[:25]:  # Discord limita a 25 opções
-            options.append(discord.SelectOption(
-                label=nome,
-                description=f"R$ {info['preco']:,} - {info['categoria']}".replace(",", "."),
-                value=nome
-            ))
+        self.nonce = uuid.uuid4().hex  # Identifica este menu nas compras feitas por ele
         
+        # Opções montadas uma vez no catálogo (copia só a lista, que o Select pode alterar)
+        options = list(LOJA_CATALOG.options(tipo, categoria, page))
         super().__init__(placeholder="Escolha um item para comprar...", options=options)
 
     async def callback(self, interaction: discord.Interaction):
@@ -3428,14 +3272,30 @@ class ItemSelect(discord.ui.Select):
             await interaction.response.send_message("❌ Esta loja não é sua!", ephemeral=True)
             return
         
-        selected_item = self.values[0]
-        item_info = self.items[selected_item]
-        preco = item_info["preco"]
+        item = LOJA_CATALOG.get(self.tipo, self.values[0])
+        if item is None:
+            await interaction.response.send_message("❌ Este item não está mais à venda!", ephemeral=True)
+            return
+        selected_item = item.nome
+        preco = item.preco
+        
+        # Compra atômica: debita e adiciona ao inventário numa única operação no banco.
+        # O id da compra é este menu + item: um clique repetido não compra duas vezes, mas
+        # voltar à loja monta um menu novo e a mesma compra pode ser feita de novo.
+        purchase_id = f"{self.nonce}:{self.tipo}:{item.id}"
+        # A compra pode esperar o banco: confirma a interação antes (Discord dá 3s para responder)
+        await interaction.response.defer()
+        result, user_money = await wallet_service.purchase(self.user_id, purchase_id, item)
+        
+        if result == DUPLICATE:
+            await interaction.followup.send("✅ Esta compra já foi realizada!", ephemeral=True)
+            return
         
-        # Verifica se tem dinheiro suficiente
-        user_money = economy_data.get(self.user_id, {}).get("money", 0)
+        if result == FAILED:
+            await interaction.followup.send("❌ Não foi possível concluir a compra agora. Tente novamente!", ephemeral=True)
+            return
         
-        if user_money < preco:
+        if result != PURCHASED:
             embed = discord.Embed(
                 title="❌ Dinheiro Insuficiente",
                 description=f"Você não tem dinheiro suficiente para comprar **{selected_item}**!",
@@ -3456,30 +3316,9 @@ class ItemSelect(discord.ui.Select):
                 value="Use `m!publi` após mencionar marcas famosas em posts longos!",
                 inline=False
             )
-            await interaction.response.edit_message(embed=embed, view=None)
+            await interaction.edit_original_response(embed=embed, view=None)
             return
         
-        # Realiza a compra
-        economy_data[self.user_id]["money"] -= preco
-        
-        # Inicializa inventário se não existir
-        if self.user_id not in inventory_data:
-            inventory_data[self.user_id] = {"carros": [], "mansoes": [], "itens_diarios": []}
-        
-        # Adiciona item ao inventário
-        import datetime
-        item_data = {
-            "nome": selected_item,
-            "preco": preco,
-            "categoria": item_info["categoria"],
-            "data_compra": datetime.datetime.now().isoformat()
-        }
-        inventory_data[self.user_id][self.tipo].append(item_data)
-        
-        # Salva os dados
-        save_economy_data()
-        save_inventory_data()
-        
         # Embed de sucesso
         embed = discord.Embed(
             title="✅ Compra Realizada!",
@@ -3489,7 +3328,7 @@ class ItemSelect(discord.ui.Select):
         
         embed.add_field(
             name="🛒 Item Comprado",
-            value=f"**{selected_item}**\n{item_info['categoria']}",
+            value=f"**{selected_item}**\n{item.categoria}",
             inline=True
         )
         
@@ -3501,7 +3340,7 @@ class ItemSelect(discord.ui.Select):
         
         embed.add_field(
             name="💵 Dinheiro Restante",
-            value=f"R$ {economy_data[self.user_id]['money']:,}".replace(",", "."),
+            value=f"R$ {user_money:,}".replace(",", "."),
             inline=True
         )
         
@@ -3529,7 +3368,7 @@ class ItemSelect(discord.ui.Select):
             )
         
         # Botão para voltar à loja
-        view = discord.ui.View()
+        view = UserDataView()
         voltar_button = discord.ui.Button(label="🛒 Voltar à Loja", style=discord.ButtonStyle.primary)
         
         async def voltar_callback(button_interaction):
@@ -3555,9 +3394,9 @@ class ItemSelect(discord.ui.Select):
         view.add_item(voltar_button)
         
         embed.set_footer(text=f"Compra realizada por {interaction.user.display_name}")
-        await interaction.response.edit_message(embed=embed, view=view)
+        await interaction.edit_original_response(embed=embed, view=view)
         
-        print(f"💰 Compra realizada: {interaction.user.display_name} comprou {selected_item} por R${preco:,}")
+        command_log.info(f"💰 Compra realizada: {interaction.user.display_name} comprou {selected_item} por R${preco:,}")
 
 class HelpView(discord.ui.View):
     def __init__(self, ctx):
@@ -3741,13 +3580,14 @@ async def ajuda(ctx):
 # Comando de estatísticas globais
 @bot.command(name='stats', aliases=['status'])
 async def stats(ctx):
-    total_users = len(user_data)
-    total_likes = sum(user.get('total_likes', 0) for user in user_data.values())
-    total_followers = sum(user.get('followers', 0) for user in user_data.values())
-    total_relationships = len(follow_data)
+    profiles = user_summaries.values('profile')
+    total_users = len(profiles)
+    total_likes = sum(user['total_likes'] or 0 for user in profiles)
+    total_followers = sum(user['followers'] or 0 for user in profiles)
+    total_relationships = len(follow_graph)
 
     # Calcula relacionamentos ativos
-    active_following = sum(len(data.get('following', [])) for data in follow_data.values())
+    active_following = follow_graph.edge_count()
 
     embed = discord.Embed(
         title="📊 Estatísticas Globais do Instagram MXP",
@@ -3780,10 +3620,10 @@ async def stats(ctx):
     )
 
     # Top usuário
-    if user_data:
-        top_user_id = max(user_data, key=lambda x: user_data[x].get('total_likes', 0))
+    top = ranking_index.page("curtidas", 0, 1)
+    if top:
+        top_user_id, top_likes = top[0]
         top_user = bot.get_user(int(top_user_id))
-        top_likes = user_data[top_user_id].get('total_likes', 0)
 
         if top_user:
             embed.add_field(
@@ -3850,7 +3690,7 @@ async def reset_user(ctx):
     )
 
     # Botões de confirmação
-    view = discord.ui.View(timeout=60)
+    view = UserDataView(timeout=60)
 
     # Botão de confirmar
     confirm_button = discord.ui.Button(
@@ -3869,18 +3709,8 @@ async def reset_user(ctx):
             del user_data[user_id]
 
         # Remove relacionamentos
-        if user_id in follow_data:
-            # Remove das listas de following de outros usuários
-            for other_user_id in follow_data[user_id].get("following", []):
-                if other_user_id in follow_data and user_id in follow_data[other_user_id].get("followers", []):
-                    follow_data[other_user_id]["followers"].remove(user_id)
-
-            # Remove das listas de followers de outros usuários
-            for other_user_id in follow_data[user_id].get("followers", []):
-                if other_user_id in follow_data and user_id in follow_data[other_user_id].get("following", []):
-                    follow_data[other_user_id]["following"].remove(user_id)
-
-            del follow_data[user_id]
+        # (também some das listas de following/followers de outros usuários)
+        follow_graph.remove_user(user_id)
 
         # Marca que o usuário usou o reset
         reset_data[user_id] = True
@@ -4072,20 +3902,18 @@ async def sugestoes(ctx):
         await ctx.reply(embed=embed)
         return
 
-    # Pega usuários que o autor não segue
-    following = follow_data.get(user_id, {}).get("following", [])
-    suggestions = []
+    # Sugestões: amigos de quem você segue primeiro, depois os perfis mais populares
+    def is_visible(other_user_id):
+        try:
+            return is_registered(other_user_id) and bot.get_user(int(other_user_id)) is not None
+        except ValueError:
+            return False  # IDs antigos que não são do Discord
 
-    for other_user_id, data in user_data.items():
-        if other_user_id != user_id and other_user_id not in following:
-            try:
-                user = bot.get_user(int(other_user_id))
-                if user:
-                    followers_count = data.get('followers', 0)
-                    likes_count = data.get('total_likes', 0)
-                    suggestions.append((other_user_id, user, followers_count, likes_count))
-            except:
-                continue
+    suggestions = []
+    for other_user_id, common in follow_recommender.suggest(user_id, 5, accept=is_visible):
+        data = profile_summary(other_user_id)
+        user = bot.get_user(int(other_user_id))
+        suggestions.append((other_user_id, user, data['followers'] or 0, data['total_likes'] or 0, common))
 
     if not suggestions:
         embed = discord.Embed(
@@ -4096,18 +3924,14 @@ async def sugestoes(ctx):
         await ctx.reply(embed=embed)
         return
 
-    # Ordena por seguidores e pega os top 5
-    suggestions.sort(key=lambda x: x[2], reverse=True)
-    top_suggestions = suggestions[:5]
-
     embed = discord.Embed(
         title="👥 Sugestões para Seguir",
-        description="Perfis populares que você ainda não segue:",
+        description="Perfis que seus amigos seguem e perfis populares que você ainda não segue:",
         color=0x1DA1F2
     )
 
-    for i, (user_id_sug, user, followers, likes) in enumerate(top_suggestions):
-        username = user_data[user_id_sug].get('username', user.display_name)
+    for i, (user_id_sug, user, followers, likes, common) in enumerate(suggestions):
+        username = profile_summary(user_id_sug)['username'] or user.display_name
 
         # Adiciona verificação baseada nos níveis de seguidores
         if user_id_sug == "983196900910039090":  # Owner ID
@@ -4133,9 +3957,13 @@ async def sugestoes(ctx):
             emoji = "👤"
             status = ""
 
+        value = f"👥 {followers:,} seguidores\n💖 {likes:,} curtidas".replace(",", ".")
+        if common:
+            value += f"\n🤝 Seguido por {common} {'pessoa' if common == 1 else 'pessoas'} que você segue"
+
         embed.add_field(
             name=f"{emoji} @{username}{status}",
-            value=f"👥 {followers:,} seguidores\n💖 {likes:,} curtidas".replace(",", "."),
+            value=value,
             inline=True
         )
 
@@ -4169,7 +3997,7 @@ async def publicidade(ctx):
         return
 
     # Verifica se o usuário tem posts com marcas detectadas
-    if user_id not in brand_posts_data or not brand_posts_data[user_id]:
+    if user_id not in brand_posts_data or not brand_posts_data[user_id].posts:
         embed = discord.Embed(
             title="💡 Sistema de Publicidade Automática",
             description="As recompensas agora são **automáticas**! Não é mais necessário usar comandos.",
@@ -4193,10 +4021,11 @@ async def publicidade(ctx):
         await ctx.reply(embed=embed)
         return
 
-    # Conta posts já recompensados automaticamente
-    rewarded_posts = sum(1 for post_data in brand_posts_data[user_id].values() if post_data.get("rewarded", False))
-    total_money_earned = sum(post_data.get("money_gained", 0) for post_data in brand_posts_data[user_id].values() if post_data.get("rewarded", False))
-    total_fame_earned = sum(post_data.get("fame_gained", 0) for post_data in brand_posts_data[user_id].values() if post_data.get("rewarded", False))
+    # Totais acumulados dos posts já recompensados automaticamente
+    sponsorship = brand_posts_data[user_id]
+    rewarded_posts = sponsorship.posts
+    total_money_earned = sponsorship.money
+    total_fame_earned = sponsorship.fame
 
     embed = discord.Embed(
         title="📊 Relatório de Publicidade Automática",
@@ -4223,15 +4052,11 @@ async def publicidade(ctx):
     )
 
     # Mostra as últimas 3 recompensas
-    recent_posts = []
-    for message_id, post_data in brand_posts_data[user_id].items():
-        if post_data.get("rewarded", False):
-            recent_posts.append((message_id, post_data))
+    recent_posts = sponsorship.recent[-3:][::-1]  # Já em ordem de chegada
     
     if recent_posts:
-        recent_posts.sort(key=lambda x: x[1]["timestamp"], reverse=True)
         recent_text = ""
-        for i, (msg_id, post_data) in enumerate(recent_posts[:3]):
+        for i, post_data in enumerate(recent_posts):
             brands = ", ".join(post_data["brands"][:2])  # Mostra até 2 marcas
             money_gained = post_data.get("money_gained", 0)
             recent_text += f"**{i+1}.** {brands} - R$ {money_gained:,}\n".replace(",", ".")
@@ -4253,7 +4078,7 @@ async def publicidade(ctx):
 
     await ctx.reply(embed=embed)
 
-    print(f"📊 Relatório de publicidade mostrado para {ctx.author.display_name}: {rewarded_posts} posts, R${total_money_earned} total")
+    command_log.info(f"📊 Relatório de publicidade mostrado para {ctx.author.display_name}: {rewarded_posts} posts, R${total_money_earned} total")
 
 # Comando para verificar status dos dados
 @bot.command(name='debug_dados')
@@ -4264,32 +4089,33 @@ async def debug_dados(ctx):
         await ctx.reply("❌ Apenas o dono do bot pode usar este comando!")
         return
     
-    print(f"🔍 DEBUG DADOS: Comando executado por {ctx.author.display_name}")
+    command_log.info(f"🔍 debug_dados: comando executado por {ctx.author.display_name}")
     
     # Debug dos dados em memória
-    print(f"🔍 DEBUG: user_data em memória: {len(user_data)} usuários")
+    command_log.info(f"🔍 user_data em memória: {len(user_data)} usuários")
     for user_id, data in user_data.items():
         username = data.get('username')
         followers = data.get('followers', 0)
-        print(f"📝 Memória: {user_id} | username: '{username}' | followers: {followers}")
+        command_log.info(f"📝 Memória: {user_id} | username: '{username}' | followers: {followers}")
     
-    # Debug do MongoDB
+    # Debug do armazenamento
+    stored_count = 0
+    if storage is not None:
+        stored_count = await storage_io.run(storage.count_users, 'profile')
+        command_log.info(f"🔍 {storage.name}: {stored_count} perfis")
     if db is not None:
-        collection = db.user_data
-        mongo_count = collection.count_documents({})
-        print(f"🔍 DEBUG: MongoDB user_data: {mongo_count} documentos")
-        
-        docs = collection.find({}).limit(10)
+        collection = db[USERS_COLLECTION]
+        docs = await storage_io.run(lambda: list(collection.find({'profile': {'$exists': True}}, {'profile': 1}).limit(10)))
         for doc in docs:
             user_id = doc['_id']
-            username = doc.get('username')
-            followers = doc.get('followers', 0)
-            print(f"📊 MongoDB: {user_id} | username: '{username}' | followers: {followers}")
+            username = doc['profile'].get('username')
+            followers = doc['profile'].get('followers', 0)
+            command_log.info(f"📊 MongoDB: {user_id} | username: '{username}' | followers: {followers}")
     
     # Testa o ranking
-    print(f"🔍 DEBUG: Testando get_ranking_data('seguidores')...")
+    command_log.info(f"🔍 Testando get_ranking_data('seguidores')...")
     ranking_result = get_ranking_data('seguidores')
-    print(f"🔍 DEBUG: Resultado do ranking: {len(ranking_result)} usuários")
+    command_log.info(f"🔍 Resultado do ranking: {len(ranking_result)} usuários")
     
     embed = discord.Embed(
         title="🔍 Debug de Dados Completo",
@@ -4302,11 +4128,10 @@ async def debug_dados(ctx):
         inline=True
     )
     
-    if db is not None:
-        mongo_count = db.user_data.count_documents({})
+    if storage is not None:
         embed.add_field(
-            name="🍃 MongoDB",
-            value=f"**{mongo_count}** documentos salvos",
+            name=f"🗄️ {storage.name}",
+            value=f"**{stored_count}** perfis salvos",
             inline=True
         )
     
@@ -4341,12 +4166,7 @@ async def recarregar_dados(ctx):
     
     try:
         # Recarrega todos os dados
-        load_user_data()
-        load_follow_data()
-        load_economy_data()
-        load_brand_posts_data()
-        load_inventory_data()
-        load_reset_data()
+        await load_all_data()
         
         success_embed = discord.Embed(
             title="✅ Dados Recarregados!",
@@ -4356,7 +4176,7 @@ async def recarregar_dados(ctx):
         
         success_embed.add_field(
             name="📊 Dados Carregados",
-            value=f"👥 {len(user_data)} usuários\n💰 {len(economy_data)} economias\n🤝 {len(follow_data)} relacionamentos\n📦 {len(inventory_data)} inventários\n📝 {len(brand_posts_data)} posts\n🔄 {len(reset_data)} resets",
+            value=f"👥 {user_summaries.count('profile')} usuários\n💰 {user_summaries.count('economy')} economias\n🤝 {len(follow_graph)} relacionamentos\n🧠 Demais dados carregados sob demanda",
             inline=False
         )
         
@@ -4404,46 +4224,50 @@ async def corrigir_dados(ctx):
     msg = await ctx.reply(embed=embed)
     
     try:
-        collection = db.user_data
-        documents_without_discord_id = collection.find({"discord_id": {"$exists": False}})
+        collection = db[USERS_COLLECTION]
+        documents_without_discord_id = await storage_io.run(
+            lambda: list(collection.find({"profile": {"$exists": True}, "profile.discord_id": {"$exists": False}}, {"_id": 1}))
+        )
         
         corrected = 0
         failed = 0
         
         for doc in documents_without_discord_id:
             username = doc['_id']
-            print(f"🔧 Tentando corrigir documento: @{username}")
+            command_log.info(f"🔧 Tentando corrigir documento: @{username}")
             
             # Se o username parece ser um ID do Discord
             if username.isdigit() and len(username) >= 17:
                 # Atualiza o documento adicionando discord_id
-                collection.update_one(
+                await storage_io.run(
+                    collection.update_one,
                     {"_id": username},
-                    {"$set": {"discord_id": username}}
+                    {"$set": {"profile.discord_id": username}}
                 )
                 corrected += 1
-                print(f"✅ Corrigido: {username} agora tem discord_id")
+                command_log.info(f"✅ Corrigido: {username} agora tem discord_id")
             else:
                 # Tenta encontrar o usuário no servidor
                 found = False
                 for member in bot.get_all_members():
                     if member.display_name.lower() == username.lower() or member.name.lower() == username.lower():
                         # Encontrou! Adiciona o discord_id
-                        collection.update_one(
+                        await storage_io.run(
+                            collection.update_one,
                             {"_id": username},
-                            {"$set": {"discord_id": str(member.id)}}
+                            {"$set": {"profile.discord_id": str(member.id)}}
                         )
                         corrected += 1
                         found = True
-                        print(f"✅ Corrigido: @{username} -> discord_id: {member.id}")
+                        command_log.info(f"✅ Corrigido: @{username} -> discord_id: {member.id}")
                         break
                 
                 if not found:
                     failed += 1
-                    print(f"❌ Não encontrado: @{username}")
+                    command_log.warning(f"❌ Não encontrado: @{username}")
         
         # Recarrega os dados
-        load_user_data()
+        await load_all_data()
         
         success_embed = discord.Embed(
             title="✅ Correção Concluída!",
@@ -4453,7 +4277,7 @@ async def corrigir_dados(ctx):
         
         success_embed.add_field(
             name="📊 Resultado",
-            value=f"✅ **{corrected}** documentos corrigidos\n❌ **{failed}** documentos não encontrados\n🔄 **{len(user_data)}** usuários carregados",
+            value=f"✅ **{corrected}** documentos corrigidos\n❌ **{failed}** documentos não encontrados\n🔄 **{user_summaries.count('profile')}** usuários registrados",
             inline=False
         )
         
@@ -4488,68 +4312,139 @@ async def status_dados(ctx):
     
     embed.add_field(
         name="👥 Usuários Registrados",
-        value=f"**{len(user_data)}** usuários",
+        value=f"**{user_summaries.count('profile')}** usuários",
         inline=True
     )
     
     embed.add_field(
         name="💰 Dados de Economia",
-        value=f"**{len(economy_data)}** usuários",
+        value=f"**{user_summaries.count('economy')}** usuários",
         inline=True
     )
     
     embed.add_field(
         name="🤝 Relacionamentos",
-        value=f"**{len(follow_data)}** usuários",
+        value=f"**{len(follow_graph)}** usuários",
         inline=True
     )
     
     embed.add_field(
         name="📦 Inventários",
-        value=f"**{len(inventory_data)}** usuários",
+        value=f"**{len(inventory_data)}** em memória",
         inline=True
     )
     
     embed.add_field(
         name="📝 Posts com Marcas",
-        value=f"**{len(brand_posts_data)}** usuários",
+        value=f"**{len(brand_posts_data)}** em memória",
         inline=True
     )
     
     embed.add_field(
         name="🔄 Sistema de Reset",
-        value=f"**{len(reset_data)}** usuários usaram",
+        value=f"**{len(reset_data)}** em memória",
         inline=True
     )
     
-    # Status da conexão MongoDB
-    mongodb_status = "✅ Conectado" if db is not None else "❌ Desconectado"
+    # Status da conexão com o armazenamento
+    storage_status = f"✅ Conectado ({storage.name})" if storage is not None else "❌ Desconectado"
+    
+    embed.add_field(
+        name="🗄️ Status do Armazenamento",
+        value=storage_status,
+        inline=False
+    )
+    
+    # Working set de usuários em memória
+    cache = user_cache.stats()
+    embed.add_field(
+        name="🧠 Usuários em Memória",
+        value=(
+            f"**{cache['resident_users']}**/{USER_CACHE_MAX_USERS} usuários | ~{cache['resident_bytes'] / 1024 / 1024:.1f}/{USER_CACHE_MAX_BYTES / 1024 / 1024:.0f} MB\n"
+            f"Acertos: {cache['hits']} | Carregados do banco: {cache['misses']} | Descartados: {cache['evictions']} | Write-backs: {cache['writebacks']}"
+        ),
+        inline=False
+    )
+    
+    # Métricas do pipeline de reações/curtidas
+    pipeline = reaction_pipeline.stats()
+    pipeline.update(like_ledger.stats())
+    embed.add_field(
+        name="⚡ Pipeline de Reações",
+        value=(
+            f"Fila: **{pipeline['queue_depth']}** | Processadas: {pipeline['processed']} | Descartadas: {pipeline['dropped']} | Falhas: {pipeline['failed']}\n"
+            f"Atraso: {pipeline['last_lag'] * 1000:.0f}ms (máx {pipeline['max_lag'] * 1000:.0f}ms) | Rate limits: {pipeline['rate_limited']}\n"
+            f"Curtidas: {pipeline['like_events']} eventos em {pipeline['like_flushes']} lotes | Pendentes: {pipeline['pending_likes']} | Rastreadas: {pipeline['tracked_likes']}"
+        ),
+        inline=False
+    )
+    
+    # Respostas temporárias aguardando exclusão
+    deletions = deletion_scheduler.stats()
+    next_in = f"{deletions['next_deletion_in']:.0f}s" if deletions['next_deletion_in'] is not None else "-"
+    embed.add_field(
+        name="🗑️ Exclusões Agendadas",
+        value=(
+            f"Pendentes: **{deletions['pending_deletions']}** (próxima em {next_in}) | Agendadas: {deletions['scheduled_deletions']}\n"
+            f"Apagadas: {deletions['deleted']} ({deletions['bulk_batches']} em lote) | Falhas: {deletions['failed_deletions']}"
+        ),
+        inline=False
+    )
+    
+    # Eventos descartados pelos limites de recompensa (carga evitada)
+    limits = {'Patrocínios': sponsorship_limiter.stats(), 'Curtidas': like_limiter.stats()}
+    embed.add_field(
+        name="⏳ Limites de Recompensa",
+        value="\n".join(
+            f"{name}: {stats['allowed']} aceitos | **{stats['shed']}** descartados "
+            f"({', '.join(f'{scope}: {count}' for scope, count in stats['shed_by_scope'].items())})"
+            for name, stats in limits.items()
+        ),
+        inline=False
+    )
+    
+    # Livro de eventos de saldo
+    ledger = balance_ledger.stats()
+    embed.add_field(
+        name="📒 Livro de Saldos",
+        value=f"Eventos: **{ledger['ledger_events']}** | Pendentes: {ledger['ledger_pending']} | Gravados: {ledger['ledger_written']} | Reaplicados: {ledger['ledger_replayed']}",
+        inline=False
+    )
     
+    # Compras da lojinha (atômicas no banco)
+    purchases = wallet_service.stats()
     embed.add_field(
-        name="🍃 Status MongoDB",
-        value=mongodb_status,
+        name="🛒 Compras",
+        value=(
+            f"Concluídas: **{purchases['purchases']}** | Repetidas: {purchases['duplicate_purchases']} | "
+            f"Sem saldo: {purchases['rejected_purchases']} | Falhas: {purchases['failed_purchases']}"
+        ),
         inline=False
     )
     
     try:
-        if db is not None:
-            # Verifica quantos documentos existem em cada coleção
+        if storage is not None:
+            # Verifica quantos usuários têm cada seção no documento único
+            counts = await asyncio.gather(*[
+                storage_io.run(storage.count_users, section)
+                for section in ("profile", "economy", "follow", "inventory", "brand_posts", "used_reset")
+            ])
             collections_info = []
-            collections_info.append(f"👥 user_data: {db.user_data.count_documents({})} docs")
-            collections_info.append(f"💰 economy_data: {db.economy_data.count_documents({})} docs")
-            collections_info.append(f"🤝 follow_data: {db.follow_data.count_documents({})} docs")
-            collections_info.append(f"📦 inventory_data: {db.inventory_data.count_documents({})} docs")
-            collections_info.append(f"📝 brand_posts_data: {db.brand_posts_data.count_documents({})} docs")
-            collections_info.append(f"🔄 reset_data: {db.reset_data.count_documents({})} docs")
+            collections_info.append(f"👥 profile: {counts[0]} usuários")
+            collections_info.append(f"💰 economy: {counts[1]} usuários")
+            collections_info.append(f"🤝 follow: {counts[2]} usuários")
+            collections_info.append(f"📦 inventory: {counts[3]} usuários")
+            collections_info.append(f"📝 brand_posts: {counts[4]} usuários")
+            collections_info.append(f"🔄 used_reset: {counts[5]} usuários")
             
             embed.add_field(
-                name="📚 Coleções MongoDB",
+                name=f"📚 Usuários ({storage.name})",
                 value="\n".join(collections_info),
                 inline=False
             )
     except Exception as e:
         embed.add_field(
-            name="⚠️ Erro ao verificar MongoDB",
+            name="⚠️ Erro ao verificar o armazenamento",
             value=f"Erro: {str(e)[:100]}...",
             inline=False
         )
@@ -4575,8 +4470,8 @@ async def atividade(ctx):
     user_info = user_data[user_id]
     likes = user_info.get('total_likes', 0)
     followers = user_info.get('followers', 0)
-    following_count = len(follow_data.get(user_id, {}).get("following", []))
-    followers_count = len(follow_data.get(user_id, {}).get("followers", []))
+    following_count = follow_graph.following_count(user_id)
+    followers_count = follow_graph.followers_count(user_id)
 
     # Calcula pontuação de atividade
     activity_score = (likes * 2) + (following_count * 5) + (followers_count * 3)
@@ -4662,17 +4557,18 @@ async def amigos(ctx, member: discord.Member = None):
         return
 
     # Pega dados de relacionamentos
-    user_following = follow_data.get(user_id, {}).get("following", [])
-    user_followers = follow_data.get(user_id, {}).get("followers", [])
+    user_following = follow_graph.following(user_id)
+    user_followers = follow_graph.followers(user_id)
 
     # Encontra amigos mútuos (pessoas que seguem e são seguidas de volta)
     mutual_friends = []
     for friend_id in user_following:
-        if friend_id in user_followers:  # Se está nas duas listas = amigo mútuo
+        if friend_id in user_followers:  # Se está nos dois lados = amigo mútuo (O(1))
             try:
                 friend_user = bot.get_user(int(friend_id))
-                if friend_user and friend_id in user_data:
-                    friend_followers = user_data[friend_id].get('followers', 0)
+                summary = profile_summary(friend_id)
+                if friend_user and summary is not None:
+                    friend_followers = summary['followers'] or 0
                     mutual_friends.append((friend_id, friend_user, friend_followers))
             except:
                 continue
@@ -4698,7 +4594,7 @@ async def amigos(ctx, member: discord.Member = None):
         for i, (friend_id, friend_user, friend_followers) in enumerate(mutual_friends[:10]):  # Mostra até 10
             try:
                 # Pega o username do Instagram
-                username = user_data[friend_id].get('username', friend_user.display_name)
+                username = profile_summary(friend_id)['username'] or friend_user.display_name
 
                 # Adiciona verificação baseada nos níveis de seguidores
                 verification = ""
@@ -4744,7 +4640,7 @@ async def amigos(ctx, member: discord.Member = None):
                 friends_text += f"`{i+1:2d}.` {emoji} **@{username}**{verification}{status}\n      {followers_info}\n"
 
             except Exception as e:
-                print(f"Erro ao processar amigo {friend_id}: {e}")
+                command_log.error(f"Erro ao processar amigo {friend_id}: {e}")
                 continue
 
         if friends_text:
@@ -4785,27 +4681,18 @@ async def amigos(ctx, member: discord.Member = None):
 # Comando para top amizades (relacionamentos mútuos)
 @bot.command(name='amizades')
 async def amizades(ctx):
-    mutual_friends = []
+    # Pares mútuos vêm do grafo (enumerados uma vez por versão do grafo); top 10 por heap
+    def is_visible(user_id):
+        try:
+            return is_registered(user_id) and bot.get_user(int(user_id)) is not None
+        except ValueError:
+            return False  # IDs antigos que não são do Discord
+
+    def friendship_strength(user_id1, user_id2):
+        # "Força da amizade" = soma dos seguidores dos dois
+        return (profile_summary(user_id1)['followers'] or 0) + (profile_summary(user_id2)['followers'] or 0)
 
-    # Procura por relacionamentos mútuos
-    for user_id, data in follow_data.items():
-        following = data.get("following", [])
-        followers = data.get("followers", [])
-
-        for friend_id in following:
-            if friend_id in followers:  # Se estão nas duas listas, são amigos mútuos
-                # Evita duplicatas ordenando os IDs
-                pair = tuple(sorted([user_id, friend_id]))
-                if pair not in [tuple(sorted([u1, u2])) for u1, u2, _ in mutual_friends]:
-                    try:
-                        user1 = bot.get_user(int(user_id))
-                        user2 = bot.get_user(int(friend_id))
-                        if user1 and user2 and user_id in user_data and friend_id in user_data:
-                            # Calcula "força da amizade" baseada na soma dos seguidores
-                            strength = user_data[user_id].get('followers', 0) + user_data[friend_id].get('followers', 0)
-                            mutual_friends.append((user_id, friend_id, strength))
-                    except:
-                        continue
+    mutual_friends = follow_graph.top_mutual_pairs(10, friendship_strength, accept=is_visible)
 
     if not mutual_friends:
         embed = discord.Embed(
@@ -4821,26 +4708,23 @@ async def amizades(ctx):
         await ctx.reply(embed=embed)
         return
 
-    # Ordena por força da amizade
-    mutual_friends.sort(key=lambda x: x[2], reverse=True)
-
     embed = discord.Embed(
         title="🤝 Top Amizades do Servidor",
         description="Relacionamentos mútuos mais fortes:",
         color=0xFF69B4
     )
 
-    for i, (user_id1, user_id2, strength) in enumerate(mutual_friends[:10]):
+    for i, (user_id1, user_id2, strength) in enumerate(mutual_friends):
         try:
             user1 = bot.get_user(int(user_id1))
             user2 = bot.get_user(int(user_id2))
 
-            username1 = user_data[user_id1].get('username', user1.display_name)
-            username2 = user_data[user_id2].get('username', user2.display_name)
+            username1 = profile_summary(user_id1)['username'] or user1.display_name
+            username2 = profile_summary(user_id2)['username'] or user2.display_name
 
             # Adiciona verificação baseada nos níveis de seguidores
-            followers1 = user_data[user_id1].get('followers', 0)
-            followers2 = user_data[user_id2].get('followers', 0)
+            followers1 = profile_summary(user_id1)['followers'] or 0
+            followers2 = profile_summary(user_id2)['followers'] or 0
             
             if user_id1 == "983196900910039090":
                 username1 += " <:extremomxp:1387842927602172125>"
@@ -4903,11 +4787,11 @@ async def lojinha(ctx):
 
     # Inicializa dados de economia se não existir
     if user_id not in economy_data:
-        economy_data[user_id] = {"money": 0, "fame": 0}
+        economy_data[user_id] = Wallet()
 
     # Inicializa inventário se não existir
     if user_id not in inventory_data:
-        inventory_data[user_id] = {"carros": [], "mansoes": [], "itens_diarios": []}
+        inventory_data[user_id] = Inventory()
 
     # Embed principal da loja
     embed = discord.Embed(
@@ -4925,7 +4809,7 @@ async def lojinha(ctx):
 
     # Mostra quantos itens possui
     user_inventory = inventory_data[user_id]
-    total_items = len(user_inventory["carros"]) + len(user_inventory["mansoes"]) + len(user_inventory["itens_diarios"])
+    total_items = user_inventory.total
     
     embed.add_field(
         name="📦 Seus Itens",
@@ -4939,7 +4823,7 @@ async def lojinha(ctx):
         inline=False
     )
 
-    if user_money < 15:  # Preço do item mais barato
+    if user_money < LOJA_CATALOG.cheapest_price:
         embed.add_field(
             name="💡 Como Ganhar Dinheiro",
             value="• Mencione marcas famosas em posts longos (40+ caracteres)\n• Use `m!publi` para ver seu histórico\n• Quanto mais marcas, mais dinheiro!",
@@ -5018,9 +4902,8 @@ async def compatibilidade(ctx, member: discord.Member = None):
 
     # Fator 3: Se já se seguem mutuamente (+30 pontos)
     mutual_following = 0
-    if user1_id in follow_data and user2_id in follow_data:
-        if user2_id in follow_data[user1_id].get("following", []) and user1_id in follow_data[user2_id].get("following", []):
-            mutual_following = 30
+    if follow_graph.is_mutual(user1_id, user2_id):
+        mutual_following = 30
     factors.append(mutual_following)
 
     # Fator 4: Fator aleatório para variedade
@@ -5173,12 +5056,12 @@ class LeaderboardCategorySelect(discord.ui.Select):
         await show_ranking_page(interaction, category, 1)
 
 class LeaderboardPaginationView(discord.ui.View):
-    def __init__(self, category, page, total_pages, sorted_data):
+    def __init__(self, category, page, total_pages, snapshot):
         super().__init__(timeout=300)
         self.category = category
         self.page = page
         self.total_pages = total_pages
-        self.sorted_data = sorted_data
+        self.snapshot = snapshot
         
         # Adiciona botões de navegação
         if page > 1:
@@ -5193,128 +5076,122 @@ class LeaderboardPaginationView(discord.ui.View):
 
     @discord.ui.button(label="⬅️", style=discord.ButtonStyle.secondary, disabled=True)
     async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await show_ranking_page(interaction, self.category, self.page - 1)
+        await show_ranking_page(interaction, self.category, self.page - 1, self.snapshot)
 
     @discord.ui.button(label="➡️", style=discord.ButtonStyle.secondary, disabled=True)
     async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await show_ranking_page(interaction, self.category, self.page + 1)
+        await show_ranking_page(interaction, self.category, self.page + 1, self.snapshot)
 
     @discord.ui.button(label="🔙 Voltar ao Menu", style=discord.ButtonStyle.primary, row=1)
     async def back_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await show_main_leaderboard(interaction)
 
-def get_ranking_data(category):
-    """Obtém e organiza dados para um ranking específico"""
-    print(f"🔍 DEBUG: Executando get_ranking_data para categoria '{category}'")
-    print(f"🔍 DEBUG: Total de usuários em user_data: {len(user_data)}")
-    
-    if category == "seguidores":
-        # Filtra usuários com seguidores e que têm username
-        valid_users = []
-        for user_id, data in user_data.items():
-            followers = data.get('followers', 0)
-            username = data.get('username')
-            print(f"🔍 DEBUG: Analisando user_id {user_id}: username='{username}', followers={followers}")
-            
-            # Debug detalhado da validação
-            has_followers = followers > 0
-            has_username = username is not None and str(username).strip() != ""
-            print(f"🔍 DEBUG: has_followers={has_followers}, has_username={has_username}, username_stripped='{str(username).strip() if username else 'None'}'")
-            
-            # Só inclui usuários que tem seguidores E tem username definido (não None e não vazio)
-            if has_followers and has_username:
-                # Formato: (username, data, valor, tem_discord_user)
-                valid_users.append((username, data, followers, True))
-                print(f"✅ DEBUG: Usuário @{username} INCLUÍDO no ranking")
-            else:
-                print(f"❌ DEBUG: Usuário {user_id} EXCLUÍDO - followers: {followers}, username: '{username}'")
-        
-        sorted_users = sorted(valid_users, key=lambda x: x[2], reverse=True)
-        print(f"✅ DEBUG: Ranking seguidores final: {len(sorted_users)} usuários válidos")
-        for i, (username, data, followers, has_user) in enumerate(sorted_users[:5]):
-            print(f"🏆 DEBUG: #{i+1} - @{username} - {followers} seguidores")
-        
-        return sorted_users
-    
-    elif category == "curtidas":
-        # Inclui apenas usuários que têm username definido
-        valid_users = []
-        for user_id, data in user_data.items():
-            likes = data.get('total_likes', 0)
-            username = data.get('username')
-            if username and username.strip():
-                valid_users.append((username, data, likes, True))
-        return sorted(valid_users, key=lambda x: x[2], reverse=True)
-    
-    elif category == "dinheiro":
-        users_with_money = []
-        for user_id, data in user_data.items():
-            username = data.get('username')
-            # Só inclui se tem username
-            if not (username and username.strip()):
-                continue
-            # Inicializa economia se não existir
-            if user_id not in economy_data:
-                economy_data[user_id] = {"money": 0, "fame": 0}
-            money = economy_data[user_id].get('money', 0)
-            users_with_money.append((username, data, money, True))
-        return sorted(users_with_money, key=lambda x: x[2], reverse=True)
-    
-    elif category == "reais":
-        users_with_real_followers = []
-        for user_id, data in user_data.items():
-            username = data.get('username')
-            # Só inclui se tem username
-            if not (username and username.strip()):
-                continue
-            real_followers = len(follow_data.get(user_id, {}).get("followers", []))
-            users_with_real_followers.append((username, data, real_followers, True))
-        return sorted(users_with_real_followers, key=lambda x: x[2], reverse=True)
-    
-    elif category == "fama":
-        users_with_fame = []
-        for user_id, data in user_data.items():
-            username = data.get('username')
-            # Só inclui se tem username
-            if not (username and username.strip()):
-                continue
-            # Inicializa economia se não existir
-            if user_id not in economy_data:
-                economy_data[user_id] = {"money": 0, "fame": 0}
-            fame = economy_data[user_id].get('fame', 0)
-            users_with_fame.append((username, data, fame, True))
-        return sorted(users_with_fame, key=lambda x: x[2], reverse=True)
-    
-    elif category == "atividade":
-        users_with_activity = []
-        for user_id, data in user_data.items():
-            username = data.get('username')
-            # Só inclui se tem username
-            if not (username and username.strip()):
-                continue
-            likes = data.get('total_likes', 0)
-            following_count = len(follow_data.get(user_id, {}).get("following", []))
-            followers_count = len(follow_data.get(user_id, {}).get("followers", []))
-            activity_score = (likes * 2) + (following_count * 5) + (followers_count * 3)
-            users_with_activity.append((username, data, activity_score, True))
-        return sorted(users_with_activity, key=lambda x: x[2], reverse=True)
-    
-    elif category == "level":
-        users_with_level = []
-        for user_id, data in user_data.items():
-            username = data.get('username')
-            # Só inclui se tem username
-            if not (username and username.strip()):
-                continue
-            likes = data.get('total_likes', 0)
-            if user_id == "983196900910039090":  # Owner ID
-                level = 500
-            else:
-                level = min(likes // 10, 100)
-            users_with_level.append((username, data, level, True))
-        return sorted(users_with_level, key=lambda x: x[2], reverse=True)
-    
-    return []
+def ranking_username(user_id):
+    """Username do usuário se ele pode aparecer nos rankings (registrado e com nome definido)"""
+    data = profile_summary(user_id)
+    if data is None:
+        return None
+    username = data['username']
+    if username is not None and str(username).strip() != "":
+        return username
+    return None
+
+def economy_value(user_id, field):
+    data = user_summaries.get('economy', user_id)
+    return (data[field] or 0) if data is not None else 0
+
+def score_seguidores(user_id):
+    # Só entra quem tem seguidores E tem username definido
+    if ranking_username(user_id) is None:
+        return None
+    followers = profile_summary(user_id)['followers'] or 0
+    return followers if followers > 0 else None
+
+def score_curtidas(user_id):
+    if ranking_username(user_id) is None:
+        return None
+    return profile_summary(user_id)['total_likes'] or 0
+
+def score_dinheiro(user_id):
+    if ranking_username(user_id) is None:
+        return None
+    return economy_value(user_id, 'money')
+
+def score_reais(user_id):
+    if ranking_username(user_id) is None:
+        return None
+    return follow_graph.followers_count(user_id)
+
+def score_fama(user_id):
+    if ranking_username(user_id) is None:
+        return None
+    return economy_value(user_id, 'fame')
+
+def score_atividade(user_id):
+    if ranking_username(user_id) is None:
+        return None
+    likes = profile_summary(user_id)['total_likes'] or 0
+    following_count = follow_graph.following_count(user_id)
+    followers_count = follow_graph.followers_count(user_id)
+    return (likes * 2) + (following_count * 5) + (followers_count * 3)
+
+def score_popularidade(user_id):
+    # Todos os registrados, para as sugestões de quem seguir (não aparece no menu do leaderboard)
+    data = profile_summary(user_id)
+    if data is None:
+        return None
+    return data['followers'] or 0
+
+def score_level(user_id):
+    if ranking_username(user_id) is None:
+        return None
+    if user_id == "983196900910039090":  # Owner ID
+        return 500
+    return min((profile_summary(user_id)['total_likes'] or 0) // 10, 100)
+
+# Rankings mantidos ordenados a partir dos resumos (todos os usuários, carregados ou não) e do
+# grafo: cada alteração reposiciona só aquele usuário, na próxima consulta
+ranking_index = RankingIndex({
+    "seguidores": score_seguidores,
+    "curtidas": score_curtidas,
+    "dinheiro": score_dinheiro,
+    "reais": score_reais,
+    "fama": score_fama,
+    "atividade": score_atividade,
+    "level": score_level,
+    "popularidade": score_popularidade
+})
+for source in (user_summaries, follow_graph):
+    source.subscribe(ranking_index.invalidate)
+
+def ranking_row(user_id, value):
+    """Linha de um snapshot de ranking: (username, seguidores para o selo, valor)"""
+    data = profile_summary(user_id)
+    return (data['username'], data['followers'] or 0, value)
+
+# Sugestões de quem seguir: amigos de amigos + ranking de popularidade (ambos atualizados incrementalmente)
+follow_recommender = FollowRecommender(
+    follow_graph,
+    lambda start, stop: ranking_index.page("popularidade", start, stop)
+)
+
+# Snapshots compartilhados por todos que estão vendo a mesma categoria (refeitos quando o ranking muda)
+RANKING_SNAPSHOT_TTL = 30
+RANKING_PER_PAGE = 10
+ranking_cache = RankingSnapshotCache(ranking_index, ranking_row, ttl=RANKING_SNAPSHOT_TTL)
+
+def get_ranking_data(category, start=0, stop=None):
+    """Obtém as posições [start, stop) de um ranking específico, já ordenadas"""
+    if category not in ranking_index.scorers:
+        return []
+    if stop is None:
+        stop = ranking_index.count(category)
+    
+    # Formato: (username, resumo do perfil, valor, tem_discord_user)
+    return [
+        (profile_summary(user_id)['username'], profile_summary(user_id), value, True)
+        for user_id, value in ranking_index.page(category, start, stop)
+    ]
 
 def get_ranking_config(category):
     """Retorna configuração específica para cada tipo de ranking"""
@@ -5378,62 +5255,12 @@ def get_ranking_config(category):
     }
     return configs.get(category, configs["seguidores"])
 
-async def show_ranking_page(interaction, category, page):
-    """Mostra uma página específica do ranking"""
-    print(f"🔍 DEBUG: show_ranking_page chamada - categoria: {category}, página: {page}")
-    
-    config = get_ranking_config(category)
-    sorted_data = get_ranking_data(category)
-    
-    print(f"🔍 DEBUG: sorted_data retornado: {len(sorted_data)} itens")
-    for i, item in enumerate(sorted_data[:3]):
-        print(f"🔍 DEBUG: Item {i}: {item}")
-    
-    # Converte dados para formato padrão - agora usando username diretamente
-    valid_users = []
-    for item in sorted_data:
-        if len(item) == 4:  # Formato (username, data, value, has_user)
-            username, data, value, has_user = item
-            valid_users.append((username, data, value, None))  # None = não precisa do objeto user
-            print(f"✅ DEBUG: Usuário válido adicionado: @{username} - {value}")
-        else:
-            print(f"❌ DEBUG: Formato inválido: {item}")
-            continue
-    
-    print(f"🔍 DEBUG: valid_users final: {len(valid_users)} usuários")
-    
-    if not valid_users:
-        print(f"❌ DEBUG: Nenhum usuário válido encontrado!")
-        embed = discord.Embed(
-            title=config["title"],
-            description="❌ Nenhum usuário encontrado nesta categoria ainda.\n\nOs usuários aparecerão aqui após se registrarem com `m!seguidores`!",
-            color=config["color"]
-        )
-        embed.add_field(
-            name="💡 Como aparecer no ranking:",
-            value="1. Use `m!seguidores` para se registrar\n2. Use `m!atualizar` para definir seu nome\n3. Interaja no servidor para ganhar curtidas/seguidores",
-            inline=False
-        )
-        embed.add_field(
-            name="🔧 Debug Info:",
-            value=f"• Dados encontrados: {len(sorted_data)}\n• Usuários válidos: {len(valid_users)}\n• Categoria: {category}",
-            inline=False
-        )
-        view = discord.ui.View()
-        back_button = discord.ui.Button(label="🔙 Voltar ao Menu", style=discord.ButtonStyle.primary)
-        back_button.callback = lambda i: show_main_leaderboard(i)
-        view.add_item(back_button)
-        await interaction.response.edit_message(embed=embed, view=view)
-        return
-    
-    # Paginação
-    per_page = 10
-    total_pages = (len(valid_users) + per_page - 1) // per_page
-    start_idx = (page - 1) * per_page
-    end_idx = start_idx + per_page
-    page_users = valid_users[start_idx:end_idx]
-    
-    print(f"🔍 DEBUG: Paginação - total_pages: {total_pages}, page_users: {len(page_users)}")
+def render_ranking_page(snapshot, page):
+    """Monta o embed de uma página do snapshot (sem o rodapé, que depende de quem pediu)"""
+    config = get_ranking_config(snapshot.category)
+    total_pages = snapshot.total_pages(RANKING_PER_PAGE)
+    start_idx = (page - 1) * RANKING_PER_PAGE
+    page_users = snapshot.page(page, RANKING_PER_PAGE)
     
     # Cria embed
     embed = discord.Embed(
@@ -5444,13 +5271,10 @@ async def show_ranking_page(interaction, category, page):
     
     # Ranking da página
     ranking_text = ""
-    for i, (username, data, value, user_obj) in enumerate(page_users):
+    for i, (username, followers, value) in enumerate(page_users):
         global_position = start_idx + i + 1
         # Username já vem direto dos dados
         display_username = username
-        followers = data.get('followers', 0)
-        
-        print(f"🔍 DEBUG: Processando usuário {i+1}: @{username} - valor: {value}")
         
         # Adiciona verificação baseada nos seguidores
         if followers >= 25000000:  # Owner level
@@ -5475,20 +5299,17 @@ async def show_ranking_page(interaction, category, page):
         value_text = config["value_format"](value)
         ranking_text += f"{medal} **@{display_username}**\n      {value_text}\n\n"
     
-    print(f"🔍 DEBUG: ranking_text final length: {len(ranking_text)}")
-    print(f"🔍 DEBUG: ranking_text preview: {ranking_text[:200]}...")
-    
     if ranking_text.strip():
         embed.add_field(name="🏅 Ranking", value=ranking_text.strip(), inline=False)
     else:
         embed.add_field(name="🏅 Ranking", value="⚠️ Erro ao gerar ranking - debug ativo", inline=False)
-        embed.add_field(name="🔧 Debug", value=f"Usuários: {len(page_users)}\nCategoria: {category}\nValores: {[u[2] for u in page_users]}", inline=False)
+        embed.add_field(name="🔧 Debug", value=f"Usuários: {len(page_users)}\nCategoria: {snapshot.category}\nValores: {[u[2] for u in page_users]}", inline=False)
     
     # Estatísticas da categoria
-    if valid_users:
-        leader_value = valid_users[0][2]
-        total_users = len(valid_users)
-        average_value = sum(item[2] for item in valid_users) / total_users
+    if snapshot.count:
+        leader_value = snapshot.rows[0][2]
+        total_users = snapshot.count
+        average_value = snapshot.total / total_users
         
         stats_text = f"👑 **Líder:** {config['value_format'](leader_value)}\n"
         stats_text += f"📊 **Média:** {config['value_format'](int(average_value))}\n"
@@ -5497,31 +5318,70 @@ async def show_ranking_page(interaction, category, page):
         embed.add_field(name="📈 Estatísticas", value=stats_text, inline=False)
     
     embed.set_thumbnail(url=f"https://cdn.discordapp.com/emojis/1376731577106567319.png")
+    return embed
+
+async def show_ranking_page(interaction, category, page, snapshot=None):
+    """Mostra uma página específica do ranking
+
+    snapshot: o que a view já está paginando; é reaproveitado até o TTL expirar.
+    """
+    config = get_ranking_config(category)
+    
+    # Snapshot compartilhado da categoria (só é refeito quando o ranking muda ou expira)
+    if snapshot is not None:
+        snapshot = ranking_cache.resume(snapshot)
+    elif category in ranking_index.scorers:
+        snapshot = ranking_cache.get(category)
+    
+    if snapshot is None or not snapshot.count:
+        ranking_log.debug("Nenhum usuário válido no ranking '%s'", category)
+        embed = discord.Embed(
+            title=config["title"],
+            description="❌ Nenhum usuário encontrado nesta categoria ainda.\n\nOs usuários aparecerão aqui após se registrarem com `m!seguidores`!",
+            color=config["color"]
+        )
+        embed.add_field(
+            name="💡 Como aparecer no ranking:",
+            value="1. Use `m!seguidores` para se registrar\n2. Use `m!atualizar` para definir seu nome\n3. Interaja no servidor para ganhar curtidas/seguidores",
+            inline=False
+        )
+        embed.add_field(
+            name="🔧 Debug Info:",
+            value=f"• Usuários registrados: {user_summaries.count('profile')}\n• Usuários válidos: 0\n• Categoria: {category}",
+            inline=False
+        )
+        view = discord.ui.View()
+        back_button = discord.ui.Button(label="🔙 Voltar ao Menu", style=discord.ButtonStyle.primary)
+        back_button.callback = lambda i: show_main_leaderboard(i)
+        view.add_item(back_button)
+        await interaction.response.edit_message(embed=embed, view=view)
+        return
+    
+    # Paginação sobre o snapshot
+    total_pages = snapshot.total_pages(RANKING_PER_PAGE)
+    page = max(1, min(page, total_pages))  # O ranking pode ter encolhido desde o último clique
+    
+    # Página renderizada uma vez por versão do ranking; só o rodapé é por usuário
+    embed = ranking_cache.render_page(snapshot, page, render_ranking_page).copy()
     embed.set_footer(text=f"Página {page} de {total_pages} • Solicitado por {interaction.user.display_name}")
     
     # View com botões de navegação
-    view = LeaderboardPaginationView(category, page, total_pages, valid_users)
-    
-    print(f"🔍 DEBUG: Enviando embed para Discord...")
-    print(f"🔍 DEBUG: Embed title: {embed.title}")
-    print(f"🔍 DEBUG: Embed fields: {len(embed.fields)}")
+    view = LeaderboardPaginationView(category, page, total_pages, snapshot)
     
     try:
         await interaction.response.edit_message(embed=embed, view=view)
-        print(f"✅ DEBUG: Embed enviado com sucesso!")
     except Exception as e:
-        print(f"❌ DEBUG: Erro ao enviar embed: {e}")
+        ranking_log.error("❌ Erro ao enviar embed do ranking: %s", e)
         # Fallback embed mais simples
         fallback_embed = discord.Embed(
             title="🔧 Debug Mode - Rankings",
-            description=f"Categoria: {category}\nDados encontrados: {len(valid_users)} usuários",
+            description=f"Categoria: {category}\nDados encontrados: {snapshot.count} usuários",
             color=0xFF0000
         )
         
         # Mostra dados de forma mais simples
         simple_ranking = ""
-        for i, (user_id, data, value, user) in enumerate(page_users[:5]):
-            username = data.get('username') or user.display_name
+        for i, (username, followers, value) in enumerate(snapshot.page(page, RANKING_PER_PAGE)[:5]):
             simple_ranking += f"{i+1}. {username}: {value}\n"
         
         if simple_ranking:
@@ -5537,8 +5397,8 @@ async def show_main_leaderboard(interaction):
         color=0xFFD700
     )
     
-    total_users = len(user_data)
-    total_registered = len([u for u in user_data.values() if u.get('username')])
+    total_users = user_summaries.count('profile')
+    total_registered = len([u for u in user_summaries.values('profile') if u['username']])
     
     embed.add_field(
         name="📊 Rankings Disponíveis",
@@ -5592,7 +5452,7 @@ async def add_seguidores(ctx, member: discord.Member = None, quantidade: int = N
         return
     
     # Adiciona seguidores
-    user_data[user_id]['followers'] += quantidade
+    balance_ledger.apply(user_id, 'followers', quantidade, f"addseguidores por {ctx.author.id}")
     save_user_data()
     
     embed = discord.Embed(
@@ -5627,7 +5487,7 @@ async def remove_seguidores(ctx, member: discord.Member = None, quantidade: int
         return
     
     # Remove seguidores (mínimo 0)
-    user_data[user_id]['followers'] = max(0, user_data[user_id]['followers'] - quantidade)
+    balance_ledger.apply(user_id, 'followers', -quantidade, f"removeseguidores por {ctx.author.id}", floor=0)
     save_user_data()
     
     embed = discord.Embed(
@@ -5661,13 +5521,8 @@ async def add_money(ctx, member: discord.Member = None, quantidade: int = None):
         await ctx.reply("❌ Usuário não registrado!", ephemeral=True)
         return
     
-    # Inicializa economia se não existir
-    if user_id not in economy_data:
-        economy_data[user_id] = {"money": 0, "fame": 0}
-    
-    # Adiciona dinheiro
-    economy_data[user_id]["money"] += quantidade
-    save_economy_data()
+    # Adiciona dinheiro (direto no banco, serializado com as compras do usuário)
+    saldo = await wallet_service.adjust(user_id, quantidade, f"addmoney por {ctx.author.id}")
     
     embed = discord.Embed(
         title="✅ Dinheiro Adicionado",
@@ -5676,7 +5531,7 @@ async def add_money(ctx, member: discord.Member = None, quantidade: int = None):
     )
     embed.add_field(
         name="💰 Total Atual",
-        value=f"R$ {economy_data[user_id]['money']:,}".replace(",", "."),
+        value=f"R$ {saldo:,}".replace(",", "."),
         inline=False
     )
     embed.set_footer(text="🔒 Comando de Administração")
@@ -5700,13 +5555,8 @@ async def remove_money(ctx, member: discord.Member = None, quantidade: int = Non
         await ctx.reply("❌ Usuário não registrado!", ephemeral=True)
         return
     
-    # Inicializa economia se não existir
-    if user_id not in economy_data:
-        economy_data[user_id] = {"money": 0, "fame": 0}
-    
     # Remove dinheiro (mínimo 0)
-    economy_data[user_id]["money"] = max(0, economy_data[user_id]["money"] - quantidade)
-    save_economy_data()
+    saldo = await wallet_service.adjust(user_id, -quantidade, f"removemoney por {ctx.author.id}")
     
     embed = discord.Embed(
         title="✅ Dinheiro Removido",
@@ -5715,7 +5565,7 @@ async def remove_money(ctx, member: discord.Member = None, quantidade: int = Non
     )
     embed.add_field(
         name="💰 Total Atual",
-        value=f"R$ {economy_data[user_id]['money']:,}".replace(",", "."),
+        value=f"R$ {saldo:,}".replace(",", "."),
         inline=False
     )
     embed.set_footer(text="🔒 Comando de Administração")
@@ -5740,7 +5590,7 @@ async def add_curtidas(ctx, member: discord.Member = None, quantidade: int = Non
         return
     
     # Adiciona curtidas
-    user_data[user_id]['total_likes'] += quantidade
+    balance_ledger.apply(user_id, 'likes', quantidade, f"addcurtidas por {ctx.author.id}")
     save_user_data()
     
     embed = discord.Embed(
@@ -5775,7 +5625,7 @@ async def remove_curtidas(ctx, member: discord.Member = None, quantidade: int =
         return
     
     # Remove curtidas (mínimo 0)
-    user_data[user_id]['total_likes'] = max(0, user_data[user_id]['total_likes'] - quantidade)
+    balance_ledger.apply(user_id, 'likes', -quantidade, f"removecurtidas por {ctx.author.id}", floor=0)
     save_user_data()
     
     embed = discord.Embed(
@@ -5816,7 +5666,7 @@ async def reset_all_profiles(ctx):
     )
     embed.add_field(
         name="📊 Dados Atuais:",
-        value=f"👥 **{len(user_data)}** usuários registrados\n💰 **{len(economy_data)}** perfis de economia\n🤝 **{len(follow_data)}** relacionamentos\n📦 **{len(inventory_data)}** inventários\n📝 **{len(brand_posts_data)}** posts\n🔄 **{len(reset_data)}** resets usados",
+        value=f"👥 **{user_summaries.count('profile')}** usuários registrados\n💰 **{user_summaries.count('economy')}** perfis de economia\n🤝 **{len(follow_graph)}** relacionamentos\n📦 **{len(inventory_data)}** inventários em memória\n📝 **{len(brand_posts_data)}** posts em memória\n🔄 **{len(reset_data)}** resets em memória",
         inline=False
     )
 
@@ -5837,9 +5687,9 @@ async def reset_all_profiles(ctx):
 
         # Salva estatísticas antes do reset
         stats_before = {
-            "users": len(user_data),
-            "economy": len(economy_data),
-            "follow": len(follow_data),
+            "users": user_summaries.count('profile'),
+            "economy": user_summaries.count('economy'),
+            "follow": len(follow_graph),
             "inventory": len(inventory_data),
             "brand_posts": len(brand_posts_data),
             "resets": len(reset_data)
@@ -5848,10 +5698,22 @@ async def reset_all_profiles(ctx):
         # RESETA TODOS OS DADOS
         user_data.clear()
         economy_data.clear()
-        follow_data.clear()
+        follow_graph.clear()
         inventory_data.clear()
         brand_posts_data.clear()
         reset_data.clear()
+        sponsorships.clear()
+        like_ledger.clear()  # Sem isso, descurtidas de posts antigos tirariam seguidores dos novos registros
+        user_summaries.load([])
+
+        # Apaga também os usuários que não estão em memória (e o arquivo de posts)
+        try:
+            if storage is not None:
+                await storage_io.run(storage.delete_users)
+                await storage_io.run(storage.delete_archive)
+            await balance_ledger.clear()  # Sem os eventos antigos, que seriam reaplicados em novos registros
+        except Exception as e:
+            db_log.error(f"❌ Erro ao apagar documentos de usuários: {e}")
 
         # Salva tudo vazio no MongoDB
         try:
@@ -5862,7 +5724,7 @@ async def reset_all_profiles(ctx):
             save_brand_posts_data()
             save_reset_data()
         except Exception as e:
-            print(f"❌ Erro ao salvar dados zerados: {e}")
+            db_log.error(f"❌ Erro ao salvar dados zerados: {e}")
 
         success_embed = discord.Embed(
             title="💥 RESET TOTAL EXECUTADO!",
@@ -5892,7 +5754,7 @@ async def reset_all_profiles(ctx):
 
         await interaction.response.edit_message(embed=success_embed, view=None)
         
-        print(f"💥 RESET TOTAL executado pelo owner! {stats_before['users']} usuários deletados")
+        log.warning(f"💥 RESET TOTAL executado pelo owner! {stats_before['users']} usuários deletados")
 
     # Botão de cancelar
     cancel_button = discord.ui.Button(
@@ -5913,7 +5775,7 @@ async def reset_all_profiles(ctx):
         )
         cancel_embed.add_field(
             name="📊 Dados Preservados",
-            value=f"👥 **{len(user_data)}** usuários mantidos\n💰 **{len(economy_data)}** economias preservadas\n🤝 **{len(follow_data)}** relacionamentos intactos",
+            value=f"👥 **{user_summaries.count('profile')}** usuários mantidos\n💰 **{user_summaries.count('economy')}** economias preservadas\n🤝 **{len(follow_graph)}** relacionamentos intactos",
             inline=False
         )
         cancel_embed.set_footer(text="Reset cancelado com segurança")
@@ -5938,8 +5800,8 @@ async def leaderboard(ctx):
         color=0xFFD700
     )
     
-    total_users = len(user_data)
-    total_registered = len([u for u in user_data.values() if u.get('username')])
+    total_users = user_summaries.count('profile')
+    total_registered = len([u for u in user_summaries.values('profile') if u['username']])
     
     embed.add_field(
         name="📊 Rankings Disponíveis",
@@ -5995,10 +5857,7 @@ async def economia(ctx, member: discord.Member = None):
 
     # Inicializa dados de economia se não existir
     if user_id not in economy_data:
-        economy_data[user_id] = {
-            "money": 0,
-            "fame": 0
-        }
+        economy_data[user_id] = Wallet()
 
     # Pega dados do usuário
     money = economy_data[user_id].get("money", 0)
@@ -6082,134 +5941,134 @@ async def economia(ctx, member: discord.Member = None):
     await ctx.reply(embed=embed)
 
 # Sistema de inventário com menus
-class InventoryView(discord.ui.View):
+# Categoria -> (emoji, título, unidade, cor, título vazio, texto vazio)
+INVENTORY_CATEGORIES = {
+    "carros": ("🚗", "Meus Carros", "carros", 0x3498DB, "Nenhum Carro",
+               "Você ainda não possui carros! Use `m!lojinha` para comprar."),
+    "mansoes": ("🏰", "Minhas Mansões", "propriedades", 0xE67E22, "Nenhuma Mansão",
+                "Você ainda não possui mansões! Use `m!lojinha` para comprar."),
+    "itens_diarios": ("🛍️", "Meus Itens", "itens", 0x27AE60, "Nenhum Item",
+                      "Você ainda não possui itens! Use `m!lojinha` para comprar."),
+}
+
+def format_inventory_entries(entries, emoji, start=None):
+    """Linhas "nome ×quantidade - preço" de uma página do inventário (numeradas a partir de start)"""
+    lines = []
+    for i, (item, quantidade) in enumerate(entries):
+        prefix = f"`{start + i + 1:2d}.` " if start is not None else f"{emoji} "
+        extra = f" ×{quantidade}" if quantidade > 1 else ""
+        preco = f"R$ {item.preco:,}".replace(",", ".")
+        lines.append(f"{prefix}**{item.nome}**{extra} - {preco}")
+    return "\n".join(lines)
+
+def usable_items(user_inventory):
+    """[(nome, tipo, item)] de tudo o que pode ser usado com m!usar"""
+    items = []
+    for category, tipo in (("carros", "carro"), ("mansoes", "mansao"), ("itens_diarios", "item")):
+        for item, _ in inventory_entries(user_inventory, category, LOJA_CATALOG):
+            if tipo != "item" or item.categoria in USABLE_ITEM_CATEGORIES:
+                items.append((item.nome, tipo, item))
+    return items
+
+class InventoryView(UserDataView):
     def __init__(self, user_id):
         super().__init__(timeout=300)
         self.user_id = user_id
+        self.category = None
+        self.page = 0
 
-    @discord.ui.button(label='🚗 Ver Carros', style=discord.ButtonStyle.primary)
-    async def ver_carros(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != self.user_id:
-            await interaction.response.send_message("❌ Este inventário não é seu!", ephemeral=True)
-            return
-        
-        user_inventory = inventory_data.get(self.user_id, {"carros": [], "mansoes": [], "itens_diarios": []})
-        carros = user_inventory["carros"]
+    def category_embed(self):
+        emoji, titulo, unidade, cor, vazio_titulo, vazio_texto = INVENTORY_CATEGORIES[self.category]
+        user_inventory = inventory_data.get(self.user_id) or Inventory()
+        total = user_inventory.count(self.category)
+        entries, self.page, pages = inventory_page(user_inventory, self.category, LOJA_CATALOG,
+                                                   self.page, INVENTORY_PAGE_SIZE)
         
         embed = discord.Embed(
-            title="🚗 Meus Carros",
-            description=f"Você possui {len(carros)} carros",
-            color=0x3498DB
+            title=f"{emoji} {titulo}",
+            description=f"Você possui {total} {unidade}",
+            color=cor
         )
         
-        if not carros:
-            embed.add_field(
-                name="😢 Nenhum Carro",
-                value="Você ainda não possui carros! Use `m!lojinha` para comprar.",
-                inline=False
-            )
+        if not entries:
+            embed.add_field(name=f"😢 {vazio_titulo}", value=vazio_texto, inline=False)
         else:
-            carros_text = ""
-            for i, carro in enumerate(carros[:10]):  # Mostra até 10
-                carros_text += f"`{i+1:2d}.` **{carro['nome']}**\n      💰 R$ {carro['preco']:,}\n".replace(",", ".")
             embed.add_field(
-                name=f"🚗 Lista de Carros ({len(carros)})",
-                value=carros_text,
+                name=f"{emoji} Lista ({total})",
+                value=format_inventory_entries(entries, emoji, start=self.page * INVENTORY_PAGE_SIZE),
                 inline=False
             )
+            embed.set_footer(text=f"Página {self.page + 1}/{pages}")
         
-        await interaction.response.edit_message(embed=embed, view=self)
+        self.pagina_anterior.disabled = self.page == 0
+        self.proxima_pagina.disabled = self.page >= pages - 1
+        return embed
 
-    @discord.ui.button(label='🏰 Ver Mansões', style=discord.ButtonStyle.secondary)
-    async def ver_mansoes(self, interaction: discord.Interaction, button: discord.ui.Button):
+    async def show(self, interaction, category, page):
         if str(interaction.user.id) != self.user_id:
             await interaction.response.send_message("❌ Este inventário não é seu!", ephemeral=True)
             return
         
-        user_inventory = inventory_data.get(self.user_id, {"carros": [], "mansoes": [], "itens_diarios": []})
-        mansoes = user_inventory["mansoes"]
-        
-        embed = discord.Embed(
-            title="🏰 Minhas Mansões",
-            description=f"Você possui {len(mansoes)} propriedades",
-            color=0xE67E22
-        )
-        
-        if not mansoes:
-            embed.add_field(
-                name="😢 Nenhuma Mansão",
-                value="Você ainda não possui mansões! Use `m!lojinha` para comprar.",
-                inline=False
-            )
-        else:
-            mansoes_text = ""
-            for i, mansao in enumerate(mansoes[:10]):  # Mostra até 10
-                mansoes_text += f"`{i+1:2d}.` **{mansao['nome']}**\n      💰 R$ {mansao['preco']:,}\n".replace(",", ".")
-            embed.add_field(
-                name=f"🏰 Lista de Mansões ({len(mansoes)})",
-                value=mansoes_text,
-                inline=False
-            )
-        
-        await interaction.response.edit_message(embed=embed, view=self)
+        self.category, self.page = category, page
+        await interaction.response.edit_message(embed=self.category_embed(), view=self)
+
+    @discord.ui.button(label='🚗 Ver Carros', style=discord.ButtonStyle.primary)
+    async def ver_carros(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, "carros", 0)
+
+    @discord.ui.button(label='🏰 Ver Mansões', style=discord.ButtonStyle.secondary)
+    async def ver_mansoes(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, "mansoes", 0)
 
     @discord.ui.button(label='🛍️ Ver Itens', style=discord.ButtonStyle.success)
     async def ver_itens(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != self.user_id:
-            await interaction.response.send_message("❌ Este inventário não é seu!", ephemeral=True)
-            return
-        
-        user_inventory = inventory_data.get(self.user_id, {"carros": [], "mansoes": [], "itens_diarios": []})
-        itens = user_inventory["itens_diarios"]
-        
-        embed = discord.Embed(
-            title="🛍️ Meus Itens",
-            description=f"Você possui {len(itens)} itens",
-            color=0x27AE60
-        )
-        
-        if not itens:
-            embed.add_field(
-                name="😢 Nenhum Item",
-                value="Você ainda não possui itens! Use `m!lojinha` para comprar.",
-                inline=False
-            )
-        else:
-            itens_text = ""
-            for i, item in enumerate(itens[:15]):  # Mostra até 15
-                itens_text += f"`{i+1:2d}.` **{item['nome']}** - R$ {item['preco']:,}\n".replace(",", ".")
-            embed.add_field(
-                name=f"🛍️ Lista de Itens ({len(itens)})",
-                value=itens_text,
-                inline=False
-            )
-        
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show(interaction, "itens_diarios", 0)
 
-class UseItemView(discord.ui.View):
-    def __init__(self, user_id):
+    @discord.ui.button(label='◀️ Anterior', style=discord.ButtonStyle.secondary, row=1, disabled=True)
+    async def pagina_anterior(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.category, self.page - 1)
+
+    @discord.ui.button(label='Próxima ▶️', style=discord.ButtonStyle.secondary, row=1, disabled=True)
+    async def proxima_pagina(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.category, self.page + 1)
+
+class UseItemView(UserDataView):
+    PAGE_SIZE = 25  # Discord limita o select a 25 opções
+
+    def __init__(self, user_id, page=0):
         super().__init__(timeout=300)
         self.user_id = user_id
         
-        # Adiciona select menu com os itens disponíveis para usar
-        user_inventory = inventory_data.get(user_id, {"carros": [], "mansoes": [], "itens_diarios": []})
-        all_items = []
+        # Adiciona select menu com os itens disponíveis para usar (uma página por vez)
+        all_items = usable_items(inventory_data.get(user_id) or Inventory())
+        pages = max(1, -(-len(all_items) // self.PAGE_SIZE))
+        self.page = min(max(page, 0), pages - 1)
+        page_items = all_items[self.page * self.PAGE_SIZE:(self.page + 1) * self.PAGE_SIZE]
         
-        # Adiciona carros
-        for carro in user_inventory["carros"][:10]:  # Limita a 10
-            all_items.append((carro["nome"], "carro", carro))
+        if page_items:
+            self.add_item(UseItemSelect(user_id, page_items))
         
-        # Adiciona mansões
-        for mansao in user_inventory["mansoes"][:5]:  # Limita a 5
-            all_items.append((mansao["nome"], "mansao", mansao))
-        
-        # Adiciona itens (apenas eletrônicos, games e bebidas são "usáveis")
-        for item in user_inventory["itens_diarios"][:10]:  # Limita a 10
-            if any(cat in item.get("categoria", "") for cat in ["Eletrônicos", "Games", "Bebidas", "Comidas"]):
-                all_items.append((item["nome"], "item", item))
+        if pages > 1:
+            self.pagina_anterior.disabled = self.page == 0
+            self.proxima_pagina.disabled = self.page >= pages - 1
+        else:
+            self.remove_item(self.pagina_anterior)
+            self.remove_item(self.proxima_pagina)
+
+    async def turn_page(self, interaction, page):
+        if str(interaction.user.id) != self.user_id:
+            await interaction.response.send_message("❌ Este inventário não é seu!", ephemeral=True)
+            return
         
-        if all_items:
-            self.add_item(UseItemSelect(user_id, all_items))
+        await interaction.response.edit_message(view=UseItemView(self.user_id, page))
+
+    @discord.ui.button(label='◀️ Anterior', style=discord.ButtonStyle.secondary, row=1)
+    async def pagina_anterior(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn_page(interaction, self.page - 1)
+
+    @discord.ui.button(label='Próxima ▶️', style=discord.ButtonStyle.secondary, row=1)
+    async def proxima_pagina(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn_page(interaction, self.page + 1)
 
 class UseItemSelect(discord.ui.Select):
     def __init__(self, user_id, items):
@@ -6291,8 +6150,12 @@ class UseItemSelect(discord.ui.Select):
         embed.set_footer(text=f"Item usado por {interaction.user.display_name}")
         await interaction.response.edit_message(embed=embed, view=None)
 
-# Comando para daily reward (recompensa diária)
-daily_rewards = {}
+# Recompensa diária: o dia da última coleta fica no próprio registro do usuário
+# (dias desde 01/01/1970), então coletar grava só esse campo e as curtidas
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+def epoch_day():
+    return datetime.date.today().toordinal() - EPOCH_ORDINAL
 
 @bot.command(name='inv', aliases=['inventario'])
 async def inventario(ctx):
@@ -6314,10 +6177,10 @@ async def inventario(ctx):
     
     # Inicializa inventário se não existir
     if user_id not in inventory_data:
-        inventory_data[user_id] = {"carros": [], "mansoes": [], "itens_diarios": []}
+        inventory_data[user_id] = Inventory()
     
     user_inventory = inventory_data[user_id]
-    total_items = len(user_inventory["carros"]) + len(user_inventory["mansoes"]) + len(user_inventory["itens_diarios"])
+    total_items = user_inventory.total
     
     embed = discord.Embed(
         title="📦 Meu Inventário",
@@ -6327,22 +6190,28 @@ async def inventario(ctx):
     
     embed.add_field(
         name="🚗 Carros",
-        value=f"**{len(user_inventory['carros'])}** carros",
+        value=f"**{user_inventory.count('carros')}** carros",
         inline=True
     )
     
     embed.add_field(
         name="🏰 Mansões",
-        value=f"**{len(user_inventory['mansoes'])}** propriedades",
+        value=f"**{user_inventory.count('mansoes')}** propriedades",
         inline=True
     )
     
     embed.add_field(
         name="🛍️ Itens",
-        value=f"**{len(user_inventory['itens_diarios'])}** itens",
+        value=f"**{user_inventory.count('itens_diarios')}** itens",
         inline=True
     )
     
+    embed.add_field(
+        name="💎 Patrimônio",
+        value=f"R$ {user_inventory.net_worth:,}".replace(",", "."),
+        inline=False
+    )
+    
     if total_items == 0:
         embed.add_field(
             name="😢 Inventário Vazio",
@@ -6377,10 +6246,10 @@ async def usar_item(ctx):
     
     # Inicializa inventário se não existir
     if user_id not in inventory_data:
-        inventory_data[user_id] = {"carros": [], "mansoes": [], "itens_diarios": []}
+        inventory_data[user_id] = Inventory()
     
     user_inventory = inventory_data[user_id]
-    total_items = len(user_inventory["carros"]) + len(user_inventory["mansoes"]) + len(user_inventory["itens_diarios"])
+    total_items = user_inventory.total
     
     if total_items == 0:
         embed = discord.Embed(
@@ -6404,7 +6273,7 @@ async def usar_item(ctx):
     
     embed.add_field(
         name="📋 Itens Disponíveis",
-        value=f"🚗 **{len(user_inventory['carros'])}** carros para dirigir\n🏰 **{len(user_inventory['mansoes'])}** mansões para relaxar\n🛍️ **{len([i for i in user_inventory['itens_diarios'] if any(cat in i.get('categoria', '') for cat in ['Eletrônicos', 'Games', 'Bebidas', 'Comidas'])])}** itens usáveis",
+        value=f"🚗 **{user_inventory.count('carros')}** carros para dirigir\n🏰 **{user_inventory.count('mansoes')}** mansões para relaxar\n🛍️ **{sum(quantidade for item, quantidade in inventory_entries(user_inventory, 'itens_diarios', LOJA_CATALOG) if item.categoria in USABLE_ITEM_CATEGORIES)}** itens usáveis",
         inline=False
     )
     
@@ -6438,11 +6307,11 @@ async def daily_reward(ctx):
         await ctx.reply(embed=embed)
         return
 
-    import datetime
-    today = datetime.date.today().isoformat()
+    today = epoch_day()
 
     # Verifica se já coletou hoje
-    if user_id in daily_rewards and daily_rewards[user_id] == today:
+    profile = user_data[user_id]
+    if profile.daily_claimed_day == today:
         embed = discord.Embed(
             title="⏰ Já coletado hoje!",
             description="Você já coletou sua recompensa diária!",
@@ -6457,7 +6326,7 @@ async def daily_reward(ctx):
         return
 
     # Calcula recompensa baseada nos seguidores
-    followers = user_data[user_id].get('followers', 0)
+    followers = profile.followers
     
     if followers >= 5000000:
         likes_reward = random.randint(15, 25)
@@ -6476,8 +6345,8 @@ async def daily_reward(ctx):
         bonus = "🌱 Crescendo"
 
     # Adiciona as curtidas
-    user_data[user_id]['total_likes'] += likes_reward
-    daily_rewards[user_id] = today
+    balance_ledger.apply(user_id, 'likes', likes_reward, 'daily')
+    profile.daily_claimed_day = today
     save_user_data()
 
     embed = discord.Embed(
@@ -6521,8 +6390,9 @@ async def daily_reward(ctx):
 if __name__ == "__main__":
     token = os.getenv('DISCORD_BOT_TOKEN')
     if not token:
-        print("ERRO: Token do Discord não encontrado!")
-        print("Configure a variável DISCORD_BOT_TOKEN nas Secrets do Replit")
+        log.error("ERRO: Token do Discord não encontrado!")
+        log.error("Configure a variável DISCORD_BOT_TOKEN nas Secrets do Replit")
     else:
         keep_alive()
-        bot.run(token)
+        # Roda até SIGTERM/SIGINT; o desligamento grava os dados pendentes e fecha o MongoDB
+        asyncio.run(lifecycle.run(token))
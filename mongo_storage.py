@@ -0,0 +1,173 @@
+import datetime
+import logging
+
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from storage import StorageBackend, seq_datetime
+from user_documents import (USERS_COLLECTION, BRAND_POSTS_ARCHIVE, fetch_section, fetch_users, fetch_summaries,
+                            migrate_legacy_collections, migrate_brand_posts, migrate_inventory)
+
+log = logging.getLogger('mxp.db')
+
+# Uma coleção de eventos por mês (balance_events_2024_01, ...): partições antigas são descartadas inteiras
+PARTITION_PREFIX = 'balance_events_'
+
+
+def partition_name(seq):
+    return PARTITION_PREFIX + seq_datetime(seq).strftime('%Y_%m')
+
+
+def _duplicate_free_failures(error, batch):
+    # Chave duplicada = já inserido numa tentativa anterior; só o resto conta como falha
+    return [batch[e['index']] for e in error.details.get('writeErrors', []) if e.get('code') != 11000]
+
+
+class MongoBackend(StorageBackend):
+    """Armazenamento no MongoDB: documento único por usuário na coleção users
+
+    As operações da carteira são um find_one_and_update condicional cada; o livro de saldos
+    fica em uma coleção por mês.
+    """
+
+    name = 'MongoDB'
+
+    def __init__(self, db):
+        self.db = db
+        self.users = db[USERS_COLLECTION]
+        self._partitions = None  # Partições existentes (lidas do banco na primeira vez)
+
+    def migrate(self, brand_posts_keep):
+        results = {
+            'users': migrate_legacy_collections(self.db),
+            'brand_posts': migrate_brand_posts(self.db, brand_posts_keep),
+            'inventory': migrate_inventory(self.db),
+        }
+        return {name: result for name, result in results.items() if result}
+
+    def close(self):
+        self.db.client.close()
+
+    def write_users(self, writes):
+        now = datetime.datetime.utcnow()
+        operations = []
+        for user_id, values, unset in writes:
+            update = {'$set': dict(values, updated_at=now)}
+            if unset:
+                update['$unset'] = {section: '' for section in unset}
+            # Upsert também para campos soltos: sem documento, a seção é criada só com eles (como no SQLite)
+            operations.append(UpdateOne({'_id': user_id}, update, upsert=bool(values)))
+        if operations:
+            self.users.bulk_write(operations, ordered=True)
+        return len(operations)
+
+    def fetch_section(self, section):
+        return fetch_section(self.users, section)
+
+    def fetch_users(self, user_ids, sections):
+        return fetch_users(self.users, user_ids, sections)
+
+    def fetch_summaries(self, fields):
+        return fetch_summaries(self.users, fields)
+
+    def count_users(self, section):
+        return self.users.count_documents({section: {'$exists': True}})
+
+    def delete_users(self):
+        self.users.delete_many({})
+
+    def purchase(self, user_id, purchase_id, item, seq, keep):
+        document = self.users.find_one_and_update(
+            {'_id': user_id, 'economy.money': {'$gte': item.preco}, 'economy.purchase_ids': {'$ne': purchase_id}},
+            {
+                '$inc': {
+                    'economy.money': -item.preco,
+                    f'inventory.{item.tipo}.{item.id}': 1,
+                    f'inventory.counts.{item.tipo}': 1,
+                    'inventory.net_worth': item.preco,
+                },
+                '$push': {'economy.purchase_ids': {'$each': [purchase_id], '$slice': -keep}},
+                '$max': {'economy.ledger_seq': seq},
+                '$set': {'updated_at': datetime.datetime.utcnow()},
+            },
+            projection={'_id': 1}
+        )
+        return document is not None
+
+    def purchase_state(self, user_id):
+        document = self.users.find_one({'_id': user_id}, {'economy.money': 1, 'economy.purchase_ids': 1}) or {}
+        economy = document.get('economy', {})
+        return economy.get('money', 0), economy.get('purchase_ids', [])
+
+    def adjust_money(self, user_id, amount, seq):
+        # Pipeline de update: o piso de zero é calculado no próprio banco, que devolve o saldo anterior
+        before = self.users.find_one_and_update(
+            {'_id': user_id},
+            [{'$set': {
+                'economy.money': {'$max': [0, {'$add': [{'$ifNull': ['$economy.money', 0]}, amount]}]},
+                'economy.ledger_seq': {'$max': [{'$ifNull': ['$economy.ledger_seq', 0]}, seq]},
+                'updated_at': '$$NOW',
+            }}],
+            projection={'economy.money': 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        return ((before or {}).get('economy') or {}).get('money', 0)
+
+    def archive_posts(self, posts):
+        try:
+            self.db[BRAND_POSTS_ARCHIVE].insert_many(posts, ordered=False)
+        except BulkWriteError as e:
+            return _duplicate_free_failures(e, posts)
+        return []
+
+    def delete_archive(self):
+        self.db[BRAND_POSTS_ARCHIVE].delete_many({})
+
+    def _known_partitions(self):
+        if self._partitions is None:
+            self._partitions = {name for name in self.db.list_collection_names() if name.startswith(PARTITION_PREFIX)}
+        return self._partitions
+
+    def append_events(self, events):
+        by_partition = {}
+        for event in events:
+            by_partition.setdefault(partition_name(event['seq']), []).append(dict(event, ts=seq_datetime(event['seq'])))
+        failed = []
+        for name, batch in by_partition.items():
+            collection = self.db[name]
+            if name not in self._known_partitions():
+                collection.create_index([('user_id', ASCENDING), ('seq', ASCENDING)])
+                # Conjunto novo em vez de alterar o atual: outra thread de I/O pode estar iterando nele
+                self._partitions = self._partitions | {name}
+            try:
+                collection.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                failed.extend(_duplicate_free_failures(e, batch))
+            except Exception as e:
+                log.error("❌ Erro ao gravar eventos em %s: %s", name, e)
+                failed.extend(batch)
+        return [{k: v for k, v in event.items() if k != 'ts'} for event in failed]
+
+    def events_since(self, user_ids, since):
+        first = partition_name(since) if since else ''
+        events = []
+        for name in sorted(self._known_partitions()):
+            if name >= first:
+                events.extend(self.db[name].find({'user_id': {'$in': list(user_ids)}, 'seq': {'$gt': since}}))
+        events.sort(key=lambda event: event['seq'])
+        return events
+
+    def _drop_partitions(self, before):
+        dropped = [name for name in self._known_partitions() if name < before]
+        for name in dropped:
+            self.db.drop_collection(name)
+        self._partitions = self._partitions - set(dropped)
+        return dropped
+
+    def drop_events_before(self, seq):
+        # Só partições inteiras: o mês de seq fica até o mês seguinte também sair da retenção
+        return self._drop_partitions(partition_name(seq))
+
+    def delete_events(self):
+        self._drop_partitions(PARTITION_PREFIX + '~')
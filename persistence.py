@@ -0,0 +1,600 @@
+import asyncio
+import contextlib
+import dataclasses
+import datetime
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger('mxp.db')
+
+
+class TrackedDict(dict):
+    """Dict de um registro que avisa a store dona quando é modificado
+
+    No dict do próprio registro (field None), atribuir um campo marca só aquele campo; dentro
+    de um campo (field = nome do campo), qualquer mudança marca o campo inteiro. Remover
+    campos do registro marca o registro todo.
+    """
+    __slots__ = ('_owner', '_key', '_field')
+
+    def __init__(self, owner, key, data=(), field=None):
+        super().__init__()
+        self._owner = owner
+        self._key = key
+        self._field = field
+        for k, v in dict(data).items():
+            dict.__setitem__(self, k, self._child(k, v))
+
+    def _child(self, k, v):
+        return _wrap(v, self._owner, self._key, k if self._field is None else self._field)
+
+    def _changed(self, k=None):
+        if self._field is not None:
+            self._owner.mark_field(self._key, self._field)
+        elif k is not None:
+            self._owner.mark_field(self._key, k)
+        else:
+            self._owner.mark_dirty(self._key)
+
+    def __setitem__(self, k, v):
+        dict.__setitem__(self, k, self._child(k, v))
+        self._changed(k)
+
+    def __delitem__(self, k):
+        dict.__delitem__(self, k)
+        self._changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, k, *default):
+        had_key = k in self
+        value = dict.pop(self, k, *default)
+        if had_key:
+            self._changed()
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self._changed()
+        return item
+
+    def setdefault(self, k, default=None):
+        if k not in self:
+            self[k] = default
+        return dict.__getitem__(self, k)
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def clear(self):
+        dict.clear(self)
+        self._changed()
+
+
+class TrackedList(list):
+    """Lista dentro de um registro (ex.: following, recent) que avisa a store dona quando é modificada"""
+    __slots__ = ('_owner', '_key', '_field')
+
+    def __init__(self, owner, key, data=(), field=None):
+        super().__init__(_wrap(v, owner, key, field) for v in data)
+        self._owner = owner
+        self._key = key
+        self._field = field
+
+    def _changed(self):
+        if self._field is not None:
+            self._owner.mark_field(self._key, self._field)
+        else:
+            self._owner.mark_dirty(self._key)
+
+    def __setitem__(self, i, v):
+        if isinstance(i, slice):
+            v = [_wrap(x, self._owner, self._key, self._field) for x in v]
+        else:
+            v = _wrap(v, self._owner, self._key, self._field)
+        list.__setitem__(self, i, v)
+        self._changed()
+
+    def __delitem__(self, i):
+        list.__delitem__(self, i)
+        self._changed()
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, n):
+        list.__imul__(self, n)
+        self._changed()
+        return self
+
+    def append(self, v):
+        list.append(self, _wrap(v, self._owner, self._key, self._field))
+        self._changed()
+
+    def extend(self, values):
+        list.extend(self, [_wrap(v, self._owner, self._key, self._field) for v in values])
+        self._changed()
+
+    def insert(self, i, v):
+        list.insert(self, i, _wrap(v, self._owner, self._key, self._field))
+        self._changed()
+
+    def remove(self, v):
+        list.remove(self, v)
+        self._changed()
+
+    def pop(self, *args):
+        value = list.pop(self, *args)
+        self._changed()
+        return value
+
+    def clear(self):
+        list.clear(self)
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        list.reverse(self)
+        self._changed()
+
+
+_FIELD_NAMES = {}
+
+# Valores atribuídos sem conversão (não há nada dentro deles para rastrear)
+_SCALARS = frozenset({int, float, str, bool, type(None)})
+
+
+def _field_names(cls):
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        names = _FIELD_NAMES[cls] = tuple(f.name for f in dataclasses.fields(cls) if f.name != 'extra')
+    return names
+
+
+class TrackedRecord:
+    """Base dos registros tipados (dataclasses com slots e um campo extra: dict ou None)
+
+    Campos são atributos: atribuir um deles marca só aquele campo na store dona. O acesso
+    antigo por chave (record['followers'], .get, in) continua funcionando para o código que
+    trata registros como dicts; .get e in tratam None como ausente. Chaves desconhecidas
+    vindas do banco ficam em extra e voltam para o documento; extra só é criado quando há
+    alguma, já que quase nenhum registro tem.
+    """
+    __slots__ = ('_owner', '_key')
+
+    def __setattr__(self, name, value):
+        try:
+            owner = self._owner
+        except AttributeError:  # Ainda no __init__ da dataclass
+            owner = None
+        if owner is None or name[0] == '_':
+            object.__setattr__(self, name, value)
+            return
+        if value.__class__ not in _SCALARS:
+            value = _wrap(value, owner, self._key, name)
+        object.__setattr__(self, name, value)
+        owner.mark_field(self._key, name)
+
+    def _attach(self, owner, key):
+        object.__setattr__(self, '_owner', owner)
+        object.__setattr__(self, '_key', key)
+        for name in _field_names(type(self)):
+            object.__setattr__(self, name, _wrap(getattr(self, name), owner, key, name))
+        if self.extra is not None:
+            object.__setattr__(self, 'extra', TrackedDict(owner, key, self.extra))
+
+    def _extra(self):
+        if self.extra is None:
+            owner = getattr(self, '_owner', None)
+            object.__setattr__(self, 'extra', {} if owner is None else TrackedDict(owner, self._key))
+        return self.extra
+
+    @classmethod
+    def from_document(cls, document):
+        names = _field_names(cls)
+        known = {k: v for k, v in document.items() if k in names and v is not None}
+        extra = {k: v for k, v in document.items() if k not in names}
+        return cls(**known, extra=extra or None)
+
+    def to_document(self):
+        """Dict comum para o banco (campos None ficam de fora: voltam como o padrão)"""
+        document = to_plain(self.extra) if self.extra else {}
+        for name in _field_names(type(self)):
+            value = getattr(self, name)
+            if value is not None:
+                document[name] = to_plain(value)
+        return document
+
+    # --- Acesso por chave (compatível com os registros antigos em dict) ---
+
+    def __getitem__(self, k):
+        if k in _field_names(type(self)):
+            return getattr(self, k)
+        if self.extra is None:
+            raise KeyError(k)
+        return self.extra[k]
+
+    def __setitem__(self, k, v):
+        if k in _field_names(type(self)):
+            setattr(self, k, v)
+        else:
+            self._extra()[k] = v
+
+    def __contains__(self, k):
+        if k in _field_names(type(self)):
+            return getattr(self, k) is not None
+        return self.extra is not None and k in self.extra
+
+    def get(self, k, default=None):
+        if k in _field_names(type(self)):
+            value = getattr(self, k)
+            return default if value is None else value
+        return self.extra.get(k, default) if self.extra is not None else default
+
+    def setdefault(self, k, default=None):
+        if k not in self:
+            self[k] = default
+        return self[k]
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def keys(self):
+        return [k for k in _field_names(type(self)) if getattr(self, k) is not None] + list(self.extra or ())
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+
+def _wrap(value, owner, key, field=None):
+    """Envolve dicts e listas aninhados para que mudanças internas também marquem o registro"""
+    if isinstance(value, TrackedRecord):
+        value._attach(owner, key)
+        return value
+    if (isinstance(value, (TrackedDict, TrackedList)) and value._owner is owner
+            and value._key == key and value._field == field):
+        return value
+    if isinstance(value, dict):
+        return TrackedDict(owner, key, value, field)
+    if isinstance(value, list):
+        return TrackedList(owner, key, value, field)
+    return value
+
+
+def to_plain(value):
+    """Converte registros rastreados em dicts/listas comuns (cópia profunda)"""
+    if isinstance(value, TrackedRecord):
+        return value.to_document()
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [to_plain(v) for v in value]
+    return value
+
+
+class DirtyTrackingStore(dict):
+    """Dict user_id -> registro que anota quais ids mudaram desde o último flush
+
+    O registro pode ser um dict (rastreado em profundidade), um valor simples (ex.: reset_data)
+    ou, com record_type, um TrackedRecord: dicts atribuídos ou lidos do banco são convertidos.
+    """
+
+    def __init__(self, record_type=None):
+        super().__init__()
+        self.record_type = record_type
+        self._persisted = None  # Chave cujas alterações já estão no banco (ver persisted)
+        self._dirty = set()   # registros a regravar inteiros
+        self._fields = {}     # key -> campos alterados (registros que só tiveram campos atribuídos)
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """Registra listener(key), chamado sempre que um registro muda ou é recarregado"""
+        self._listeners.append(listener)
+
+    def _notify(self, key):
+        for listener in self._listeners:
+            listener(key)
+
+    def mark_dirty(self, key):
+        if key != self._persisted:
+            self._dirty.add(key)
+            self._fields.pop(key, None)
+        self._notify(key)
+
+    def mark_field(self, key, field):
+        """Só um campo do registro mudou (gravável com $set se o flusher souber montar os campos)"""
+        if key not in self._dirty and key != self._persisted:
+            self._fields.setdefault(key, set()).add(field)
+        self._notify(key)
+
+    @contextlib.contextmanager
+    def persisted(self, key):
+        """Alterações no registro feitas dentro do bloco (sem await) já foram gravadas direto no banco
+
+        Os listeners são notificados normalmente, mas o registro não fica pendente para o flush.
+        """
+        self._persisted = key
+        try:
+            yield
+        finally:
+            self._persisted = None
+
+    @property
+    def pending_count(self):
+        return len(self._dirty) + len(self._fields)
+
+    def _record(self, value):
+        if self.record_type is not None and isinstance(value, dict):
+            return self.record_type.from_document(value)
+        return value
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, _wrap(self._record(value), self, key))
+        self.mark_dirty(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.mark_dirty(key)
+
+    def pop(self, key, *default):
+        had_key = key in self
+        value = dict.pop(self, key, *default)
+        if had_key:
+            self.mark_dirty(key)
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self.mark_dirty(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default if default is not None else {}
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        keys = list(self.keys())
+        dict.clear(self)
+        for key in keys:
+            self.mark_dirty(key)
+
+    def is_dirty(self, key):
+        return key in self._dirty or key in self._fields
+
+    def load_one(self, key, record):
+        """Coloca um registro lido do banco sem marcá-lo como alterado"""
+        dict.__setitem__(self, key, _wrap(self._record(record), self, key))
+
+    def evict(self, key):
+        """Tira um registro da memória sem apagá-lo do banco"""
+        if dict.__contains__(self, key):
+            dict.__delitem__(self, key)
+
+    def load(self, records):
+        """Substitui o conteúdo pelos registros do banco sem marcá-los como alterados.
+
+        Registros com alterações ainda não salvas são mantidos (a versão local é mais nova).
+        """
+        pending_keys = self._dirty | set(self._fields)
+        pending = {key: dict.__getitem__(self, key) for key in pending_keys if key in self}
+        previous_keys = set(self.keys())
+        dict.clear(self)
+        for key, record in records.items():
+            dict.__setitem__(self, key, _wrap(self._record(record), self, key))
+        for key in pending_keys:
+            if key in pending:
+                dict.__setitem__(self, key, pending[key])
+            elif dict.__contains__(self, key):
+                dict.__delitem__(self, key)  # Remoção ainda não gravada
+        if self._listeners:
+            for key in previous_keys | set(self.keys()):
+                self._notify(key)
+
+    def drain(self, only=None, skip=()):
+        """Retorna (registros alterados, ids removidos) e zera o rastreamento"""
+        upserts, fields, deleted = self.drain_changes(only, skip)
+        for key in fields:
+            upserts[key] = to_plain(dict.__getitem__(self, key))
+        return upserts, deleted
+
+    def drain_changes(self, only=None, skip=()):
+        """Como drain, mas separando quem só teve campos atribuídos
+
+        Retorna (registros a regravar inteiros, {key: {campo: valor}}, ids removidos). Com only,
+        só esses ids saem; ids em skip continuam pendentes.
+        """
+        dirty = set(self._dirty) if only is None else self._dirty & set(only)
+        changed = set(self._fields) if only is None else self._fields.keys() & set(only)
+        dirty -= set(skip)
+        changed -= set(skip)
+
+        upserts = {}
+        deleted = set()
+        for key in dirty:
+            if key in self:
+                upserts[key] = to_plain(dict.__getitem__(self, key))
+            else:
+                deleted.add(key)
+        fields = {}
+        for key in changed:
+            names = self._fields.pop(key)
+            record = dict.get(self, key)
+            if record is None:
+                deleted.add(key)
+            else:
+                # .get: um campo atribuído None vai como null (in trata None como ausente e o pularia)
+                fields[key] = {name: to_plain(record.get(name)) for name in names}
+        self._dirty -= dirty
+        return upserts, fields, deleted
+
+    def restore(self, keys):
+        """Marca novamente como pendentes ids cujo flush falhou (regravados inteiros)"""
+        for key in keys:
+            self._fields.pop(key, None)
+        self._dirty.update(keys)
+
+
+class StorageExecutor:
+    """Fila de execução das chamadas bloqueantes do armazenamento fora do event loop, com concorrência limitada"""
+
+    def __init__(self, max_workers=2, max_in_flight=64):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='storage-io')
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def run(self, fn, *args, **kwargs):
+        """Executa fn em uma thread de I/O e aguarda o resultado sem bloquear o loop"""
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class WriteBehindFlusher:
+    """Grava em lote (StorageBackend.write_users) apenas os registros alterados de uma DirtyTrackingStore
+
+    A store ocupa uma seção (section, por padrão o nome) do documento de cada usuário:
+    to_document devolve o valor da seção, gravado inteiro, e remover o registro remove só a
+    seção. Com to_fields(key, {campo: valor}, now) -> campos, registros em que só alguns
+    campos foram atribuídos gravam apenas esses campos (<seção>.<campo>).
+    """
+
+    def __init__(self, name, store, get_storage, to_document, io, max_pending=200, to_fields=None, section=None):
+        self.name = name
+        self.store = store
+        self.get_storage = get_storage  # () -> StorageBackend ou None sem armazenamento
+        self.to_document = to_document
+        self.to_fields = to_fields
+        self.section = section or name
+        self.io = io
+        self.max_pending = max_pending
+        self.last_flush = None
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._held = set()    # ids em exclusive(): ficam fora dos lotes
+        self._writing = {}    # id -> Event do lote em andamento que o grava
+
+    def request_flush(self):
+        """Chamado a cada alteração: só dispara o flush se o lote atingiu o limite"""
+        if self.store.pending_count < self.max_pending:
+            return
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            self._task = asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:
+            self.flush_blocking()
+
+    def _prepare(self, only=None, skip=()):
+        if self.to_fields is not None:
+            upserts, fields, deleted = self.store.drain_changes(only, skip)
+        else:
+            (upserts, deleted), fields = self.store.drain(only, skip), {}
+        now = datetime.datetime.utcnow()
+        writes = []
+        for key, record in upserts.items():
+            writes.append((key, {self.section: self.to_document(key, record, now)}, ()))
+        for key, changed in fields.items():
+            values = self.to_fields(key, changed, now)
+            writes.append((key, {f'{self.section}.{name}': value for name, value in values.items()}, ()))
+        for key in deleted:
+            writes.append((key, {}, (self.section,)))
+        return writes, set(upserts) | set(fields) | deleted, now
+
+    def _report(self, writes, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        log.info("💾 %s: %d documentos gravados em lote em %.0fms", self.name, len(writes), elapsed_ms)
+
+    async def flush(self):
+        """Grava todos os ids pendentes em um único lote (fora do loop) e retorna quantos foram gravados"""
+        async with self._lock:  # Um flush por vez: lotes nunca chegam ao banco fora de ordem
+            if self.store.pending_count == 0:
+                return 0
+            storage = self.get_storage()
+            if storage is None:
+                return 0  # Sem armazenamento: mantém pendente para o próximo flush
+
+            writes, keys, now = self._prepare(skip=self._held)
+            if not writes:
+                return 0
+            return await self._write(storage, writes, keys, now)
+
+    @contextlib.asynccontextmanager
+    async def exclusive(self, key):
+        """Grava as alterações pendentes de key e a mantém fora dos lotes até o fim do bloco
+
+        Para operações feitas direto no banco sobre o registro (ex.: a carteira): um lote em
+        andamento que o inclui termina antes delas, e nenhum lote montado com valores
+        anteriores a elas chega ao banco depois. Os demais ids continuam sendo gravados
+        normalmente. Quem chama garante um bloco por vez para cada key.
+        """
+        self._held.add(key)
+        try:
+            while key in self._writing:
+                await self._writing[key].wait()
+            storage = self.get_storage()
+            if storage is not None and self.store.is_dirty(key):
+                writes, keys, now = self._prepare(only=(key,))
+                await self._write(storage, writes, keys, now)
+            yield
+        finally:
+            self._held.discard(key)
+
+    async def _write(self, storage, writes, keys, now):
+        # Chamado logo após _prepare (sem await entre os dois): os ids entram em _writing antes do lote sair
+        done = asyncio.Event()
+        for key in keys:
+            self._writing[key] = done
+        started = time.perf_counter()
+        try:
+            await self.io.run(storage.write_users, writes)
+        except Exception as e:
+            self.store.restore(keys)
+            log.error("❌ Erro no flush de %s: %s", self.name, e)
+            return 0
+        finally:
+            for key in keys:
+                if self._writing.get(key) is done:
+                    del self._writing[key]
+            done.set()
+
+        self.last_flush = now
+        self._report(writes, started)
+        return len(writes)
+
+    def flush_blocking(self):
+        """Versão síncrona do flush, para quando o event loop já foi encerrado"""
+        if self.store.pending_count == 0:
+            return 0
+        storage = self.get_storage()
+        if storage is None:
+            return 0
+
+        writes, keys, now = self._prepare()
+        started = time.perf_counter()
+        try:
+            storage.write_users(writes)
+        except Exception as e:
+            self.store.restore(keys)
+            log.error("❌ Erro no flush de %s: %s", self.name, e)
+            return 0
+
+        self.last_flush = now
+        self._report(writes, started)
+        return len(writes)
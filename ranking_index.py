@@ -0,0 +1,246 @@
+import random
+import time
+
+
+class IndexableSkiplist:
+    """Lista ordenada com inserção, remoção e acesso por posição em O(log n)
+
+    Cada link guarda quantos elementos ele pula, o que permite achar o i-ésimo elemento
+    e a posição de uma chave sem percorrer a lista.
+    """
+
+    MAX_LEVEL = 32
+
+    def __init__(self):
+        self._head = [None, [None] * self.MAX_LEVEL, [1] * self.MAX_LEVEL]  # [chave, próximos, larguras]
+        self._level = 1
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _path(self, key):
+        """Último nó antes de key em cada nível, e a posição de cada um deles"""
+        update = [self._head] * self.MAX_LEVEL
+        positions = [0] * self.MAX_LEVEL
+        node = self._head
+        position = 0
+        for level in range(self._level - 1, -1, -1):
+            while node[1][level] is not None and node[1][level][0] < key:
+                position += node[2][level]
+                node = node[1][level]
+            update[level] = node
+            positions[level] = position
+        return update, positions
+
+    def insert(self, key):
+        update, positions = self._path(key)
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                update[i] = self._head
+                positions[i] = 0
+                self._head[2][i] = self._size + 1
+            self._level = level
+
+        node = [key, [None] * level, [0] * level]
+        position = positions[0] + 1  # posição (1-based) do novo nó
+        for i in range(level):
+            previous = update[i]
+            node[1][i] = previous[1][i]
+            previous[1][i] = node
+            # O link antigo de previous é dividido entre previous->node e node->próximo
+            node[2][i] = previous[2][i] - (position - positions[i]) + 1
+            previous[2][i] = position - positions[i]
+        for i in range(level, self._level):
+            update[i][2][i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        update, _ = self._path(key)
+        node = update[0][1][0]
+        if node is None or node[0] != key:
+            raise KeyError(key)
+        for i in range(self._level):
+            if update[i][1][i] is node:
+                update[i][2][i] += node[2][i] - 1
+                update[i][1][i] = node[1][i]
+            else:
+                update[i][2][i] -= 1
+        while self._level > 1 and self._head[1][self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
+
+    def rank(self, key):
+        """Posição 0-based de key (ou de onde ela entraria)"""
+        _, positions = self._path(key)
+        return positions[0]
+
+    def slice(self, start, stop):
+        """Chaves nas posições [start, stop)"""
+        start = max(0, start)
+        stop = min(self._size, stop)
+        if start >= stop:
+            return []
+        node = self._head
+        remaining = start + 1
+        for level in range(self._level - 1, -1, -1):
+            while node[1][level] is not None and node[2][level] <= remaining:
+                remaining -= node[2][level]
+                node = node[1][level]
+        keys = []
+        while node is not None and len(keys) < stop - start:
+            keys.append(node[0])
+            node = node[1][0]
+        return keys
+
+
+class RankingIndex:
+    """Um ranking ordenado por categoria, atualizado só para os usuários que mudaram
+
+    scorers: {categoria: função(user_id) -> valor, ou None se o usuário fica fora do ranking}.
+    As stores avisam (invalidate) quando um usuário muda; a reordenação acontece na próxima
+    consulta, em O(log n) por usuário alterado.
+    """
+
+    def __init__(self, scorers):
+        self.scorers = scorers
+        self._lists = {category: IndexableSkiplist() for category in scorers}
+        self._keys = {category: {} for category in scorers}  # user_id -> chave atual na lista
+        self._totals = {category: 0 for category in scorers}
+        self._versions = {category: 0 for category in scorers}
+        self._stale = set()
+
+    def invalidate(self, user_id):
+        self._stale.add(user_id)
+
+    def _refresh(self):
+        if not self._stale:
+            return
+        stale, self._stale = self._stale, set()
+        for user_id in stale:
+            for category, scorer in self.scorers.items():
+                keys = self._keys[category]
+                value = scorer(user_id)
+                new_key = (-value, user_id) if value is not None else None
+                old_key = keys.get(user_id)
+                if old_key == new_key:
+                    continue
+                self._versions[category] += 1
+                if old_key is not None:
+                    self._lists[category].remove(old_key)
+                    self._totals[category] += old_key[0]
+                    del keys[user_id]
+                if new_key is not None:
+                    self._lists[category].insert(new_key)
+                    self._totals[category] += value
+                    keys[user_id] = new_key
+
+    def version(self, category):
+        """Número que muda sempre que alguma posição ou valor da categoria muda"""
+        self._refresh()
+        return self._versions[category]
+
+    def count(self, category):
+        self._refresh()
+        return len(self._lists[category])
+
+    def total(self, category):
+        """Soma dos valores da categoria (para a média)"""
+        self._refresh()
+        return self._totals[category]
+
+    def page(self, category, start, stop):
+        """[(user_id, valor)] das posições [start, stop) do ranking"""
+        self._refresh()
+        return [(user_id, -negative) for negative, user_id in self._lists[category].slice(start, stop)]
+
+    def rank(self, category, user_id):
+        """Posição 1-based do usuário no ranking, ou None se ele não participa"""
+        self._refresh()
+        key = self._keys[category].get(user_id)
+        if key is None:
+            return None
+        return self._lists[category].rank(key) + 1
+
+
+class RankingSnapshot:
+    """Foto de um ranking completo, compartilhada por todos que estão vendo a categoria"""
+    __slots__ = ('category', 'version', 'created_at', 'rows', 'total')
+
+    def __init__(self, category, version, rows, total):
+        self.category = category
+        self.version = version
+        self.created_at = time.monotonic()
+        self.rows = rows
+        self.total = total
+
+    @property
+    def count(self):
+        return len(self.rows)
+
+    def total_pages(self, per_page):
+        return (len(self.rows) + per_page - 1) // per_page
+
+    def page(self, page, per_page):
+        start = (page - 1) * per_page
+        return self.rows[start:start + per_page]
+
+
+class RankingSnapshotCache:
+    """Snapshots por categoria (com TTL e versão) e páginas já renderizadas de cada snapshot
+
+    make_row(user_id, valor) monta a linha guardada no snapshot. Um snapshot vale enquanto
+    a versão da categoria no índice não mudar e ele não passar de ttl segundos.
+    """
+
+    def __init__(self, index, make_row, ttl=30.0):
+        self.index = index
+        self.make_row = make_row
+        self.ttl = ttl
+        self._snapshots = {}
+        self._pages = {}  # (categoria, página, versão) -> página renderizada
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, category):
+        version = self.index.version(category)
+        snapshot = self._snapshots.get(category)
+        if snapshot is not None and snapshot.version == version and time.monotonic() - snapshot.created_at < self.ttl:
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        rows = [self.make_row(user_id, value) for user_id, value in self.index.page(category, 0, self.index.count(category))]
+        snapshot = RankingSnapshot(category, version, rows, self.index.total(category))
+        self._snapshots[category] = snapshot
+        # Páginas de snapshots antigos dessa categoria não servem mais
+        self._pages = {key: page for key, page in self._pages.items() if key[0] != category}
+        return snapshot
+
+    def resume(self, snapshot):
+        """O snapshot que a paginação já está mostrando, enquanto não passar do TTL
+
+        Quem navega entre páginas continua vendo a mesma foto mesmo que o ranking mude
+        no meio; depois do TTL a paginação passa para o snapshot atual da categoria.
+        """
+        if time.monotonic() - snapshot.created_at < self.ttl:
+            self.hits += 1
+            return snapshot
+        return self.get(snapshot.category)
+
+    def render_page(self, snapshot, page, render):
+        """Devolve render(snapshot, page), memorizado por (categoria, página, versão)"""
+        key = (snapshot.category, page, snapshot.version)
+        rendered = self._pages.get(key)
+        if rendered is None or self._snapshots.get(snapshot.category) is not snapshot:
+            rendered = render(snapshot, page)
+            if self._snapshots.get(snapshot.category) is snapshot:
+                self._pages[key] = rendered
+        return rendered
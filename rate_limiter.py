@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    tokens: float
+    updated: float
+
+
+class CooldownEngine:
+    """Token buckets por escopo (ex.: usuário, canal) para limitar eventos que geram recompensa
+
+    budgets: {escopo: (capacidade, fichas por segundo)}. allow(user=..., channel=...) só deixa
+    passar se todos os buckets envolvidos têm uma ficha, e só então consome uma de cada (um
+    evento barrado pelo usuário não gasta o orçamento do canal). Buckets parados há mais tempo
+    saem acima de max_keys por escopo (voltar cheio equivale a não ter sido usado).
+    """
+
+    def __init__(self, budgets, max_keys=10000):
+        self.budgets = budgets
+        self.max_keys = max_keys
+        self._buckets = {scope: OrderedDict() for scope in budgets}
+        self.allowed = 0
+        self.shed = 0
+        self.shed_by_scope = dict.fromkeys(budgets, 0)
+
+    def _bucket(self, scope, key, now):
+        capacity, rate = self.budgets[scope]
+        buckets = self._buckets[scope]
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(capacity, now)
+            if len(buckets) > self.max_keys:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+            bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+        return bucket
+
+    def allow(self, **keys):
+        """True se o evento cabe no orçamento de todos os escopos (e consome uma ficha de cada)"""
+        now = time.monotonic()
+        buckets = []
+        for scope, key in keys.items():
+            bucket = self._bucket(scope, key, now)
+            if bucket.tokens < 1:
+                self.shed += 1
+                self.shed_by_scope[scope] += 1
+                return False
+            buckets.append(bucket)
+        for bucket in buckets:
+            bucket.tokens -= 1
+        self.allowed += 1
+        return True
+
+    def stats(self):
+        return {
+            'allowed': self.allowed,
+            'shed': self.shed,
+            'shed_by_scope': dict(self.shed_by_scope),
+            'tracked_keys': sum(len(buckets) for buckets in self._buckets.values()),
+        }
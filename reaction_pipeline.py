@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+
+import discord
+
+log = logging.getLogger('mxp.reactions')
+
+
+class ReactionPipeline:
+    """Fila limitada de reações a adicionar + aplicação periódica das curtidas acumuladas
+
+    Os handlers do gateway só enfileiram e retornam. Workers adicionam os emojis respeitando
+    o rate limit do Discord, e a cada janela curta flush_likes() aplica as curtidas em lote.
+    """
+
+    def __init__(self, flush_likes, max_queue=500, workers=2, like_window=1.0):
+        self.flush_likes = flush_likes  # corrotina sem argumentos chamada a cada like_window
+        self.workers = workers
+        self.like_window = like_window
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._tasks = []
+
+        # Contadores expostos em stats()
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self):
+        """Inicia os workers (chamado no on_ready; pode ser chamado de novo em reconexões)"""
+        self._tasks = [t for t in self._tasks if not t.done()]
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        for _ in range(self.workers):
+            self._tasks.append(loop.create_task(self._reaction_worker()))
+        self._tasks.append(loop.create_task(self._like_flusher()))
+
+    async def stop(self):
+        """Encerra os workers e retorna quantas mensagens ficaram sem emojis (desligamento)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        dropped = self._queue.qsize()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        return dropped
+
+    def enqueue_reactions(self, message, emojis):
+        """Agenda a adição dos emojis na mensagem; retorna False se a fila estiver cheia"""
+        try:
+            self._queue.put_nowait((time.monotonic(), message, tuple(emojis)))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _reaction_worker(self):
+        while True:
+            queued_at, message, emojis = await self._queue.get()
+            try:
+                self.last_lag = time.monotonic() - queued_at
+                self.max_lag = max(self.max_lag, self.last_lag)
+                for emoji in emojis:
+                    await self._add_reaction(message, emoji)
+                self.processed += 1
+            except discord.HTTPException as e:
+                # Sem acesso ao emoji (não está no servidor) ou sem permissão para reagir
+                self.failed += 1
+                log.warning("Erro ao adicionar emoji: %s", e)
+            except Exception as e:
+                self.failed += 1
+                log.exception("Erro inesperado ao reagir: %s", e)
+            finally:
+                self._queue.task_done()
+
+    async def _add_reaction(self, message, emoji):
+        try:
+            await message.add_reaction(emoji)
+        except discord.HTTPException as e:
+            if e.status != 429:
+                raise
+            # Rate limit que escapou do discord.py: espera e tenta uma vez mais
+            self.rate_limited += 1
+            await asyncio.sleep(getattr(e, 'retry_after', None) or 1.0)
+            await message.add_reaction(emoji)
+
+    async def _like_flusher(self):
+        while True:
+            await asyncio.sleep(self.like_window)
+            try:
+                await self.flush_likes()
+            except Exception as e:
+                log.exception("❌ Erro ao aplicar lote de curtidas: %s", e)
+
+    def stats(self):
+        return {
+            'queue_depth': self._queue.qsize(),
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'rate_limited': self.rate_limited,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag,
+        }
@@ -0,0 +1,72 @@
+import heapq
+
+
+class FollowRecommender:
+    """Sugestões de quem seguir: amigos de amigos primeiro, depois os perfis mais populares
+
+    popularity(start, stop) devolve [(user_id, seguidores)] do ranking de popularidade já
+    ordenado (mantido incrementalmente pelo RankingIndex). As pontuações de amigos de amigos
+    são calculadas sob demanda e guardadas por usuário até o grafo mudar em volta dele.
+    """
+
+    def __init__(self, graph, popularity, fof_limit=50, page_size=25):
+        self.graph = graph
+        self.popularity = popularity
+        self.fof_limit = fof_limit
+        self.page_size = page_size
+        self._fof = {}  # user_id -> [(candidato, amigos em comum)]
+        graph.subscribe(self.invalidate)
+
+    def invalidate(self, user_id):
+        """Quem user_id segue mudou: afeta as sugestões dele e de quem o segue"""
+        self._fof.pop(user_id, None)
+        for follower_id in self.graph.followers(user_id):
+            self._fof.pop(follower_id, None)
+
+    def friends_of_friends(self, user_id):
+        """[(candidato, amigos em comum)] para quem o usuário ainda não segue, do maior para o menor"""
+        cached = self._fof.get(user_id)
+        if cached is not None:
+            return cached
+
+        following = self.graph.following(user_id)
+        scores = {}
+        for friend_id in following:
+            for candidate_id in self.graph.following(friend_id):
+                if candidate_id != user_id and candidate_id not in following:
+                    scores[candidate_id] = scores.get(candidate_id, 0) + 1
+
+        ranked = heapq.nlargest(self.fof_limit, scores.items(), key=lambda item: item[1])
+        self._fof[user_id] = ranked
+        return ranked
+
+    def suggest(self, user_id, k, accept=None):
+        """Até k sugestões [(user_id, amigos em comum)]; accept(user_id) filtra candidatos"""
+        following = self.graph.following(user_id)
+        chosen = []
+        seen = {user_id}
+
+        def take(candidate_id, common):
+            if candidate_id in seen or candidate_id in following:
+                return
+            seen.add(candidate_id)
+            if accept is None or accept(candidate_id):
+                chosen.append((candidate_id, common))
+
+        for candidate_id, common in self.friends_of_friends(user_id):
+            if len(chosen) >= k:
+                return chosen
+            take(candidate_id, common)
+
+        # Completa com os mais populares, andando pelo ranking em páginas
+        start = 0
+        while len(chosen) < k:
+            page = self.popularity(start, start + self.page_size)
+            if not page:
+                break
+            for candidate_id, _ in page:
+                if len(chosen) >= k:
+                    break
+                take(candidate_id, 0)
+            start += self.page_size
+        return chosen
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+
+from persistence import TrackedRecord
+
+DEFAULT_PROFILE_COLOR = 0x9932CC  # Roxo
+
+# Registros tipados das seções profile, economy, inventory e brand_posts. Com slots, cada
+# registro guarda só os valores (sem o dict de chaves repetido em todo usuário do working set),
+# e o valor padrão de cada campo fica num lugar só em vez de copiado em cada comando. Dicts
+# que quase ninguém usa (extra, social_links) ficam None até o primeiro uso.
+
+
+@dataclass(slots=True)
+class UserProfile(TrackedRecord):
+    """Seção profile: perfil do usuário"""
+    username: str = None
+    total_likes: int = 0
+    posts_count: int = 0
+    followers: int = 0
+    profession: str = None
+    thumbnail_url: str = None
+    embed_image_url: str = None
+    profile_color: int = DEFAULT_PROFILE_COLOR
+    bio: str = None
+    status: str = None
+    profile_theme: str = None
+    profile_badge: str = None
+    social_links: dict = None       # {instagram, youtube, tiktok}, criado ao salvar o primeiro link
+    discord_id: str = None
+    daily_claimed_day: int = None   # Dia (contado da época) do último m!daily
+    ledger_seq: int = 0             # Último evento do livro de saldos refletido no registro
+    extra: dict = None
+
+
+@dataclass(slots=True)
+class Wallet(TrackedRecord):
+    """Seção economy: dinheiro em reais e pontos de fama ganhos com publicidade"""
+    money: int = 0
+    fame: int = 0
+    purchase_ids: list = field(default_factory=list)  # Últimas compras aplicadas (idempotência)
+    ledger_seq: int = 0                               # Último evento do livro de saldos refletido no registro
+    extra: dict = None
+
+
+@dataclass(slots=True)
+class Inventory(TrackedRecord):
+    """Seção inventory: quantidade de cada item da lojinha (por id), por categoria
+
+    counts e net_worth são mantidos a cada compra, então mostrar o inventário não percorre os itens.
+    """
+    carros: dict = field(default_factory=dict)         # {item_id: quantidade}
+    mansoes: dict = field(default_factory=dict)
+    itens_diarios: dict = field(default_factory=dict)
+    counts: dict = field(default_factory=dict)         # {categoria: total de itens}
+    net_worth: int = 0                                 # Soma do que foi pago por todos os itens
+    extra: dict = None
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def count(self, category):
+        return self.counts.get(category, 0)
+
+    def add(self, category, item_id, price, quantity=1):
+        owned = self[category]
+        owned[item_id] = owned.get(item_id, 0) + quantity
+        self.counts[category] = self.counts.get(category, 0) + quantity
+        self.net_worth += price * quantity
+
+
+@dataclass(slots=True)
+class BrandPosts(TrackedRecord):
+    """Seção brand_posts: totais de patrocínio e só os últimos posts (os antigos vão para o arquivo)"""
+    posts: int = 0
+    money: int = 0
+    fame: int = 0
+    recent: list = field(default_factory=list)  # [{message_id, brands, timestamp, money_gained, fame_gained, is_premium}]
+    extra: dict = None
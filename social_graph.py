@@ -0,0 +1,240 @@
+import heapq
+
+
+class FollowGraph:
+    """Grafo de quem segue quem, com adjacência nos dois sentidos
+
+    Cada lado é um dict usado como conjunto ordenado (user_id -> None): pertinência e
+    "segue de volta" em O(1), graus em O(1) e a ordem de quando cada um seguiu preservada
+    para as listas. Tem a mesma interface de persistência da DirtyTrackingStore (drain,
+    restore, load, subscribe) e grava no formato antigo da coleção follow_data:
+    {"following": [...], "followers": [...]}.
+    """
+
+    def __init__(self):
+        self._following = {}  # user_id -> {seguido: None}
+        self._followers = {}  # user_id -> {seguidor: None}
+        self._dirty = set()
+        self._listeners = []
+        self.version = 0  # muda a cada alteração de aresta (invalida os caches derivados)
+        self._mutual_pairs = None
+        self._mutual_version = -1
+
+    # --- Consultas ---
+
+    def __contains__(self, user_id):
+        return user_id in self._following
+
+    def __len__(self):
+        """Usuários com registro de relacionamentos"""
+        return len(self._following)
+
+    def __iter__(self):
+        return iter(self._following)
+
+    def is_following(self, follower_id, followed_id):
+        return followed_id in self._following.get(follower_id, ())
+
+    def is_mutual(self, user1_id, user2_id):
+        return self.is_following(user1_id, user2_id) and self.is_following(user2_id, user1_id)
+
+    def following(self, user_id):
+        """Quem o usuário segue, na ordem em que seguiu (somente leitura)"""
+        return self._following.get(user_id, {}).keys()
+
+    def followers(self, user_id):
+        """Quem segue o usuário, na ordem em que seguiu (somente leitura)"""
+        return self._followers.get(user_id, {}).keys()
+
+    def following_count(self, user_id):
+        return len(self._following.get(user_id, ()))
+
+    def followers_count(self, user_id):
+        return len(self._followers.get(user_id, ()))
+
+    def edge_count(self):
+        return sum(len(following) for following in self._following.values())
+
+    def mutual_pairs(self):
+        """Todos os pares que se seguem mutuamente, cada par uma única vez, em O(E)
+
+        O resultado fica guardado até o grafo mudar.
+        """
+        if self._mutual_version != self.version:
+            pairs = []
+            for user_id, following in self._following.items():
+                followers = self._followers[user_id]
+                for friend_id in following:
+                    # user_id < friend_id: o par só é contado a partir de uma das pontas
+                    if user_id < friend_id and friend_id in followers:
+                        pairs.append((user_id, friend_id))
+            self._mutual_pairs = pairs
+            self._mutual_version = self.version
+        return self._mutual_pairs
+
+    def top_mutual_pairs(self, k, strength, accept=None):
+        """Os k pares mútuos mais fortes, com heap em vez de ordenar todos
+
+        strength(a, b) dá a força do par; accept(user_id) pode excluir usuários.
+        Retorna [(a, b, força)] da mais forte para a mais fraca.
+        """
+        accepted = {}
+
+        def is_accepted(user_id):
+            if accept is None:
+                return True
+            if user_id not in accepted:
+                accepted[user_id] = accept(user_id)
+            return accepted[user_id]
+
+        candidates = (
+            (a, b, strength(a, b))
+            for a, b in self.mutual_pairs()
+            if is_accepted(a) and is_accepted(b)
+        )
+        return heapq.nlargest(k, candidates, key=lambda pair: pair[2])
+
+    # --- Alterações ---
+
+    def ensure(self, user_id):
+        """Cria o registro (vazio) do usuário se ainda não existir"""
+        if user_id not in self._following:
+            self._following[user_id] = {}
+            self._followers[user_id] = {}
+            self.mark_dirty(user_id)
+
+    def follow(self, follower_id, followed_id):
+        """Cria a aresta follower -> followed; retorna False se ela já existia"""
+        self.ensure(follower_id)
+        self.ensure(followed_id)
+        if followed_id in self._following[follower_id]:
+            return False
+        self._following[follower_id][followed_id] = None
+        self._followers[followed_id][follower_id] = None
+        self.mark_dirty(follower_id)
+        self.mark_dirty(followed_id)
+        return True
+
+    def unfollow(self, follower_id, followed_id):
+        """Remove a aresta follower -> followed; retorna False se ela não existia"""
+        if followed_id not in self._following.get(follower_id, ()):
+            return False
+        del self._following[follower_id][followed_id]
+        self._followers.get(followed_id, {}).pop(follower_id, None)
+        self.mark_dirty(follower_id)
+        self.mark_dirty(followed_id)
+        return True
+
+    def remove_user(self, user_id):
+        """Apaga o usuário e todas as arestas dele, nos dois sentidos"""
+        if user_id not in self._following:
+            return False
+        for followed_id in self._following.pop(user_id):
+            followers = self._followers.get(followed_id)
+            if followers is not None and user_id in followers:
+                del followers[user_id]
+                self.mark_dirty(followed_id)
+        for follower_id in self._followers.pop(user_id):
+            following = self._following.get(follower_id)
+            if following is not None and user_id in following:
+                del following[user_id]
+                self.mark_dirty(follower_id)
+        self.mark_dirty(user_id)
+        return True
+
+    def clear(self):
+        keys = list(self._following)
+        self._following.clear()
+        self._followers.clear()
+        for key in keys:
+            self.mark_dirty(key)
+
+    # --- Persistência (mesma interface da DirtyTrackingStore) ---
+
+    def subscribe(self, listener):
+        """Registra listener(user_id), chamado sempre que as arestas de um usuário mudam"""
+        self._listeners.append(listener)
+
+    def mark_dirty(self, user_id):
+        self._dirty.add(user_id)
+        self.version += 1
+        for listener in self._listeners:
+            listener(user_id)
+
+    @property
+    def pending_count(self):
+        return len(self._dirty)
+
+    def to_record(self, user_id):
+        """Registro no formato da coleção follow_data"""
+        return {
+            "following": list(self._following[user_id]),
+            "followers": list(self._followers[user_id])
+        }
+
+    def drain(self):
+        """Retorna (registros alterados, ids removidos) e zera o rastreamento"""
+        upserts = {}
+        deleted = set()
+        for user_id in self._dirty:
+            if user_id in self._following:
+                upserts[user_id] = self.to_record(user_id)
+            else:
+                deleted.add(user_id)
+        self._dirty = set()
+        return upserts, deleted
+
+    def restore(self, keys):
+        """Marca novamente como pendentes ids cujo flush falhou"""
+        self._dirty.update(keys)
+
+    def load(self, records):
+        """Monta o grafo a partir dos documentos {"following": [...], "followers": [...]}
+
+        Uma aresta existe se aparece em qualquer um dos dois lados (dados antigos podem estar
+        inconsistentes). Usuários com alterações ainda não gravadas mantêm as arestas locais.
+        """
+        pending = {
+            user_id: (list(self._following[user_id]), list(self._followers[user_id]))
+            for user_id in self._dirty if user_id in self._following
+        }
+        previous_keys = set(self._following)
+
+        self._following = {user_id: {} for user_id in records}
+        self._followers = {user_id: {} for user_id in records}
+        for user_id, record in records.items():
+            for followed_id in record.get("following", []):
+                self._add_edge(user_id, followed_id)
+            for follower_id in record.get("followers", []):
+                self._add_edge(follower_id, user_id)
+
+        for user_id in self._dirty:
+            self._drop_edges(user_id)
+            if user_id in pending:
+                following, followers = pending[user_id]
+                for followed_id in following:
+                    self._add_edge(user_id, followed_id)
+                for follower_id in followers:
+                    self._add_edge(follower_id, user_id)
+            else:
+                self._following.pop(user_id, None)  # Remoção ainda não gravada
+                self._followers.pop(user_id, None)
+
+        self.version += 1
+        for user_id in previous_keys | set(self._following):
+            for listener in self._listeners:
+                listener(user_id)
+
+    def _add_edge(self, follower_id, followed_id):
+        self._following.setdefault(follower_id, {})[followed_id] = None
+        self._followers.setdefault(follower_id, {})
+        self._followers.setdefault(followed_id, {})[follower_id] = None
+        self._following.setdefault(followed_id, {})
+
+    def _drop_edges(self, user_id):
+        for followed_id in self._following.get(user_id, ()):
+            self._followers.get(followed_id, {}).pop(user_id, None)
+        for follower_id in self._followers.get(user_id, ()):
+            self._following.get(follower_id, {}).pop(user_id, None)
+        self._following[user_id] = {}
+        self._followers[user_id] = {}
@@ -0,0 +1,126 @@
+import datetime
+import logging
+import time
+from collections import OrderedDict
+
+log = logging.getLogger('mxp.db')
+
+
+class RecentMessageIds:
+    """Ids de mensagens vistos nos últimos ttl segundos (dedup com memória limitada)
+
+    Guarda id -> instante em que expira, em ordem de chegada: os vencidos saem pela frente a
+    cada verificação, e acima de max_entries os mais antigos saem mesmo sem vencer.
+    """
+
+    def __init__(self, ttl=6 * 3600, max_entries=50000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._expires = OrderedDict()
+
+    def __len__(self):
+        return len(self._expires)
+
+    def _expire(self, now):
+        while self._expires:
+            message_id, expires = next(iter(self._expires.items()))
+            if expires > now and len(self._expires) <= self.max_entries:
+                break
+            self._expires.popitem(last=False)
+
+    def __contains__(self, message_id):
+        expires = self._expires.get(message_id)
+        return expires is not None and expires > time.monotonic()
+
+    def add(self, message_id):
+        """Registra o id; retorna False se ele já tinha sido visto dentro da janela"""
+        now = time.monotonic()
+        self._expire(now)
+        if message_id in self._expires:
+            return False
+        self._expires[message_id] = now + self.ttl
+        return True
+
+    def discard(self, message_id):
+        """Esquece o id antes de ele vencer (não faz nada se ele não está registrado)"""
+        self._expires.pop(message_id, None)
+
+
+class SponsorshipLedger:
+    """Patrocínios por usuário: totais acumulados + só os últimos keep posts
+
+    store: DirtyTrackingStore de BrandPosts (seção brand_posts). Cada post recompensado soma
+    nos totais em O(1) e entra em recent; o que passa de keep vai para um buffer gravado com
+    StorageBackend.archive_posts (só inserção, nunca reescrita) por flush_archive().
+    """
+
+    def __init__(self, store, get_storage, io, keep=10, dedup_ttl=6 * 3600):
+        self.store = store
+        self.get_storage = get_storage  # () -> StorageBackend ou None sem banco
+        self.io = io
+        self.keep = keep
+        self.seen = RecentMessageIds(ttl=dedup_ttl)
+        self._archive = []
+        self.archived = 0
+
+    @property
+    def pending_archive(self):
+        return len(self._archive)
+
+    def is_new(self, user_id, message_id):
+        """True se o post ainda não foi recompensado (e o marca como visto)"""
+        if not self.seen.add(message_id):
+            return False
+        record = self.store.get(user_id)
+        return record is None or all(post['message_id'] != message_id for post in record.recent)
+
+    def record(self, user_id, message_id, brands, money, fame, is_premium):
+        """Soma o post nos totais do usuário e guarda-o entre os recentes"""
+        if user_id not in self.store:
+            self.store[user_id] = {}
+        record = self.store[user_id]
+        record.posts += 1
+        record.money += money
+        record.fame += fame
+        record.recent.append({
+            'message_id': message_id,
+            'brands': brands,
+            'timestamp': datetime.datetime.now().isoformat(),
+            'money_gained': money,
+            'fame_gained': fame,
+            'is_premium': is_premium
+        })
+        overflow = len(record.recent) - self.keep
+        if overflow > 0:
+            for post in record.recent[:overflow]:
+                # _id = id da mensagem: reenviar um lote depois de uma falha não duplica posts
+                self._archive.append(dict(post, _id=post['message_id'], user_id=user_id))
+            del record.recent[:overflow]
+
+    async def flush_archive(self):
+        """Insere no arquivo os posts que saíram dos recentes; retorna quantos foram gravados"""
+        if not self._archive:
+            return 0
+        storage = self.get_storage()
+        if storage is None:
+            return 0
+        batch, self._archive = self._archive, []
+        now = datetime.datetime.utcnow()
+        for post in batch:
+            post['archived_at'] = now
+        try:
+            # Posts já arquivados numa tentativa anterior (mesmo _id) não contam como falha
+            failed = await self.io.run(storage.archive_posts, batch)
+        except Exception as e:
+            self._archive = batch + self._archive
+            log.error("❌ Erro ao arquivar posts com marcas: %s", e)
+            return 0
+        if failed:
+            self._archive = failed + self._archive
+            log.error("❌ %d posts com marcas não puderam ser arquivados", len(failed))
+        self.archived += len(batch) - len(failed)
+        return len(batch) - len(failed)
+
+    def clear(self):
+        self._archive.clear()
+        self.seen = RecentMessageIds(ttl=self.seen.ttl, max_entries=self.seen.max_entries)
@@ -0,0 +1,239 @@
+import datetime
+import json
+import sqlite3
+import threading
+import time
+
+from storage import StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_sections (
+    user_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, section)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS user_sections_section ON user_sections (section);
+CREATE TABLE IF NOT EXISTS brand_posts_archive (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    post TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS balance_events (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    delta INTEGER NOT NULL,
+    reason TEXT,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS balance_events_user_seq ON balance_events (user_id, seq);
+CREATE INDEX IF NOT EXISTS balance_events_seq ON balance_events (seq);
+"""
+
+# SQL fixo (só com parâmetros): o sqlite3 reaproveita o statement preparado a cada chamada
+UPSERT_SECTION = (
+    "INSERT INTO user_sections (user_id, section, value, updated_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (user_id, section) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at"
+)
+UPSERT_FIELD = (
+    "INSERT INTO user_sections (user_id, section, value, updated_at) VALUES (?, ?, json_object(?, json(?)), ?) "
+    "ON CONFLICT (user_id, section) DO UPDATE SET value = json_set(value, ?, json(?)), updated_at = excluded.updated_at"
+)
+DELETE_SECTION = "DELETE FROM user_sections WHERE user_id = ? AND section = ?"
+SELECT_SECTION = "SELECT value FROM user_sections WHERE user_id = ? AND section = ?"
+INSERT_POST = "INSERT OR IGNORE INTO brand_posts_archive (id, user_id, post) VALUES (?, ?, ?)"
+INSERT_EVENT = "INSERT OR IGNORE INTO balance_events (id, user_id, kind, delta, reason, seq) VALUES (?, ?, ?, ?, ?, ?)"
+
+IN_CHUNK = 500  # Ids por consulta com IN (...)
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'),
+                      default=lambda v: v.isoformat() if isinstance(v, (datetime.date, datetime.datetime)) else str(v))
+
+
+def _placeholders(count):
+    return ', '.join('?' * count)
+
+
+class SQLiteBackend(StorageBackend):
+    """Armazenamento local em um arquivo SQLite (modo WAL), sem serviço externo
+
+    Cada seção do documento do usuário é uma linha (user_id, seção, JSON); gravar um campo é
+    um json_set só nele. Cada lote do write-behind é uma única transação com executemany, e as
+    operações da carteira leem e gravam dentro de uma transação BEGIN IMMEDIATE. Uma conexão só,
+    protegida por um lock, atende as threads da fila de I/O.
+    """
+
+    name = 'SQLite'
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=64)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # Com WAL: durável a cada checkpoint, sem fsync por transação
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self, body, *args):
+        # isolation_level=None: as transações são abertas aqui, explicitamente
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = body(*args)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # Documentos de usuário
+
+    def write_users(self, writes):
+        now = time.time()
+        sections, fields, removed = [], [], []
+        for user_id, values, unset in writes:
+            for path, value in values.items():
+                section, _, name = path.partition('.')
+                encoded = _encode(value)
+                if name:
+                    json_path = '$.' + json.dumps(name)
+                    fields.append((user_id, section, name, encoded, now, json_path, encoded))
+                else:
+                    sections.append((user_id, section, encoded, now))
+            removed.extend((user_id, section) for section in unset)
+
+        def write():
+            self._conn.executemany(UPSERT_SECTION, sections)
+            self._conn.executemany(UPSERT_FIELD, fields)
+            self._conn.executemany(DELETE_SECTION, removed)
+        self._transaction(write)
+        return len(writes)
+
+    def fetch_section(self, section):
+        rows = self._query("SELECT user_id, value FROM user_sections WHERE section = ?", (section,))
+        return {user_id: json.loads(value) for user_id, value in rows}
+
+    def fetch_users(self, user_ids, sections):
+        user_ids, sections = list(user_ids), list(sections)
+        users = {}
+        for start in range(0, len(user_ids), IN_CHUNK):
+            chunk = user_ids[start:start + IN_CHUNK]
+            rows = self._query(
+                f"SELECT user_id, section, value FROM user_sections "
+                f"WHERE user_id IN ({_placeholders(len(chunk))}) AND section IN ({_placeholders(len(sections))})",
+                chunk + sections
+            )
+            for user_id, section, value in rows:
+                users.setdefault(user_id, {})[section] = json.loads(value)
+        return users
+
+    def fetch_summaries(self, fields):
+        documents = {}
+        for section, names in fields.items():
+            for user_id, value in self._query("SELECT user_id, value FROM user_sections WHERE section = ?", (section,)):
+                value = json.loads(value)
+                if isinstance(value, dict):
+                    documents.setdefault(user_id, {'_id': user_id})[section] = {name: value[name] for name in names if name in value}
+        return list(documents.values())
+
+    def count_users(self, section):
+        return self._query("SELECT COUNT(*) FROM user_sections WHERE section = ?", (section,))[0][0]
+
+    def delete_users(self):
+        self._transaction(self._conn.execute, "DELETE FROM user_sections")
+
+    # Carteira
+
+    def _section(self, user_id, section):
+        row = self._conn.execute(SELECT_SECTION, (user_id, section)).fetchone()
+        return json.loads(row[0]) if row is not None else {}
+
+    def _put(self, user_id, section, value):
+        self._conn.execute(UPSERT_SECTION, (user_id, section, _encode(value), time.time()))
+
+    def purchase(self, user_id, purchase_id, item, seq, keep):
+        def apply():
+            economy = self._section(user_id, 'economy')
+            purchase_ids = economy.get('purchase_ids', [])
+            if economy.get('money', 0) < item.preco or purchase_id in purchase_ids:
+                return False
+            economy['money'] -= item.preco
+            economy['purchase_ids'] = (purchase_ids + [purchase_id])[-keep:]
+            economy['ledger_seq'] = max(economy.get('ledger_seq', 0), seq)
+
+            inventory = self._section(user_id, 'inventory')
+            owned = inventory.setdefault(item.tipo, {})
+            owned[item.id] = owned.get(item.id, 0) + 1
+            counts = inventory.setdefault('counts', {})
+            counts[item.tipo] = counts.get(item.tipo, 0) + 1
+            inventory['net_worth'] = inventory.get('net_worth', 0) + item.preco
+
+            self._put(user_id, 'economy', economy)
+            self._put(user_id, 'inventory', inventory)
+            return True
+        return self._transaction(apply)
+
+    def purchase_state(self, user_id):
+        with self._lock:
+            economy = self._section(user_id, 'economy')
+        return economy.get('money', 0), economy.get('purchase_ids', [])
+
+    def adjust_money(self, user_id, amount, seq):
+        def apply():
+            economy = self._section(user_id, 'economy')
+            money = economy.get('money', 0)
+            economy['money'] = max(0, money + amount)
+            economy['ledger_seq'] = max(economy.get('ledger_seq', 0), seq)
+            self._put(user_id, 'economy', economy)
+            return money
+        return self._transaction(apply)
+
+    # Arquivo de posts com marcas
+
+    def archive_posts(self, posts):
+        rows = [(post['_id'], post['user_id'], _encode({k: v for k, v in post.items() if k != '_id'})) for post in posts]
+        self._transaction(self._conn.executemany, INSERT_POST, rows)
+        return []
+
+    def delete_archive(self):
+        self._transaction(self._conn.execute, "DELETE FROM brand_posts_archive")
+
+    # Livro de saldos
+
+    def append_events(self, events):
+        rows = [(e['_id'], e['user_id'], e['kind'], e['delta'], e['reason'], e['seq']) for e in events]
+        self._transaction(self._conn.executemany, INSERT_EVENT, rows)
+        return []
+
+    def events_since(self, user_ids, since):
+        user_ids = list(user_ids)
+        events = []
+        for start in range(0, len(user_ids), IN_CHUNK):
+            chunk = user_ids[start:start + IN_CHUNK]
+            rows = self._query(
+                f"SELECT user_id, kind, delta, reason, seq FROM balance_events "
+                f"WHERE user_id IN ({_placeholders(len(chunk))}) AND seq > ?",
+                chunk + [since]
+            )
+            events.extend({'user_id': u, 'kind': k, 'delta': d, 'reason': r, 'seq': s} for u, k, d, r, s in rows)
+        events.sort(key=lambda event: event['seq'])
+        return events
+
+    def drop_events_before(self, seq):
+        removed = self._transaction(lambda: self._conn.execute("DELETE FROM balance_events WHERE seq < ?", (seq,)).rowcount)
+        return [f'{removed} eventos'] if removed else []
+
+    def delete_events(self):
+        self._transaction(self._conn.execute, "DELETE FROM balance_events")
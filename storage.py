@@ -0,0 +1,99 @@
+import datetime
+
+# Gravação de um usuário em write_users(): (user_id, {caminho: valor}, (seções a remover)).
+# O caminho é uma seção inteira ("profile") ou um campo de primeiro nível dela ("profile.followers").
+
+
+class StorageBackend:
+    """Armazenamento dos dados do bot, implementado sobre MongoDB (MongoBackend) ou SQLite (SQLiteBackend)
+
+    Guarda o documento de cada usuário dividido em seções (profile, economy, inventory,
+    brand_posts, follow, used_reset), o arquivo de posts com marcas e os eventos do livro de
+    saldos. Todos os métodos são bloqueantes e rodam na fila de I/O (StorageExecutor.run).
+    Posts arquivados e eventos trazem um _id único: regravar o mesmo lote não duplica nada.
+    """
+
+    name = None  # Nome mostrado nos comandos de status
+
+    def migrate(self, brand_posts_keep):
+        """Converte dados em formatos antigos; retorna {migração: resultado} do que foi feito"""
+        return {}
+
+    def close(self):
+        pass
+
+    # Documentos de usuário
+
+    def write_users(self, writes):
+        """Aplica as gravações [(user_id, {caminho: valor}, seções a remover)] em um único lote
+
+        Gravar um campo de um usuário (ou seção) que ainda não existe cria a seção só com ele.
+        """
+        raise NotImplementedError
+
+    def fetch_section(self, section):
+        """{user_id: valor da seção} de todos os usuários que têm a seção"""
+        raise NotImplementedError
+
+    def fetch_users(self, user_ids, sections):
+        """{user_id: {seção: valor}} dos usuários pedidos, só com as seções indicadas"""
+        raise NotImplementedError
+
+    def fetch_summaries(self, fields):
+        """[{_id, seção: {campo: valor}}] de todos os usuários, só com os campos {seção: (campos...)}"""
+        raise NotImplementedError
+
+    def count_users(self, section):
+        """Quantos usuários têm a seção"""
+        raise NotImplementedError
+
+    def delete_users(self):
+        raise NotImplementedError
+
+    # Carteira: operações condicionais aplicadas de forma atômica no armazenamento
+
+    def purchase(self, user_id, purchase_id, item, seq, keep):
+        """Debita item.preco e soma o item no inventário, só se o saldo cobre e purchase_id é novo
+
+        Guarda purchase_id entre os últimos keep e seq em economy.ledger_seq. Retorna True se aplicou.
+        """
+        raise NotImplementedError
+
+    def purchase_state(self, user_id):
+        """(saldo, purchase_ids) gravados do usuário"""
+        raise NotImplementedError
+
+    def adjust_money(self, user_id, amount, seq):
+        """Soma amount ao saldo sem deixá-lo abaixo de zero; retorna o saldo anterior"""
+        raise NotImplementedError
+
+    # Arquivo de posts com marcas (só inserção)
+
+    def archive_posts(self, posts):
+        """Insere os posts ignorando os já arquivados; retorna os que falharam"""
+        raise NotImplementedError
+
+    def delete_archive(self):
+        raise NotImplementedError
+
+    # Livro de saldos (só inserção)
+
+    def append_events(self, events):
+        """Insere os eventos ignorando os já gravados; retorna os que falharam"""
+        raise NotImplementedError
+
+    def events_since(self, user_ids, since):
+        """Eventos dos usuários com seq maior que since, em ordem de seq"""
+        raise NotImplementedError
+
+    def drop_events_before(self, seq):
+        """Descarta eventos anteriores a seq; retorna a descrição do que foi descartado"""
+        raise NotImplementedError
+
+    def delete_events(self):
+        raise NotImplementedError
+
+
+def seq_datetime(seq):
+    """Instante (UTC) de um seq do livro de saldos (microssegundos desde a época)"""
+    return datetime.datetime.utcfromtimestamp(seq / 1_000_000)
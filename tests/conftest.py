@@ -0,0 +1,38 @@
+import pytest
+
+from persistence import DirtyTrackingStore, StorageExecutor, WriteBehindFlusher
+from records import UserProfile, Wallet, Inventory
+from sqlite_storage import SQLiteBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    storage = SQLiteBackend(str(tmp_path / 'bot.db'))
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def io():
+    executor = StorageExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def stores():
+    return {
+        'profile': DirtyTrackingStore(UserProfile),
+        'economy': DirtyTrackingStore(Wallet),
+        'inventory': DirtyTrackingStore(Inventory),
+    }
+
+
+@pytest.fixture
+def writers(stores, backend, io):
+    """Um flusher por seção, montado como main.section_writer (campos atribuídos gravados sozinhos)"""
+    return {
+        section: WriteBehindFlusher(section, store, lambda: backend, lambda key, value, now: value, io,
+                                    to_fields=lambda key, fields, now: fields, section=section)
+        for section, store in stores.items()
+    }
@@ -0,0 +1,20 @@
+from like_ledger import LikeLedger
+from records import UserProfile
+
+
+def test_clear_forgets_pending_and_applied_likes(stores):
+    profiles = stores['profile']
+    ledger = LikeLedger(UserProfile, gain_rate=0.5)
+    profiles['1'] = {'username': 'ana', 'followers': 100}
+    ledger.like(10, 'r1', '1', boosted=True)
+    ledger.flush(profiles)
+    ledger.like(11, 'r2', '1', boosted=True)
+
+    ledger.clear()
+    profiles['1'] = {'username': 'ana', 'followers': 10}  # Registro novo depois do reset
+    assert ledger.flush(profiles) == {}
+
+    ledger.unlike(10, 'r1', '1', boosted=False)
+    ledger.flush(profiles)
+    assert profiles['1'].followers == 10  # Não devolve os 50 seguidores da curtida antiga
+    assert ledger.stats()['tracked_likes'] == 0
@@ -0,0 +1,22 @@
+from ranking_index import RankingIndex, RankingSnapshotCache
+
+
+def make_cache(scores, ttl):
+    index = RankingIndex({'seguidores': scores.get})
+    for user_id in scores:
+        index.invalidate(user_id)
+    return index, RankingSnapshotCache(index, lambda user_id, value: (user_id, value), ttl=ttl)
+
+
+def test_pagination_keeps_its_snapshot_until_the_ttl_expires():
+    scores = {'a': 30, 'b': 20, 'c': 10}
+    index, cache = make_cache(scores, ttl=60)
+    shown = cache.get('seguidores')
+
+    scores['c'] = 50  # O ranking muda enquanto alguém navega entre as páginas
+    index.invalidate('c')
+    assert cache.resume(shown) is shown
+    assert cache.get('seguidores').rows[0] == ('c', 50)
+
+    cache.ttl = 0
+    assert cache.resume(shown).rows == [('c', 50), ('a', 30), ('b', 20)]
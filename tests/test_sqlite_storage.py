@@ -0,0 +1,131 @@
+import asyncio
+
+from catalog import CatalogItem
+
+CAR = CatalogItem('bmw-m3', '🏎️ BMW M3', 100, 'Esportivos', 'carros')
+
+
+def test_flush_writes_whole_sections_then_only_assigned_fields(stores, writers, backend):
+    profiles = stores['profile']
+    profiles['1'] = {'username': 'ana', 'followers': 123456, 'total_likes': 999}
+    assert asyncio.run(writers['profile'].flush()) == 1
+
+    # Outro processo alterou o documento: um campo atribuído não pode regravar os demais
+    backend.write_users([('1', {'profile.total_likes': 1000}, ())])
+    profiles['1'].bio = 'oi'
+    asyncio.run(writers['profile'].flush())
+
+    saved = backend.fetch_section('profile')['1']
+    assert saved['followers'] == 123456
+    assert saved['total_likes'] == 1000
+    assert saved['bio'] == 'oi'
+    assert not profiles.is_dirty('1')
+
+
+def test_field_write_creates_a_missing_section(backend):
+    backend.write_users([('1', {'profile.bio': 'oi'}, ())])
+    assert backend.fetch_users(['1'], ['profile']) == {'1': {'profile': {'bio': 'oi'}}}
+
+
+def test_fields_cleared_to_none_stay_cleared_after_reload(stores, writers, backend):
+    profiles = stores['profile']
+    profiles['1'] = {'username': 'ana', 'bio': 'oi'}
+    asyncio.run(writers['profile'].flush())
+    profiles['1'].profile_badge = 'gamer'
+    asyncio.run(writers['profile'].flush())
+
+    profiles['1'].profile_badge = None
+    profiles['1']['bio'] = None
+    asyncio.run(writers['profile'].flush())
+
+    profiles.evict('1')
+    profiles.load_one('1', backend.fetch_users(['1'], ['profile'])['1']['profile'])
+    assert profiles['1'].profile_badge is None
+    assert profiles['1'].bio is None
+    assert profiles['1'].username == 'ana'
+
+
+def test_flush_removes_deleted_sections(stores, writers, backend):
+    stores['profile']['1'] = {'username': 'ana'}
+    stores['economy']['1'] = {'money': 10}
+    asyncio.run(writers['profile'].flush())
+    asyncio.run(writers['economy'].flush())
+
+    del stores['profile']['1']
+    asyncio.run(writers['profile'].flush())
+
+    assert backend.fetch_users(['1'], ['profile', 'economy']) == {'1': {'economy': {'money': 10, 'fame': 0,
+                                                                                   'purchase_ids': [],
+                                                                                   'ledger_seq': 0}}}
+    assert backend.count_users('profile') == 0
+
+
+def test_failed_flush_keeps_records_pending(stores, writers, backend):
+    stores['profile']['1'] = {'username': 'ana'}
+    backend.close()
+    assert asyncio.run(writers['profile'].flush()) == 0
+    assert stores['profile'].is_dirty('1')
+
+
+def test_purchase_is_idempotent(backend):
+    backend.write_users([('1', {'economy': {'money': 250}}, ())])
+
+    assert backend.purchase('1', 'p1', CAR, seq=5, keep=50)
+    assert not backend.purchase('1', 'p1', CAR, seq=6, keep=50)
+
+    money, purchase_ids = backend.purchase_state('1')
+    assert (money, purchase_ids) == (150, ['p1'])
+    inventory = backend.fetch_section('inventory')['1']
+    assert inventory['carros'] == {'bmw-m3': 1}
+    assert inventory['counts'] == {'carros': 1}
+    assert inventory['net_worth'] == 100
+    assert backend.fetch_section('economy')['1']['ledger_seq'] == 5
+
+
+def test_purchase_rejects_insufficient_funds(backend):
+    backend.write_users([('1', {'economy': {'money': 99}}, ())])
+
+    assert not backend.purchase('1', 'p1', CAR, seq=1, keep=50)
+    assert backend.purchase_state('1') == (99, [])
+    assert backend.count_users('inventory') == 0
+
+
+def test_purchase_keeps_only_recent_ids(backend):
+    backend.write_users([('1', {'economy': {'money': 1000}}, ())])
+    for n in range(5):
+        backend.purchase('1', f'p{n}', CAR, seq=n, keep=3)
+    assert backend.purchase_state('1') == (500, ['p2', 'p3', 'p4'])
+
+
+def test_adjust_money_floors_at_zero_and_returns_previous(backend):
+    backend.write_users([('1', {'economy': {'money': 40}}, ())])
+
+    assert backend.adjust_money('1', -100, seq=7) == 40
+    assert backend.purchase_state('1')[0] == 0
+    assert backend.adjust_money('1', 25, seq=8) == 0
+    assert backend.purchase_state('1')[0] == 25
+    assert backend.adjust_money('2', 10, seq=9) == 0  # Usuário sem documento
+    assert backend.purchase_state('2')[0] == 10
+
+
+def test_events_are_deduplicated_and_read_in_seq_order(backend):
+    events = [
+        {'_id': '1:30:money', 'user_id': '1', 'kind': 'money', 'delta': 5, 'reason': 'a', 'seq': 30},
+        {'_id': '1:10:money', 'user_id': '1', 'kind': 'money', 'delta': -2, 'reason': 'b', 'seq': 10},
+        {'_id': '2:20:fame', 'user_id': '2', 'kind': 'fame', 'delta': 1, 'reason': 'c', 'seq': 20},
+    ]
+    assert backend.append_events(events) == []
+    assert backend.append_events(events[:1]) == []  # Regravar o mesmo lote não duplica
+
+    assert [e['seq'] for e in backend.events_since(['1', '2'], 0)] == [10, 20, 30]
+    assert [e['seq'] for e in backend.events_since(['1'], 10)] == [30]
+
+    assert backend.drop_events_before(25) == ['2 eventos']
+    assert [e['seq'] for e in backend.events_since(['1', '2'], 0)] == [30]
+
+
+def test_archive_ignores_posts_already_archived(backend):
+    post = {'_id': '1:99', 'user_id': '1', 'brands': ['Nike'], 'money_gained': 10}
+    assert backend.archive_posts([post]) == []
+    assert backend.archive_posts([post]) == []
+    assert backend._query("SELECT COUNT(*) FROM brand_posts_archive") == [(1,)]
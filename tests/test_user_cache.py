@@ -0,0 +1,61 @@
+import asyncio
+
+from user_cache import UserCache
+
+
+def make_cache(stores, writers, backend, io, **limits):
+    cache = UserCache(stores, lambda user_ids: backend.fetch_users(user_ids, list(stores)), writers, io,
+                      lambda: True, **limits)
+    cache.open()
+    return cache
+
+
+def test_evicted_users_are_written_back_and_reloaded(stores, writers, backend, io):
+    backend.write_users([(user_id, {'profile': {'username': user_id, 'followers': 10}}, ()) for user_id in 'abc'])
+    cache = make_cache(stores, writers, backend, io, max_users=2)
+    profiles = stores['profile']
+
+    async def scenario():
+        await cache.ensure('a')
+        profiles['a'].followers = 123456
+        await cache.ensure('b')
+        await cache.ensure('c')  # Acima do limite: sai 'a', o usado há mais tempo
+        evicted = 'a' not in profiles
+        await cache.ensure('a')
+        return evicted
+
+    assert asyncio.run(scenario())
+    assert cache.writebacks == 1
+    assert backend.fetch_section('profile')['a']['followers'] == 123456
+    assert profiles['a'].followers == 123456
+    assert 'b' not in profiles and len(cache) == 2
+
+
+def test_recently_used_users_stay_in_memory(stores, writers, backend, io):
+    backend.write_users([(user_id, {'profile': {'username': user_id}}, ()) for user_id in 'abc'])
+    cache = make_cache(stores, writers, backend, io, max_users=2)
+
+    async def scenario():
+        await cache.ensure('a', 'b')
+        await cache.ensure('a')
+        await cache.ensure('c')
+
+    asyncio.run(scenario())
+    assert set(stores['profile']) == {'a', 'c'}
+
+
+def test_ensure_waits_until_the_cache_is_opened(stores, writers, backend, io):
+    backend.write_users([('a', {'profile': {'username': 'ana', 'followers': 123456}}, ())])
+    cache = UserCache(stores, lambda user_ids: backend.fetch_users(user_ids, list(stores)), writers, io,
+                      lambda: True)
+
+    async def scenario():
+        loading = asyncio.create_task(cache.ensure('a'))
+        await asyncio.sleep(0.05)
+        loaded_before_open = 'a' in stores['profile']
+        cache.open()
+        await loading
+        return loaded_before_open
+
+    assert not asyncio.run(scenario())
+    assert stores['profile']['a'].followers == 123456
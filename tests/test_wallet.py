@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import pytest
+
+from balance_ledger import BalanceLedger
+from catalog import CatalogItem
+from sqlite_storage import SQLiteBackend
+from wallet import WalletService, PURCHASED, DUPLICATE, INSUFFICIENT
+
+CAR = CatalogItem('bmw-m3', '🏎️ BMW M3', 100, 'Esportivos', 'carros')
+
+
+class SlowWrites(SQLiteBackend):
+    """Lotes do write-behind demoram a chegar ao banco (a operação da carteira roda no meio)"""
+
+    def write_users(self, writes):
+        time.sleep(0.2)
+        return super().write_users(writes)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    storage = SlowWrites(str(tmp_path / 'bot.db'))
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def ledger(stores, backend, io):
+    return BalanceLedger({'profile': stores['profile'], 'economy': stores['economy']}, lambda: backend, io)
+
+
+@pytest.fixture
+def wallet(stores, writers, backend, io, ledger):
+    async def ensure(user_id):
+        pass
+    return WalletService(stores['economy'], stores['inventory'], writers['economy'], writers['inventory'],
+                         lambda: backend, io, ensure, ledger)
+
+
+def load(stores, backend, user_id, **sections):
+    backend.write_users([(user_id, sections, ())])
+    for section, value in sections.items():
+        stores[section].load_one(user_id, value)
+
+
+def test_purchase_debits_once_per_purchase_id(stores, backend, wallet):
+    load(stores, backend, '1', economy={'money': 250})
+
+    async def scenario():
+        return [await wallet.purchase('1', 'p1', CAR), await wallet.purchase('1', 'p1', CAR),
+                await wallet.purchase('1', 'p2', CAR), await wallet.purchase('1', 'p3', CAR)]
+
+    assert asyncio.run(scenario()) == [(PURCHASED, 150), (DUPLICATE, 150), (PURCHASED, 50), (INSUFFICIENT, 50)]
+    assert backend.purchase_state('1') == (50, ['p1', 'p2'])
+    assert stores['inventory']['1'].count('carros') == 2
+    assert not stores['economy'].is_dirty('1')
+
+
+def test_purchase_waits_for_an_economy_flush_in_flight(stores, writers, backend, wallet):
+    load(stores, backend, '1', economy={'money': 200})
+    stores['economy']['1'].money += 50  # Ainda não gravado: 250 em memória, 200 no banco
+
+    async def scenario():
+        flush = asyncio.create_task(writers['economy'].flush())
+        await asyncio.sleep(0.05)  # O lote já saiu da store e está a caminho do banco
+        result = await wallet.purchase('1', 'p1', CAR)
+        await flush
+        return result
+
+    assert asyncio.run(scenario()) == (PURCHASED, 150)
+    assert backend.purchase_state('1') == (150, ['p1'])
+
+
+def test_purchase_waits_for_an_inventory_flush_in_flight(stores, writers, backend, wallet):
+    load(stores, backend, '1', economy={'money': 250}, inventory={})
+    stores['inventory']['1'].add('mansoes', 'casa', 50)
+
+    async def scenario():
+        flush = asyncio.create_task(writers['inventory'].flush())
+        await asyncio.sleep(0.05)
+        result = await wallet.purchase('1', 'p1', CAR)
+        await flush
+        return result
+
+    assert asyncio.run(scenario()) == (PURCHASED, 150)
+    inventory = backend.fetch_section('inventory')['1']
+    assert inventory['carros'] == {'bmw-m3': 1}
+    assert inventory['mansoes'] == {'casa': 1}
+    assert inventory['net_worth'] == 150
+
+
+def test_adjust_floors_at_zero_and_waits_for_flush_in_flight(stores, writers, backend, wallet):
+    load(stores, backend, '1', economy={'money': 10})
+    stores['economy']['1'].money = 40
+
+    async def scenario():
+        flush = asyncio.create_task(writers['economy'].flush())
+        await asyncio.sleep(0.05)
+        results = [await wallet.adjust('1', -100, 'multa'), await wallet.adjust('1', 30, 'prêmio')]
+        await flush
+        return results
+
+    assert asyncio.run(scenario()) == [0, 30]
+    assert backend.purchase_state('1')[0] == 30
+    assert stores['economy']['1'].money == 30
+
+
+def test_ledger_replays_events_newer_than_the_snapshot(stores, backend, io, ledger, wallet):
+    load(stores, backend, '1', economy={'money': 250})
+
+    async def record():
+        await wallet.purchase('1', 'p1', CAR)
+        await wallet.adjust('1', 20, 'prêmio')
+        return await ledger.flush()
+
+    assert asyncio.run(record()) == 2
+
+    # Snapshot anterior aos eventos (documento não gravado antes de uma queda)
+    stores['economy'].evict('1')
+    stores['economy'].load_one('1', {'money': 250, 'ledger_seq': 0})
+    assert asyncio.run(ledger.replay(['1'])) == 2
+    assert stores['economy']['1'].money == 170
+
+
+def test_purchase_does_not_wait_for_other_users_writes(stores, writers, backend, wallet):
+    load(stores, backend, '1', economy={'money': 250})
+    load(stores, backend, '2', economy={'money': 0})
+    stores['economy']['2'].money = 5
+
+    async def scenario():
+        flush = asyncio.create_task(writers['economy'].flush())
+        await asyncio.sleep(0.05)  # Lote só com o usuário 2 a caminho do banco
+        result = await wallet.purchase('1', 'p1', CAR)
+        flush_still_running = not flush.done()
+        await flush
+        return result, flush_still_running
+
+    assert asyncio.run(scenario()) == ((PURCHASED, 150), True)
+    assert backend.purchase_state('2')[0] == 5
+
+
+def test_exclusive_keeps_only_that_user_out_of_batches(stores, writers, backend):
+    economy = stores['economy']
+    load(stores, backend, '1', economy={'money': 10})
+    load(stores, backend, '2', economy={'money': 10})
+
+    async def scenario():
+        async with writers['economy'].exclusive('1'):
+            economy['1'].money = 20
+            economy['2'].money = 30
+            written = await writers['economy'].flush()
+            held_back = economy.is_dirty('1') and backend.purchase_state('1')[0] == 10
+        return written, held_back, await writers['economy'].flush()
+
+    assert asyncio.run(scenario()) == (1, True, 1)
+    assert backend.purchase_state('1')[0] == 20
+    assert backend.purchase_state('2')[0] == 30
@@ -0,0 +1,258 @@
+import asyncio
+import sys
+from collections import OrderedDict
+
+from persistence import TrackedRecord
+
+
+def estimate_size(value):
+    """Bytes aproximados de um registro (dicts, listas e valores dentro dele)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, TrackedRecord):
+        for k, v in value.items():
+            size += estimate_size(v)
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + estimate_size(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            size += estimate_size(v)
+    return size
+
+
+class UserSummaries:
+    """Poucos campos de cada usuário registrado, sempre em memória, para rankings e contagens
+
+    fields: {seção: (campos...)}, ex.: {"profile": ("username", "followers")}. Carregado do
+    banco por projeção na inicialização e mantido pelos listeners das stores enquanto o
+    usuário está no working set, então rankings não dependem de todos estarem carregados.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._rows = {section: {} for section in fields}  # seção -> user_id -> {campo: valor}
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """Registra listener(user_id), chamado quando o resumo de um usuário muda"""
+        self._listeners.append(listener)
+
+    def _notify(self, user_id):
+        for listener in self._listeners:
+            listener(user_id)
+
+    def get(self, section, user_id):
+        """Resumo do usuário na seção ({campo: valor}) ou None se ele não tem a seção"""
+        return self._rows[section].get(user_id)
+
+    def has(self, section, user_id):
+        return user_id in self._rows[section]
+
+    def count(self, section):
+        return len(self._rows[section])
+
+    def values(self, section):
+        return self._rows[section].values()
+
+    def update(self, section, user_id, record):
+        """Atualiza a partir do registro completo (None = registro removido)"""
+        if record is None:
+            if self._rows[section].pop(user_id, None) is None:
+                return
+        else:
+            row = {name: record.get(name) for name in self.fields[section]}
+            if self._rows[section].get(user_id) == row:
+                return
+            self._rows[section][user_id] = row
+        self._notify(user_id)
+
+    def track(self, section, store):
+        """Mantém a seção em dia com as alterações da store"""
+        store.subscribe(lambda user_id: self.update(section, user_id, store.get(user_id)))
+
+    def load(self, documents):
+        """Substitui tudo pelos documentos projetados do banco ({_id, seção: {campos}})"""
+        previous = {user_id for rows in self._rows.values() for user_id in rows}
+        for section in self.fields:
+            self._rows[section] = {
+                doc['_id']: {name: doc[section].get(name) for name in self.fields[section]}
+                for doc in documents if isinstance(doc.get(section), dict)
+            }
+        for user_id in previous | {doc['_id'] for doc in documents}:
+            self._notify(user_id)
+
+
+class UserCache:
+    """Working set de usuários: carrega do banco no primeiro acesso e mantém só os mais recentes
+
+    stores: {seção: DirtyTrackingStore} preenchidas sob demanda. fetch(ids) -> {user_id:
+    {seção: valor}} roda na fila de I/O. Acima de max_users ou max_bytes, os usuários usados
+    há mais tempo saem da memória; os que têm alterações pendentes são gravados antes
+    (writers: {seção: WriteBehindFlusher}). after_load(ids), se informado, é uma corrotina
+    chamada com os ids recém-carregados antes de liberar quem os aguarda.
+
+    Até open() ser chamado (armazenamento conectado, ou desistido dele), ensure() espera: um
+    registro criado nessa janela estaria pendente e sobrescreveria o do banco no próximo flush.
+    """
+
+    def __init__(self, stores, fetch, writers, io, available, max_users=5000, max_bytes=32 * 1024 * 1024,
+                 after_load=None):
+        self.stores = stores
+        self.fetch = fetch
+        self.writers = writers
+        self.io = io
+        self.available = available  # () -> bool: há banco de onde carregar
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self.after_load = after_load
+        self._lru = OrderedDict()  # user_id -> bytes estimados (mais antigo primeiro)
+        self._bytes = 0
+        self._stale = set()        # ids cujo tamanho precisa ser recalculado
+        self._loading = {}         # user_id -> Event do carregamento em andamento
+        self._recent = None        # ids usados durante uma evicção em andamento
+        self._ready = asyncio.Event()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writebacks = 0
+        for store in stores.values():
+            store.subscribe(self._changed)
+
+    def __contains__(self, user_id):
+        return user_id in self._lru
+
+    def __len__(self):
+        return len(self._lru)
+
+    def _changed(self, user_id):
+        # Registros criados sem passar pelo ensure (ex.: registro novo) também entram no working set
+        if user_id not in self._lru:
+            self._lru[user_id] = 0
+        self._stale.add(user_id)
+
+    def open(self):
+        """Libera os carregamentos: a partir daqui available() diz se há banco de onde carregar"""
+        self._ready.set()
+
+    async def ensure(self, *user_ids):
+        """Garante que os usuários estão em memória (carregando do banco os que faltam)"""
+        if not self._ready.is_set():
+            await self._ready.wait()
+        missing = []
+        waiting = []
+        for user_id in dict.fromkeys(user_ids):
+            if user_id in self._lru:
+                self.hits += 1
+                self._lru.move_to_end(user_id)
+                if self._recent is not None:
+                    self._recent.add(user_id)
+            elif user_id in self._loading:
+                waiting.append(self._loading[user_id])
+            else:
+                missing.append(user_id)
+
+        if missing:
+            self.misses += len(missing)
+            loaded = asyncio.Event()
+            for user_id in missing:
+                self._loading[user_id] = loaded
+            try:
+                documents = await self.io.run(self.fetch, missing) if self.available() else {}
+                for user_id in missing:
+                    self._install(user_id, documents.get(user_id, {}))
+                if documents and self.after_load is not None:
+                    await self.after_load(list(documents))
+            finally:
+                for user_id in missing:
+                    self._loading.pop(user_id, None)
+                loaded.set()
+
+        for loaded in waiting:
+            await loaded.wait()
+        await self._evict()
+
+    def _install(self, user_id, sections):
+        for section, store in self.stores.items():
+            value = sections.get(section)
+            if value is not None and user_id not in store:  # Versão local é mais nova
+                store.load_one(user_id, value)
+        self._lru[user_id] = 0
+        self._lru.move_to_end(user_id)
+        self._stale.add(user_id)
+        if self._recent is not None:
+            self._recent.add(user_id)
+
+    def _refresh_sizes(self):
+        stale, self._stale = self._stale, set()
+        for user_id in stale:
+            if user_id not in self._lru:
+                continue
+            size = sum(
+                estimate_size(dict.__getitem__(store, user_id))
+                for store in self.stores.values() if user_id in store
+            )
+            self._bytes += size - self._lru[user_id]
+            self._lru[user_id] = size
+
+    def _over_budget(self, users, size):
+        return users > self.max_users or size > self.max_bytes
+
+    async def _evict(self):
+        if self._recent is not None:
+            return  # Já existe uma evicção em andamento
+        self._refresh_sizes()
+        if not self._over_budget(len(self._lru), self._bytes):
+            return
+
+        self._recent = set()
+        try:
+            # Escolhe os mais antigos até voltar ao orçamento
+            victims = []
+            users, size = len(self._lru), self._bytes
+            for user_id, user_size in self._lru.items():
+                if not self._over_budget(users, size):
+                    break
+                victims.append(user_id)
+                users -= 1
+                size -= user_size
+
+            # Write-back: grava antes as seções em que algum deles tem alterações pendentes
+            dirty_sections = [
+                section for section, store in self.stores.items()
+                if any(store.is_dirty(user_id) for user_id in victims)
+            ]
+            if dirty_sections:
+                self.writebacks += 1
+                await asyncio.gather(*[self.writers[section].flush() for section in dirty_sections])
+
+            for user_id in victims:
+                if (user_id not in self._lru or user_id in self._recent
+                        or any(store.is_dirty(user_id) for store in self.stores.values())):
+                    continue  # Voltou a ser usado ou não foi gravado (banco fora): fica em memória
+                for store in self.stores.values():
+                    store.evict(user_id)
+                self._bytes -= self._lru.pop(user_id)
+                self._stale.discard(user_id)
+                self.evictions += 1
+        finally:
+            self._recent = None
+
+    def reset(self):
+        """Descarta todos os usuários sem alterações pendentes (recarregados no próximo acesso)"""
+        for user_id in list(self._lru):
+            if not any(store.is_dirty(user_id) for store in self.stores.values()):
+                for store in self.stores.values():
+                    store.evict(user_id)
+                self._bytes -= self._lru.pop(user_id)
+                self._stale.discard(user_id)
+
+    def stats(self):
+        self._refresh_sizes()
+        return {
+            'resident_users': len(self._lru),
+            'resident_bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'writebacks': self.writebacks,
+        }
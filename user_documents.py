@@ -0,0 +1,167 @@
+import datetime
+
+from pymongo import UpdateOne
+
+from inventory import compact_inventory
+
+# Um documento por usuário na coleção "users", com uma seção por tipo de dado:
+# {"_id": discord_id, "profile": {...}, "economy": {...}, "inventory": {...},
+#  "brand_posts": {...}, "follow": {"following": [...], "followers": [...]},
+#  "used_reset": bool, "updated_at": datetime}
+USERS_COLLECTION = 'users'
+
+# Seção do documento -> coleção antiga de onde ela vem
+SECTIONS = {
+    'profile': 'user_data',
+    'economy': 'economy_data',
+    'inventory': 'inventory_data',
+    'brand_posts': 'brand_posts_data',
+    'follow': 'follow_data',
+    'used_reset': 'reset_data',
+}
+
+MIGRATION_ID = 'users_v1'
+
+# Posts com marcas que saíram dos recentes da seção brand_posts (só inserção)
+BRAND_POSTS_ARCHIVE = 'brand_posts_archive'
+BRAND_POSTS_MIGRATION_ID = 'brand_posts_v2'
+INVENTORY_MIGRATION_ID = 'inventory_v2'
+
+
+def legacy_section_value(section, doc):
+    """Converte um documento de uma coleção antiga no valor da seção correspondente"""
+    if section == 'brand_posts':
+        return doc.get('posts', {})
+    if section == 'follow':
+        return {'following': doc.get('following', []), 'followers': doc.get('followers', [])}
+    if section == 'used_reset':
+        return doc.get('used_reset', True)
+    return {k: v for k, v in doc.items() if k not in ('_id', 'updated_at', 'migrated_at')}
+
+
+def fetch_section(collection, section):
+    """{user_id: valor da seção} de quem tem a seção, lendo só ela (projeção)"""
+    cursor = collection.find({section: {'$exists': True}}, {section: 1})
+    return {doc['_id']: doc[section] for doc in cursor}
+
+
+def fetch_users(collection, user_ids, sections):
+    """{user_id: {seção: valor}} dos usuários pedidos, lendo só as seções indicadas"""
+    projection = {section: 1 for section in sections}
+    return {
+        doc.pop('_id'): doc
+        for doc in collection.find({'_id': {'$in': list(user_ids)}}, projection)
+    }
+
+
+def fetch_summaries(collection, fields):
+    """Só os campos {seção: (campos...)} de todos os usuários, ex.: para montar os rankings"""
+    projection = {f'{section}.{name}': 1 for section, names in fields.items() for name in names}
+    return list(collection.find({}, projection))
+
+
+def migrate_legacy_collections(db, batch_size=500):
+    """Migração única das seis coleções antigas para "users"
+
+    Retorna {seção: documentos copiados}, ou None se a migração já foi feita. Seções que já
+    existem em "users" (gravadas depois da troca de formato) não são sobrescritas. As coleções
+    antigas ficam intactas.
+    """
+    if db.migrations.find_one({'_id': MIGRATION_ID}) is not None:
+        return None
+
+    users = db[USERS_COLLECTION]
+    counts = {}
+    for section, legacy in SECTIONS.items():
+        operations = []
+        for doc in db[legacy].find({}):
+            value = legacy_section_value(section, doc)
+            # Pipeline de update: só preenche a seção se ela ainda não existir
+            operations.append(UpdateOne(
+                {'_id': doc['_id']},
+                [{'$set': {section: {'$ifNull': ['$' + section, {'$literal': value}]}}}],
+                upsert=True
+            ))
+        for start in range(0, len(operations), batch_size):
+            users.bulk_write(operations[start:start + batch_size], ordered=True)
+        counts[section] = len(operations)
+
+    db.migrations.insert_one({'_id': MIGRATION_ID, 'counts': counts, 'migrated_at': datetime.datetime.utcnow()})
+    return counts
+
+
+def compact_brand_posts(user_id, posts, keep):
+    """Converte a seção brand_posts antiga ({message_id: post}) em totais + últimos keep posts
+
+    Retorna (seção nova, posts para o arquivo).
+    """
+    rewarded = sorted(
+        ({'message_id': message_id, 'brands': post.get('brands', []), 'timestamp': post.get('timestamp', ''),
+          'money_gained': post.get('money_gained', 0), 'fame_gained': post.get('fame_gained', 0),
+          'is_premium': post.get('is_premium', False)}
+         for message_id, post in posts.items() if isinstance(post, dict) and post.get('rewarded', False)),
+        key=lambda post: post['timestamp']
+    )
+    split = max(0, len(rewarded) - keep)
+    section = {
+        'posts': len(rewarded),
+        'money': sum(post['money_gained'] for post in rewarded),
+        'fame': sum(post['fame_gained'] for post in rewarded),
+        'recent': rewarded[split:],
+    }
+    archived = [dict(post, _id=post['message_id'], user_id=user_id) for post in rewarded[:split]]
+    return section, archived
+
+
+def migrate_brand_posts(db, keep, batch_size=500):
+    """Migração única da seção brand_posts para o formato compacto
+
+    Retorna quantos usuários foram convertidos, ou None se a migração já foi feita.
+    """
+    if db.migrations.find_one({'_id': BRAND_POSTS_MIGRATION_ID}) is not None:
+        return None
+
+    users = db[USERS_COLLECTION]
+    archive = db[BRAND_POSTS_ARCHIVE]
+    now = datetime.datetime.utcnow()
+    operations = []
+    archived = []
+    # Seções novas sempre têm "posts"; as antigas só têm ids de mensagem como chaves
+    for doc in users.find({'brand_posts': {'$type': 'object'}, 'brand_posts.posts': {'$exists': False}}, {'brand_posts': 1}):
+        section, old_posts = compact_brand_posts(doc['_id'], doc['brand_posts'], keep)
+        operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'brand_posts': section, 'updated_at': now}}))
+        archived.extend(dict(post, archived_at=now) for post in old_posts)
+
+    # Arquiva antes de reescrever as seções: se parar no meio, a próxima execução refaz (mesmos _id)
+    for start in range(0, len(archived), batch_size):
+        archive.bulk_write([
+            UpdateOne({'_id': post.pop('_id')}, {'$setOnInsert': post}, upsert=True)
+            for post in archived[start:start + batch_size]
+        ], ordered=False)
+    for start in range(0, len(operations), batch_size):
+        users.bulk_write(operations[start:start + batch_size], ordered=True)
+
+    db.migrations.insert_one({'_id': BRAND_POSTS_MIGRATION_ID, 'users': len(operations), 'migrated_at': now})
+    return len(operations)
+
+
+def migrate_inventory(db, batch_size=500):
+    """Migração única da seção inventory de listas de itens para contagens por id
+
+    Retorna quantos usuários foram convertidos, ou None se a migração já foi feita.
+    """
+    if db.migrations.find_one({'_id': INVENTORY_MIGRATION_ID}) is not None:
+        return None
+
+    users = db[USERS_COLLECTION]
+    now = datetime.datetime.utcnow()
+    operations = [
+        UpdateOne({'_id': doc['_id']}, {'$set': {'inventory': compact_inventory(doc['inventory']), 'updated_at': now}})
+        # Seções novas sempre têm "counts"; as antigas só têm as listas
+        for doc in users.find({'inventory': {'$type': 'object'}, 'inventory.counts': {'$exists': False}}, {'inventory': 1})
+    ]
+    for start in range(0, len(operations), batch_size):
+        users.bulk_write(operations[start:start + batch_size], ordered=True)
+
+    db.migrations.insert_one({'_id': INVENTORY_MIGRATION_ID, 'users': len(operations), 'migrated_at': now})
+    return len(operations)
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import weakref
+
+log = logging.getLogger('mxp.db')
+
+# Resultados de purchase()
+PURCHASED = 'purchased'
+DUPLICATE = 'duplicate'
+INSUFFICIENT = 'insufficient'
+FAILED = 'failed'
+
+
+class WalletService:
+    """Operações de dinheiro aplicadas direto no banco, uma por vez por usuário
+
+    Uma compra é uma única operação condicional no armazenamento (StorageBackend.purchase):
+    debita só se economy.money cobre o preço e a compra (purchase_id) ainda não foi aplicada,
+    e na mesma operação soma o item no inventário. Repetir o mesmo purchase_id (clique duplo,
+    outro processo) não debita de novo. Um lock por usuário serializa as operações dele sem
+    travar as dos outros.
+
+    economy e inventory são stores de Wallet e Inventory. Só depois de confirmado no banco o
+    resultado é refletido nelas, dentro de store.persisted() para não ser regravado pelo
+    write-behind. Durante a operação o usuário fica em exclusive() nos flushers das duas
+    seções: o que ele tem pendente é gravado antes e nenhum lote com o saldo antigo dele chega
+    ao banco depois; os outros usuários continuam sendo gravados normalmente. Sem banco, a
+    operação é feita só em memória e gravada pelo write-behind.
+    """
+
+    RECENT_PURCHASES = 50  # purchase_ids guardados por usuário
+
+    def __init__(self, economy, inventory, economy_writer, inventory_writer, get_storage, io, ensure, ledger):
+        self.economy = economy
+        self.inventory = inventory
+        self.economy_writer = economy_writer
+        self.inventory_writer = inventory_writer
+        self.get_storage = get_storage  # () -> StorageBackend ou None sem banco
+        self.io = io
+        self.ensure = ensure  # corrotina ensure(user_id): carrega o usuário em memória
+        self.ledger = ledger  # BalanceLedger onde cada débito/crédito vira um evento
+        self._locks = weakref.WeakValueDictionary()  # user_id -> Lock (some quando ninguém usa)
+
+        # Contadores expostos em stats()
+        self.purchases = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.failures = 0
+
+    def lock(self, user_id):
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        return lock
+
+    def balance(self, user_id):
+        wallet = self.economy.get(user_id)
+        return wallet.money if wallet is not None else 0
+
+    async def purchase(self, user_id, purchase_id, item):
+        """Debita o preço do item (CatalogItem) e soma 1 dele no inventário; retorna (resultado, saldo)"""
+        price = item.preco
+        async with self.lock(user_id):
+            await self.ensure(user_id)
+            wallet = self.economy.get(user_id)
+            if wallet is not None and purchase_id in wallet.purchase_ids:
+                self.duplicates += 1
+                return DUPLICATE, wallet.money
+            if wallet is None or wallet.money < price:
+                self.rejected += 1
+                return INSUFFICIENT, self.balance(user_id)
+
+            storage = self.get_storage()
+            if storage is None:
+                return self._purchase_in_memory(user_id, purchase_id, item)
+
+            # O update condicional compara com o saldo do banco: o que o usuário tem pendente é gravado antes
+            async with self.economy_writer.exclusive(user_id), self.inventory_writer.exclusive(user_id):
+                if self.economy.is_dirty(user_id) or self.inventory.is_dirty(user_id):
+                    # Flush falhou: aplica em memória e deixa para o write-behind
+                    return self._purchase_in_memory(user_id, purchase_id, item)
+
+                seq = self.ledger.next_seq()
+                try:
+                    applied = await self.io.run(storage.purchase, user_id, purchase_id, item, seq, self.RECENT_PURCHASES)
+                except Exception as e:
+                    self.failures += 1
+                    log.error("❌ Erro na compra de %s (%s): %s", user_id, purchase_id, e)
+                    return FAILED, wallet.money
+
+                if not applied:
+                    return await self._explain_rejection(storage, user_id, purchase_id)
+
+                # Aplica como delta: alterações feitas em memória durante o await continuam valendo
+                with self.economy.persisted(user_id), self.inventory.persisted(user_id):
+                    self._apply_purchase(user_id, purchase_id, item)
+                    self.ledger.record(user_id, 'money', -price, f"compra: {item.nome}", seq=seq)
+                self.purchases += 1
+                return PURCHASED, wallet.money
+
+    def _purchase_in_memory(self, user_id, purchase_id, item):
+        self._apply_purchase(user_id, purchase_id, item)
+        self.ledger.record(user_id, 'money', -item.preco, f"compra: {item.nome}")
+        self.purchases += 1
+        return PURCHASED, self.economy[user_id].money
+
+    def _apply_purchase(self, user_id, purchase_id, item):
+        wallet = self.economy[user_id]
+        wallet.money -= item.preco
+        wallet.purchase_ids.append(purchase_id)
+        del wallet.purchase_ids[:-self.RECENT_PURCHASES]
+        if user_id not in self.inventory:
+            self.inventory[user_id] = {}
+        self.inventory[user_id].add(item.tipo, item.id, item.preco)
+
+    async def _explain_rejection(self, storage, user_id, purchase_id):
+        # O banco recusou: compra já aplicada (outro processo) ou saldo do banco menor que o da memória
+        balance, purchase_ids = await self.io.run(storage.purchase_state, user_id)
+        if purchase_id in purchase_ids:
+            self.duplicates += 1
+            return DUPLICATE, balance
+        self.rejected += 1
+        return INSUFFICIENT, balance
+
+    async def adjust(self, user_id, amount, reason):
+        """Soma amount (pode ser negativo) ao saldo, sem deixar abaixo de zero; retorna o novo saldo"""
+        async with self.lock(user_id):
+            await self.ensure(user_id)
+            if user_id not in self.economy:
+                self.economy[user_id] = {}
+
+            storage = self.get_storage()
+            if storage is None:
+                return self.ledger.apply(user_id, 'money', amount, reason, floor=0)
+
+            async with self.economy_writer.exclusive(user_id):
+                if self.economy.is_dirty(user_id):
+                    return self.ledger.apply(user_id, 'money', amount, reason, floor=0)
+
+                seq = self.ledger.next_seq()
+                money = await self.io.run(storage.adjust_money, user_id, amount, seq)
+                applied = max(0, money + amount) - money
+                wallet = self.economy[user_id]
+                with self.economy.persisted(user_id):
+                    wallet.money += applied
+                    self.ledger.record(user_id, 'money', applied, reason, seq=seq)
+                return wallet.money
+
+    def stats(self):
+        return {
+            'purchases': self.purchases,
+            'duplicate_purchases': self.duplicates,
+            'rejected_purchases': self.rejected,
+            'failed_purchases': self.failures,
+        }